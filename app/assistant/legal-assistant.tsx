@@ -35,11 +35,35 @@ interface ParsedSection {
   content: string;
 }
 
+interface StreamPayload {
+  stage?: string;
+  agent?: string;
+  output?: string;
+  text?: string;
+  result?: string;
+  error?: string;
+}
+
+const STAGE_TITLES: Record<string, string> = {
+  case_intake: "Case Intake",
+  ipc_sections: "Relevant IPC Sections",
+  legal_precedents: "Legal Precedents",
+  legal_draft: "Legal Document",
+};
+
+const STAGE_PROGRESS: Record<string, string> = {
+  case_intake: "Understanding your issue...",
+  ipc_sections: "Finding relevant IPC sections...",
+  legal_precedents: "Searching legal precedents...",
+  legal_draft: "Drafting your legal document...",
+};
+
 export default function LegalAssistant() {
     // Removed unused userInput state
     const [messages, setMessages] = useState<Message[]>([]);
     const [, setResult] = useState(""); // result value not used directly in UI but setter is needed
     const [loading, setLoading] = useState(false);
+    const [progress, setProgress] = useState("");
     const [error, setError] = useState("");
     const [apiStatus, setApiStatus] = useState({ isConnected: false, message: "Checking API connection..." });
     const [ipcSections, setIpcSections] = useState<Array<{section: string, title: string}>>([]);
@@ -123,34 +147,92 @@ export default function LegalAssistant() {
       setError("");
       reset({ issue: "" });
       
+      const draftId = `assistant-draft-${Date.now()}`;
+      let draft = "";
+
+      const upsertDraft = (content: string) => {
+        setMessages(prev => {
+          const existing = prev.find(m => m.id === draftId);
+          if (existing) {
+            return prev.map(m => (m.id === draftId ? { ...m, content } : m));
+          }
+          return [...prev, { id: draftId, type: "assistant", content, timestamp: new Date() }];
+        });
+      };
+
+      const handleEvent = (event: string, payload: StreamPayload) => {
+        switch (event) {
+          case "task_started":
+            setProgress(STAGE_PROGRESS[payload.stage ?? ""] ?? "Analyzing your issue...");
+            break;
+          case "task_completed":
+            // Intermediate research is shown as soon as each stage finishes; the draft streams below
+            if (payload.stage && payload.stage !== "legal_draft" && payload.output) {
+              setMessages(prev => [...prev, {
+                id: `assistant-${payload.stage}-${Date.now()}`,
+                type: "assistant",
+                content: `## ${STAGE_TITLES[payload.stage]}\n${payload.output}`,
+                timestamp: new Date()
+              }]);
+            }
+            break;
+          case "token":
+            draft += payload.text ?? "";
+            upsertDraft(draft);
+            break;
+          case "result":
+            setResult(payload.result ?? "");
+            upsertDraft(payload.result ?? draft);
+            break;
+          case "error":
+            setError(payload.error || "Unknown error");
+            break;
+        }
+      };
+
       try {
-        const res = await fetch("http://localhost:5000/analyze", {
+        const res = await fetch("http://localhost:5000/analyze/stream", {
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({ user_input: data.issue }),
         });
-        
-        const responseData = await res.json();
-        
-        if (res.ok) {
-          setResult(responseData.result);
-          
-          // Add assistant message to chat
-          const assistantMessage: Message = {
-            id: `assistant-${Date.now()}`,
-            type: "assistant",
-            content: responseData.result,
-            timestamp: new Date()
-          };
-          
-          setMessages(prev => [...prev, assistantMessage]);
-        } else {
+
+        if (!res.ok || !res.body) {
+          const responseData = await res.json().catch(() => ({}));
           setError(responseData.error || "Unknown error");
+          return;
+        }
+
+        // Parse the Server-Sent Events stream frame by frame
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          let boundary = buffer.indexOf("\n\n");
+          while (boundary !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf("\n\n");
+
+            let event = "message";
+            let payload = "";
+            for (const line of frame.split("\n")) {
+              if (line.startsWith("event: ")) event = line.slice(7);
+              else if (line.startsWith("data: ")) payload += line.slice(6);
+            }
+            if (payload) handleEvent(event, JSON.parse(payload));
+          }
         }
       } catch {
         setError("Failed to connect to backend. Please ensure the API is running.");
       } finally {
         setLoading(false);
+        setProgress("");
       }
     };
     
@@ -469,7 +551,7 @@ export default function LegalAssistant() {
                               className="w-2 h-2 rounded-full bg-blue-600"
                             />
                           </div>
-                          <span className="ml-3 text-sm font-medium text-gray-700 dark:text-gray-300">Analyzing your issue...</span>
+                          <span className="ml-3 text-sm font-medium text-gray-700 dark:text-gray-300">{progress || "Analyzing your issue..."}</span>
                         </div>
                       </div>
                     </motion.div>
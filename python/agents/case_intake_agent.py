@@ -1,12 +1,15 @@
 # case_intake_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+
+from llm_cache import CachedLLM
 
 
 # agent specific LLM - using OpenAI instead of Groq (requires OPENAI_API_KEY in .env)
-llm = LLM(
+llm = CachedLLM(
     provider="openai",
     model="gpt-3.5-turbo",  # Using GPT-3.5 as it's more accessible than GPT-4
+    agent_name="case_intake",
     temperature=0
 )
 
@@ -1,12 +1,14 @@
 # ipc_section_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+from llm_cache import CachedLLM
 from tools.ipc_sections_search_tool import search_ipc_sections
 
 # Using OpenAI instead of Groq (requires OPENAI_API_KEY in .env)
-llm = LLM(
+llm = CachedLLM(
     provider="openai",
     model="gpt-3.5-turbo",  # Using GPT-3.5 as it's more accessible than GPT-4
+    agent_name="ipc_section",
     temperature=0.3
 )
 
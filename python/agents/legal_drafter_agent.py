@@ -1,12 +1,16 @@
 # legal_drafter_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+
+from llm_cache import CachedLLM
 
 # Using OpenAI instead of Groq (requires OPENAI_API_KEY in .env)
-llm = LLM(
+llm = CachedLLM(
     provider="openai",
     model="gpt-3.5-turbo",  # Using GPT-3.5 as it's more accessible than GPT-4
-    temperature=0.4
+    agent_name="legal_drafter",
+    temperature=0.4,
+    stream=True  # tokens are pushed to /analyze/stream clients as they are generated
 )
 
 legal_drafter_agent = Agent(
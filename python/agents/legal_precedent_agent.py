@@ -1,12 +1,14 @@
 # legal_precedent_agent.py
 
-from crewai import Agent, LLM
+from crewai import Agent
+from llm_cache import CachedLLM
 from tools.legal_precedent_search_tool import search_legal_precedents
 
 # Using OpenAI instead of Groq (requires OPENAI_API_KEY in .env)
-llm = LLM(
+llm = CachedLLM(
     provider="openai",
     model="gpt-3.5-turbo",  # Using GPT-3.5 as it's more accessible than GPT-4
+    agent_name="legal_precedent",
     temperature=0
 )
 
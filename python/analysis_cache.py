@@ -0,0 +1,231 @@
+# analysis_cache.py
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import numpy as np
+from dotenv import load_dotenv
+
+from tools.tiered_cache import TieredCache
+
+
+def normalize_input(user_input: str) -> str:
+    """Collapse whitespace and case so trivially different submissions share a cache key."""
+    return " ".join(user_input.lower().split())
+
+
+class AnalysisCache:
+    """
+    Result cache for whole crew runs, in front of the four-agent pipeline.
+
+    The exact tier is keyed on a hash of the normalized input and the crew config
+    version, so any prompt or model change invalidates old entries. The semantic tier
+    embeds each input with the shared embedding model and serves a cached analysis when
+    a new input's cosine similarity to a cached one reaches similarity_threshold. The
+    semantic index lives in memory and holds at most max_entries inputs, evicting the
+    least recently used.
+    """
+
+    def __init__(self, config_version: str, embed: Callable[[str], list[float]] | None = None,
+                 max_entries: int = 512, ttl_seconds: float = 7 * 86400,
+                 similarity_threshold: float = 0.97, db_path: str | None = None):
+        self.config_version = config_version
+        self.embed = embed
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.results = TieredCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            db_path=db_path,
+            table="analysis_results"
+        )
+
+        self._lock = threading.Lock()
+        self._semantic_keys = OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def key(self, user_input: str) -> str:
+        """Exact-tier key for an input under the current crew config."""
+        payload = f"{self.config_version}\n{normalize_input(user_input)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, user_input: str, embedding: list[float] | None = None) -> str | None:
+        """
+        Return a cached analysis for the input, trying the exact tier first.
+
+        Args:
+            user_input (str): The user's legal issue.
+            embedding (list[float] | None): Precomputed embedding of the input, if available.
+
+        Returns:
+            str | None: The cached analysis, or None on a miss.
+        """
+        key = self.key(user_input)
+        result = self.results.get(key)
+        if result is not None:
+            with self._lock:
+                self.exact_hits += 1
+                if key in self._semantic_keys:
+                    self._semantic_keys.move_to_end(key)
+            return result
+
+        if self.embed is not None or embedding is not None:
+            match = self._nearest(embedding if embedding is not None else self.embed(user_input))
+            if match is not None:
+                result = self.results.get(match)
+                if result is not None:
+                    with self._lock:
+                        self.semantic_hits += 1
+                        self._semantic_keys.move_to_end(match)
+                    return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, user_input: str, result: str, embedding: list[float] | None = None):
+        """
+        Cache the analysis for an input in both tiers.
+
+        Args:
+            user_input (str): The user's legal issue.
+            result (str): The crew's final output.
+            embedding (list[float] | None): Precomputed embedding of the input, if available.
+        """
+        key = self.key(user_input)
+        self.results.set(key, result)
+
+        if self.embed is None and embedding is None:
+            return
+
+        vector = np.asarray(embedding if embedding is not None else self.embed(user_input), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+
+        with self._lock:
+            self._semantic_keys[key] = vector
+            self._semantic_keys.move_to_end(key)
+            while len(self._semantic_keys) > self.max_entries:
+                self._semantic_keys.popitem(last=False)
+            self._matrix = None
+
+    def _nearest(self, embedding: list[float]) -> str | None:
+        with self._lock:
+            if not self._semantic_keys:
+                return None
+            if self._matrix is None:
+                self._matrix_keys = list(self._semantic_keys)
+                self._matrix = np.stack([self._semantic_keys[key] for key in self._matrix_keys])
+            matrix, keys = self._matrix, self._matrix_keys
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def run(self, user_input: str, runner: Callable[[str], str]) -> str:
+        """
+        Serve the input from cache, or run the crew and cache its result.
+
+        Args:
+            user_input (str): The user's legal issue.
+            runner (Callable[[str], str]): Runs the crew on a cache miss.
+
+        Returns:
+            str: The analysis.
+        """
+        embedding = self.embed(user_input) if self.embed is not None else None
+        result = self.get(user_input, embedding=embedding)
+        if result is None:
+            result = runner(user_input)
+            self.set(user_input, result, embedding=embedding)
+        return result
+
+    async def arun(self, user_input: str, runner: Callable[[str], Awaitable[str]]) -> str:
+        """
+        Async variant of run(); embedding the input and the cache reads and writes run on a worker thread.
+
+        Args:
+            user_input (str): The user's legal issue.
+            runner (Callable[[str], Awaitable[str]]): Runs the crew on a cache miss.
+
+        Returns:
+            str: The analysis.
+        """
+        embedding = await asyncio.to_thread(self.embed, user_input) if self.embed is not None else None
+        result = await asyncio.to_thread(self.get, user_input, embedding)
+        if result is None:
+            result = await runner(user_input)
+            await asyncio.to_thread(self.set, user_input, result, embedding)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Report hit counts per tier and the overall hit rate.
+
+        Returns:
+            dict: Exact and semantic hits, misses, hit rate and semantic index size.
+        """
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "semantic_entries": len(self._semantic_keys),
+                "config_version": self.config_version
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache(config_version: str) -> AnalysisCache | None:
+    """
+    Return the process-wide analysis cache configured from .env, or None when disabled.
+
+    The semantic tier reuses the IPC retriever's embedding model, so no second copy is loaded.
+
+    Args:
+        config_version (str): Hash of the crew's agent and task configuration.
+
+    Returns:
+        AnalysisCache | None: The shared cache.
+    """
+    global _cache
+    load_dotenv()
+    if os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from tools.ipc_retriever import get_ipc_retriever
+
+                semantic = os.getenv("ANALYSIS_CACHE_SEMANTIC", "true").lower() == "true"
+                _cache = AnalysisCache(
+                    config_version,
+                    embed=(lambda text: get_ipc_retriever().embed_query(text)) if semantic else None,
+                    max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", 512)),
+                    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", 7 * 86400)),
+                    similarity_threshold=float(os.getenv("ANALYSIS_CACHE_SIMILARITY", 0.97)),
+                    db_path=os.getenv("ANALYSIS_CACHE_PATH") or None
+                )
+    return _cache
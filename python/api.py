@@ -1,10 +1,9 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
+import json
 import os
-import sys
 import logging
-from pathlib import Path
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -17,70 +16,105 @@ app = Flask(__name__)
 # Enable CORS for all routes to allow Next.js frontend to call the API
 CORS(app)
 
-# Check for required API keys
-required_keys = ['OPENAI_API_KEY']
-missing_keys = [key for key in required_keys if not os.getenv(key)]
-if missing_keys:
-    logger.error(f"Missing required API keys: {', '.join(missing_keys)}")
-    logger.error("Please add them to your .env file")
-    sys.exit(1)
-
-# Import crew only after environment check to avoid early errors
-try:
-    from crew import legal_assistant_crew
-    logger.info("Successfully imported CrewAI components")
-except ImportError as e:
-    logger.error(f"Failed to import CrewAI: {str(e)}")
-    logger.error("Please ensure all dependencies are installed with: pip install -r requirements.txt")
-    sys.exit(1)
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Simple health check endpoint to verify API is running"""
-    return jsonify({"status": "ok", "message": "API is operational"})
+from api_common import (
+    check_required_keys, crew_unavailable, no_input, queue_full, read_user_input, register_common_routes,
+    submit_analysis
+)
+
+check_required_keys()
+
+from batch import iter_jsonl, iter_queued_batch_results, parse_cases
+from crew_loader import CrewLoader
+from jobs import JobQueue, QueueFullError
+from metrics import REGISTRY, current_trace_id, trace
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'lexora_http_request_seconds',
+    'Time to produce a response (to the first byte for streamed responses), by route and status.',
+    ('method', 'route', 'status')
+)
+
+# The crew, and with it crewai, langchain and the embedding model, loads on a background
+# thread so /health and the IPC section endpoints answer straight away; /ready reports
+# when analyses can start. With WARMUP_ON_START=false it loads on the first analysis instead.
+crew_loader = CrewLoader()
+if os.getenv('WARMUP_ON_START', 'true').lower() == 'true':
+    crew_loader.start()
+
+def run_legal_assistant(user_input, trace_id=None, **options):
+    """Run one analysis under the submitting request's trace ID, waiting for the crew to finish loading if needed"""
+    with trace(trace_id or current_trace_id()):
+        return crew_loader.load().run_legal_assistant(user_input, **options)
+
+# Analyses run on a fixed worker pool; /analyze only enqueues and returns a job id
+job_queue = JobQueue(
+    run_legal_assistant,
+    workers=int(os.getenv('JOB_WORKERS', 2)),
+    max_pending=int(os.getenv('JOB_QUEUE_SIZE', 16))
+)
+
+register_common_routes(app, request, g, crew_loader, lambda: job_queue, HTTP_REQUEST_SECONDS)
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    """Main endpoint to analyze legal issues"""
-    data = request.get_json()
-    user_input = data.get('user_input', '')
-    
-    if not user_input.strip():
-        return jsonify({'error': 'No input provided.'}), 400
-    
+    """Main endpoint to analyze legal issues; queues the analysis and returns a job id to poll"""
+    return submit_analysis(job_queue, request.get_json(silent=True), g.trace_id)
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Streaming variant of /analyze that pushes per-task progress and drafter tokens as Server-Sent Events"""
+    user_input = read_user_input(request.get_json(silent=True))
+    if user_input is None:
+        return no_input()
+
     try:
-        logger.info(f"Processing request: {user_input[:50]}...")
-        result = legal_assistant_crew.kickoff(inputs={"user_input": user_input})
-        return jsonify({'result': result if isinstance(result, str) else str(result)})
+        crew_loader.load()
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
-        return jsonify({'error': f"Error processing your request: {str(e)}"}), 500
+        return crew_unavailable(e)
+    from crew_stream import format_sse, stream_analysis
 
-@app.route('/ipc-sections', methods=['GET'])
-def get_ipc_sections():
-    """Endpoint to retrieve available IPC sections"""
+    logger.info(f"[trace {g.trace_id}] Streaming request: {user_input[:50]}...")
+
+    def generate():
+        for event, payload in stream_analysis(user_input):
+            yield format_sse(event, payload)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Endpoint to analyze many cases at once; accepts JSON, JSONL or CSV and streams results back as JSONL"""
     try:
-        # Read sections from ipc.json
-        ipc_json_path = Path(__file__).parent / 'ipc.json'
-        if not ipc_json_path.exists():
-            return jsonify({'error': 'IPC data not found'}), 404
-            
-        import json
-        with open(ipc_json_path, 'r') as f:
-            ipc_data = json.load(f)
-            
-        # Return summary of sections
-        sections = []
-        for section in ipc_data:
-            sections.append({
-                'section': section.get('section', ''),
-                'title': section.get('title', '')
-            })
-            
-        return jsonify({'sections': sections})
+        if request.is_json:
+            cases = parse_cases('\n'.join(json.dumps(case) for case in request.get_json().get('cases', [])))
+        else:
+            cases = parse_cases(request.get_data(as_text=True), content_type=request.content_type or '')
+    except (ValueError, AttributeError) as e:
+        return {'error': f"Invalid batch: {str(e)}"}, 400
+
+    if not cases:
+        return {'error': 'No cases provided.'}, 400
+
+    try:
+        crew_loader.load()
     except Exception as e:
-        logger.error(f"Error retrieving IPC sections: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return crew_unavailable(e)
+
+    max_concurrency = int(os.getenv('BATCH_CONCURRENCY', 4))
+    concurrency = min(request.args.get('concurrency', max_concurrency, type=int), max_concurrency)
+    # The cases run as jobs on the shared worker pool, so batches get the same backpressure
+    # as /analyze; a client that disconnects cancels the cases not yet started
+    try:
+        results = iter_queued_batch_results(cases, job_queue, concurrency=concurrency, trace_id=g.trace_id)
+    except QueueFullError as e:
+        return queue_full(e)
+    logger.info(f"[trace {g.trace_id}] Processing batch of {len(cases)} cases with concurrency {concurrency}")
+
+    return Response(stream_with_context(iter_jsonl(results)), mimetype='application/x-ndjson')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
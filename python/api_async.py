@@ -0,0 +1,132 @@
+# api_async.py
+#
+# ASGI variant of api.py for serving many concurrent analyses from one small instance.
+# Run from the python/ directory:  hypercorn api_async:app --bind 0.0.0.0:5000
+#
+# It serves the same /health, /ready, /analyze, /jobs and /ipc-sections contract as the
+# Flask app, and shares every route but the analysis run paths with it (api_common.py).
+# Analyses are asyncio tasks driven through CrewAI's async kickoff, so a request waiting
+# on the LLM holds a coroutine rather than an OS thread; the tools' Tavily searches and
+# embeddings run on thread pools.
+
+from quart import Quart, Response, g, request
+from quart_cors import cors
+from dotenv import load_dotenv
+import asyncio
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+app = Quart(__name__)
+# Enable CORS for all routes to allow Next.js frontend to call the API
+app = cors(app, allow_origin='*')
+
+from api_common import (
+    check_required_keys, crew_unavailable, no_input, queue_full, read_user_input, register_common_routes,
+    submit_analysis
+)
+
+check_required_keys()
+
+from crew_loader import CrewLoader
+from jobs import AsyncJobQueue, QueueFullError
+from metrics import REGISTRY, trace
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'lexora_async_http_request_seconds',
+    'Time to produce a response of the async API (to the first byte for streamed responses), by route and status.',
+    ('method', 'route', 'status')
+)
+
+crew_loader = CrewLoader()
+job_queue = None
+
+register_common_routes(app, request, g, crew_loader, lambda: job_queue, HTTP_REQUEST_SECONDS, is_async=True)
+
+async def run_legal_assistant(user_input, trace_id=None, **options):
+    """Run one analysis under the submitting request's trace ID, waiting for the crew to finish loading if needed"""
+    crew = await asyncio.to_thread(crew_loader.load)
+    with trace(trace_id):
+        return await crew.run_legal_assistant_async(user_input, **options)
+
+@app.before_serving
+async def start_serving():
+    global job_queue
+    # Blocking work handed to worker threads (crew kickoffs on CrewAI releases without a
+    # native async kickoff, intake routing, cache lookups) shares the loop's default
+    # executor, so it is sized for the analyses allowed to run at once
+    max_running = int(os.getenv('ASYNC_MAX_ANALYSES', 256))
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(
+        max_workers=int(os.getenv('ASYNC_CREW_THREADS', max_running)), thread_name_prefix='crew'
+    ))
+    job_queue = AsyncJobQueue(
+        run_legal_assistant,
+        max_running=max_running,
+        max_pending=int(os.getenv('ASYNC_QUEUE_SIZE', 256))
+    )
+    # The crew loads on a background thread so /health and the IPC section endpoints
+    # answer straight away; /ready reports when analyses can start
+    if os.getenv('WARMUP_ON_START', 'true').lower() == 'true':
+        crew_loader.start()
+
+@app.route('/analyze', methods=['POST'])
+async def analyze():
+    """Main endpoint to analyze legal issues; starts the analysis and returns a job id to poll"""
+    return submit_analysis(job_queue, await request.get_json(silent=True), g.trace_id)
+
+@app.route('/analyze/stream', methods=['POST'])
+async def analyze_stream():
+    """Streaming variant of /analyze that pushes per-task progress and drafter tokens as Server-Sent Events"""
+    user_input = read_user_input(await request.get_json(silent=True))
+    if user_input is None:
+        return no_input()
+
+    try:
+        await asyncio.to_thread(crew_loader.load)
+    except Exception as e:
+        return crew_unavailable(e)
+    from crew_stream import format_sse
+
+    # The run takes a job slot like /analyze does, and keeps it until the crew finishes
+    # even if the client disconnects, so streams stay within ASYNC_MAX_ANALYSES
+    events = asyncio.Queue()
+    try:
+        job_queue.start(forward_stream, user_input, events)
+    except QueueFullError as e:
+        return queue_full(e)
+
+    logger.info(f"[trace {g.trace_id}] Streaming request: {user_input[:50]}...")
+
+    async def generate():
+        while (item := await events.get()) is not None:
+            yield format_sse(*item).encode('utf-8')
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+async def forward_stream(user_input, events):
+    """Run one streamed analysis, passing its events on until the run ends"""
+    from crew_stream import stream_analysis_async
+
+    try:
+        async for item in stream_analysis_async(user_input):
+            events.put_nowait(item)
+    except Exception as e:
+        events.put_nowait(('error', {'error': f'Error processing your request: {str(e)}'}))
+    finally:
+        events.put_nowait(None)
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5000))
+    app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,228 @@
+# api_common.py
+#
+# Routes and helpers shared by the Flask API (api.py) and its ASGI variant (api_async.py).
+# Flask and Quart both turn returned dicts and (body, status, headers) tuples into JSON
+# responses, so one set of views serves both apps; only the analysis run paths
+# (/analyze, /analyze/stream, /analyze/batch) differ between them.
+
+import functools
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from ipc_corpus import IPCCorpus
+from jobs import QueueFullError
+from metrics import REGISTRY, set_trace_id
+
+logger = logging.getLogger(__name__)
+
+# API keys the crew cannot run without
+REQUIRED_KEYS = ('OPENAI_API_KEY',)
+
+def check_required_keys():
+    """Exit when an API key the crew needs is missing from the environment"""
+    missing_keys = [key for key in REQUIRED_KEYS if not os.getenv(key)]
+    if missing_keys:
+        logger.error(f"Missing required API keys: {', '.join(missing_keys)}")
+        logger.error("Please add them to your .env file")
+        sys.exit(1)
+
+def load_ipc_corpus():
+    """Load the IPC corpus once, so section listings and lookups are served from memory; None without ipc.json"""
+    ipc_json_path = Path(__file__).parent / 'ipc.json'
+    if not ipc_json_path.exists():
+        logger.warning(f"IPC data not found at {ipc_json_path}; IPC section endpoints will return 404")
+        return None
+    return IPCCorpus.load(str(ipc_json_path))
+
+def read_user_input(data):
+    """The legal issue of an analysis request, or None when it has none"""
+    user_input = (data or {}).get('user_input', '')
+    return user_input if isinstance(user_input, str) and user_input.strip() else None
+
+def no_input():
+    return {'error': 'No input provided.'}, 400
+
+def crew_unavailable(e):
+    logger.error(f"Failed to import CrewAI: {str(e)}")
+    logger.error("Please ensure all dependencies are installed with: pip install -r requirements.txt")
+    return {'error': f'Legal assistant is unavailable: {str(e)}'}, 503
+
+def queue_full(e):
+    logger.warning(f"Rejecting request, job queue is full (retry after {e.retry_after}s)")
+    return (
+        {'error': 'Server is busy, please retry later.', 'retry_after': e.retry_after},
+        429,
+        {'Retry-After': str(e.retry_after)}
+    )
+
+def submit_analysis(job_queue, data, trace_id):
+    """Queue the analysis of a request body; the 202 response carries the job id to poll"""
+    user_input = read_user_input(data)
+    if user_input is None:
+        return no_input()
+
+    try:
+        # resume=true replays the recorded LLM responses of a previous run that failed part-way
+        job = job_queue.submit(user_input, resume=bool(data.get('resume', False)), trace_id=trace_id)
+    except QueueFullError as e:
+        return queue_full(e)
+
+    logger.info(f"[trace {trace_id}] Queued job {job.id}: {user_input[:50]}...")
+    payload = job.to_dict()
+    payload['status_url'] = f"/jobs/{job.id}"
+    return payload, 202
+
+def _as_coroutine(function):
+    """Wrap a view or hook in a coroutine, so Quart runs it on the event loop instead of a worker thread"""
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        return function(*args, **kwargs)
+    return wrapper
+
+def register_common_routes(app, request, g, crew_loader, get_job_queue, request_seconds, is_async=False):
+    """
+    Register the tracing hooks and every route that does not start an analysis.
+
+    Args:
+        app (Flask | Quart): The app to register on.
+        request: The framework's request proxy.
+        g: The framework's request globals.
+        crew_loader (CrewLoader): The app's crew loader.
+        get_job_queue (Callable): Returns the app's job queue; the async app only creates it once serving starts.
+        request_seconds (Histogram): Latency histogram for the app's responses.
+        is_async (bool): Whether the app is the Quart one, which is given coroutines.
+    """
+    adapt = _as_coroutine if is_async else (lambda function: function)
+    ipc_corpus = load_ipc_corpus()
+
+    @app.before_request
+    @adapt
+    def start_trace():
+        # Callers may pass their own trace ID to correlate with upstream logs
+        g.trace_id = set_trace_id(request.headers.get('X-Trace-Id'))
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    @adapt
+    def finish_trace(response):
+        response.headers['X-Trace-Id'] = g.trace_id
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        request_seconds.observe(
+            time.perf_counter() - g.request_started,
+            method=request.method, route=route, status=response.status_code
+        )
+        return response
+
+    def cached_json_response(payload):
+        """Serve a pre-serialized JSON payload with ETag revalidation and gzip when accepted"""
+        headers = {
+            'ETag': f'"{payload.etag}"',
+            'Cache-Control': 'public, max-age=86400',
+            'Vary': 'Accept-Encoding'
+        }
+
+        if payload.etag in request.if_none_match:
+            return app.response_class(b'', status=304, headers=headers)
+
+        if 'gzip' in request.accept_encodings:
+            headers['Content-Encoding'] = 'gzip'
+            return app.response_class(payload.gzip_body, mimetype='application/json', headers=headers)
+
+        return app.response_class(payload.body, mimetype='application/json', headers=headers)
+
+    @app.route('/metrics', methods=['GET'])
+    @adapt
+    def metrics():
+        """Prometheus scrape endpoint with latency histograms for requests, crew tasks, LLM calls and tools"""
+        return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/health', methods=['GET'])
+    @adapt
+    def health_check():
+        """Simple health check endpoint to verify API is running"""
+        return {"status": "ok", "message": "API is operational"}
+
+    @app.route('/ready', methods=['GET'])
+    @adapt
+    def readiness_check():
+        """Readiness endpoint; returns 503 until the crew is loaded and analyses can run"""
+        status = crew_loader.status()
+        return status, 200 if status['ready'] else 503
+
+    @app.route('/stats', methods=['GET'])
+    @adapt
+    def stats():
+        """Endpoint to report job queue depth, analysis cache hit rates and intake fast path usage"""
+        cache = intake_router = None
+        if crew_loader.ready:
+            from analysis_cache import get_analysis_cache
+            crew = crew_loader.load()
+            cache = get_analysis_cache(crew.CREW_CONFIG_VERSION)
+            intake_router = crew.get_intake_router(crew.run_llm_intake)
+        return {
+            'jobs': get_job_queue().stats(),
+            'analysis_cache': cache.stats() if cache is not None else None,
+            'intake_fast_path': intake_router.stats() if intake_router is not None else None,
+            'crew': crew_loader.status()
+        }
+
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    @adapt
+    def get_job(job_id):
+        """Endpoint to poll the status, timing and result of an analysis"""
+        job = get_job_queue().get(job_id)
+        if job is None:
+            return {'error': f'Job {job_id} not found'}, 404
+        return job.to_dict()
+
+    @app.route('/jobs/<job_id>', methods=['DELETE'])
+    @adapt
+    def cancel_job(job_id):
+        """Endpoint to cancel a queued or running analysis"""
+        job = get_job_queue().cancel(job_id)
+        if job is None:
+            return {'error': f'Job {job_id} not found'}, 404
+        return job.to_dict()
+
+    @app.route('/ipc-sections', methods=['GET'])
+    @adapt
+    def get_ipc_sections():
+        """Endpoint to retrieve available IPC sections"""
+        if ipc_corpus is None:
+            return {'error': 'IPC data not found'}, 404
+        return cached_json_response(ipc_corpus.sections_payload)
+
+    @app.route('/ipc-sections/<section_id>', methods=['GET'])
+    @adapt
+    def get_ipc_section(section_id):
+        """Endpoint to retrieve a single IPC section by number, e.g. /ipc-sections/304A"""
+        if ipc_corpus is None:
+            return {'error': 'IPC data not found'}, 404
+
+        section = ipc_corpus.get_section(section_id)
+        if section is None:
+            return {'error': f'IPC section {section_id} not found'}, 404
+        return section
+
+    @app.route('/ipc-chapters', methods=['GET'])
+    @adapt
+    def get_ipc_chapters():
+        """Endpoint to list IPC chapters with their section counts"""
+        if ipc_corpus is None:
+            return {'error': 'IPC data not found'}, 404
+        return cached_json_response(ipc_corpus.chapters_payload)
+
+    @app.route('/ipc-chapters/<int:chapter>', methods=['GET'])
+    @adapt
+    def get_ipc_chapter(chapter):
+        """Endpoint to list the sections of one IPC chapter"""
+        if ipc_corpus is None:
+            return {'error': 'IPC data not found'}, 404
+
+        found = ipc_corpus.get_chapter(chapter)
+        if found is None:
+            return {'error': f'IPC chapter {chapter} not found'}, 404
+        return found
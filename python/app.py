@@ -1,13 +1,170 @@
 # app.py
 
+import json
+import re
+import time
+import uuid
+
 import streamlit as st
 from dotenv import load_dotenv
-from crew import legal_assistant_crew
 
 load_dotenv()
 
+# Stage headings, in the order the crew's tasks run
+STAGE_TITLES = {
+    "case_intake": "🗂️ Case Intake",
+    "ipc_sections": "📚 Applicable IPC Sections",
+    "legal_precedents": "🏛️ Legal Precedents",
+    "legal_draft": "📄 Legal Draft"
+}
+
+# Analyses kept in each session's history
+HISTORY_SIZE = 20
+
+# Seconds between refreshes of a running analysis
+REFRESH_SECONDS = 0.5
+
 st.set_page_config(page_title="AI Legal Assistant", page_icon="🧠", layout="wide")
 
+
+@st.cache_resource(show_spinner="⏳ Loading the legal assistant...")
+def load_crew():
+    """Import the crew once per server process; every session and rerun shares it."""
+    from crew_loader import CrewLoader
+
+    return CrewLoader(warm_retriever=False).load()
+
+
+@st.cache_resource(show_spinner="⏳ Loading the IPC sections index...")
+def load_retriever():
+    """Load the IPC retriever and its embedding model once per server process, warmed with one query."""
+    from crew_loader import WARMUP_QUERY
+    from tools.ipc_retriever import get_ipc_retriever
+
+    retriever = get_ipc_retriever()
+    retriever.search(WARMUP_QUERY, k=1)
+    return retriever
+
+
+def parse_json_output(raw: str):
+    """Parse a task output that is JSON, optionally wrapped in a ```json fence; None when it is not."""
+    match = re.search(r"```(?:json)?\s*(.*?)```", raw or "", re.DOTALL)
+    try:
+        return json.loads(match.group(1) if match else raw)
+    except (TypeError, json.JSONDecodeError):
+        return None
+
+
+def render_stage(stage: str, output: str, local: bool = False):
+    """Render one task's output in the form that suits it."""
+    st.subheader(STAGE_TITLES[stage])
+    if stage == "case_intake":
+        from intake import parse_intake
+
+        intake = parse_intake(output)
+        if local:
+            st.caption("Served by the local intake classifier")
+        if intake is not None:
+            st.json(intake)
+            return
+    elif stage == "ipc_sections":
+        sections = parse_json_output(output)
+        if isinstance(sections, list) and sections and all(isinstance(section, dict) for section in sections):
+            st.dataframe(sections, use_container_width=True, hide_index=True)
+            return
+    st.markdown(output)
+
+
+def render_analysis(analysis: dict):
+    """Render an analysis from the session history, complete or still running."""
+    for stage in STAGE_TITLES:
+        if stage in analysis["stages"]:
+            render_stage(stage, analysis["stages"][stage], local=analysis.get("local_intake", False))
+        elif stage in analysis["running"]:
+            st.subheader(STAGE_TITLES[stage])
+            if stage == "legal_draft" and analysis["draft"]:
+                st.markdown(analysis["draft"] + " ▌")
+            else:
+                st.info(f"⏳ {analysis['running'][stage]} is working...")
+
+    if analysis["error"]:
+        st.error(analysis["error"])
+    elif analysis["result"] is not None:
+        if analysis["cached"]:
+            st.success("✅ Served from the analysis cache")
+            render_stage("legal_draft", analysis["result"])
+        else:
+            st.success(f"✅ Legal Assistant completed the workflow in {analysis['seconds']:.0f}s!")
+
+
+def start_analysis(user_input: str) -> dict:
+    """Start a crew run in the background and add it to the session history."""
+    load_crew()
+    load_retriever()
+    from crew_stream import CrewRunStream
+
+    analysis = {
+        "id": uuid.uuid4().hex,
+        "user_input": user_input,
+        "stages": {},
+        "running": {},
+        "draft": "",
+        "local_intake": False,
+        "result": None,
+        "cached": False,
+        "error": None,
+        "started_at": time.time(),
+        "seconds": None,
+        "run": CrewRunStream(user_input).start()
+    }
+    history = st.session_state.history
+    history.insert(0, analysis)
+    del history[HISTORY_SIZE:]
+    return analysis
+
+
+def collect_events(analysis: dict) -> bool:
+    """Apply the events a running analysis has produced so far; returns whether it has finished."""
+    run = analysis["run"]
+    while not run.events.empty():
+        item = run.events.get_nowait()
+        if item is None:
+            analysis["run"] = None
+            analysis["seconds"] = time.time() - analysis["started_at"]
+            return True
+
+        event, data = item
+        if event == "task_started":
+            analysis["running"][data["stage"]] = data["agent"]
+        elif event == "task_completed":
+            analysis["running"].pop(data["stage"], None)
+            analysis["stages"][data["stage"]] = data["output"]
+            analysis["local_intake"] = analysis["local_intake"] or data.get("local", False)
+        elif event == "task_failed":
+            analysis["running"].pop(data["stage"], None)
+        elif event == "token":
+            analysis["draft"] += data["text"]
+        elif event == "result":
+            analysis["result"] = data["result"]
+            analysis["cached"] = data["cached"]
+        elif event == "error":
+            analysis["error"] = data["error"]
+    return False
+
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def show_running(analysis: dict):
+    # Re-runs on its own while the crew works, so each task's output appears as soon
+    # as it completes without re-executing the rest of the page
+    if analysis["run"] is not None and collect_events(analysis):
+        st.rerun()
+    render_analysis(analysis)
+
+
+if "history" not in st.session_state:
+    st.session_state.history = []
+    st.session_state.selected = None
+
 st.title("⚖️ Personal AI Legal Assistant")
 st.markdown(
     "Enter a legal problem in plain English. This assistant will help you:\n"
@@ -25,13 +182,28 @@ if submitted:
     if not user_input.strip():
         st.warning("Please enter a legal issue to analyze.")
     else:
-        with st.spinner("🔎 Analyzing your case and preparing legal output..."):
-            result = legal_assistant_crew.kickoff(inputs={"user_input": user_input})
-
-        st.success("✅ Legal Assistant completed the workflow!")
+        try:
+            st.session_state.selected = start_analysis(user_input)["id"]
+        except Exception as e:
+            st.error(f"Legal assistant is unavailable: {str(e)}")
 
-        # Display final result
-        st.subheader("📄 Final Output")
-        st.markdown(result if isinstance(result, str) else str(result))
+# Past analyses of this session are shown again from memory, without rerunning the crew
+with st.sidebar:
+    st.header("🕘 History")
+    if not st.session_state.history:
+        st.caption("Analyses you run in this session appear here.")
+    for past in st.session_state.history:
+        status = "⏳" if past["run"] is not None else ("❌" if past["error"] else "✅")
+        label = f"{status} {past['user_input'][:40]}{'...' if len(past['user_input']) > 40 else ''}"
+        if st.button(label, key=f"history-{past['id']}", use_container_width=True):
+            st.session_state.selected = past["id"]
 
-        # Optional: Expand sections if intermediate steps are structured (later enhancement)
+analysis = next((past for past in st.session_state.history if past["id"] == st.session_state.selected), None)
+if analysis is not None:
+    st.divider()
+    with st.expander("📝 Legal issue", expanded=False):
+        st.write(analysis["user_input"])
+    if analysis["run"] is not None:
+        show_running(analysis)
+    else:
+        render_analysis(analysis)
@@ -0,0 +1,295 @@
+# batch.py
+
+import contextvars
+import csv
+import io
+import json
+import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator
+
+from analysis_cache import normalize_input
+from jobs import SUCCEEDED, JobQueue, QueueFullError
+
+DEFAULT_CONCURRENCY = 4
+
+# Seconds a queued batch waits before retrying when the job queue is full and none of
+# its own jobs are in flight
+QUEUE_RETRY_SECONDS = 1.0
+
+# Bytes read at a time while scanning a checkpoint backwards for its last line break
+CHECKPOINT_SCAN_BYTES = 65536
+
+
+def parse_cases(text: str, content_type: str = "") -> list[dict]:
+    """
+    Parse a batch of cases from CSV or JSON Lines text.
+
+    CSV input needs a `user_input` column and may have an `id` column. JSONL input
+    holds one object per line with the same fields. Cases without an id are numbered
+    by their position in the batch.
+
+    Args:
+        text (str): The raw batch.
+        content_type (str): MIME type or file name hinting at the format; CSV when it mentions "csv".
+
+    Returns:
+        list[dict]: Cases with `id` and `user_input`.
+    """
+    if "csv" in content_type.lower():
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    cases = []
+    for position, row in enumerate(rows, start=1):
+        user_input = (row.get("user_input") or "").strip()
+        if not user_input:
+            raise ValueError(f"❌ Case {position} has no 'user_input'.")
+        cases.append({"id": str(row.get("id") or position), "user_input": user_input})
+    return cases
+
+
+def read_cases(file_path: str) -> list[dict]:
+    """
+    Load a batch of cases from a .csv or .jsonl file.
+
+    Args:
+        file_path (str): Path to the batch file.
+
+    Returns:
+        list[dict]: Cases with `id` and `user_input`.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        return parse_cases(file.read(), content_type=file_path)
+
+
+def read_checkpoint(output_path: str) -> set[str]:
+    """
+    Collect the ids of cases already completed in an earlier run of the same batch.
+
+    The JSONL output file doubles as the checkpoint: every successfully analysed case is
+    appended as soon as it finishes, so after a crash only the missing ones are rerun.
+    A partially written last line is ignored.
+
+    Args:
+        output_path (str): JSONL output of the earlier run.
+
+    Returns:
+        set[str]: Ids of cases that have a result.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    # Read as bytes: a line cut off by a crash may end inside a multibyte character
+    with open(output_path, "rb") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:  # invalid JSON or UTF-8
+                continue
+            if "result" in record:
+                done.add(str(record["id"]))
+    return done
+
+
+def repair_checkpoint(output_path: str):
+    """
+    Make a checkpoint end with a complete line, so new results are appended after it.
+
+    A last line left half-written by a crash is dropped; one that is complete but
+    lacks its line break gets the line break. Works on bytes, since the cut may fall
+    inside a multibyte UTF-8 character.
+
+    Args:
+        output_path (str): JSONL output of an earlier run.
+    """
+    if not os.path.exists(output_path):
+        return
+
+    with open(output_path, "rb+") as file:
+        end = file.seek(0, os.SEEK_END)
+        line_start = position = end
+        while position > 0:
+            chunk_start = max(0, position - CHECKPOINT_SCAN_BYTES)
+            file.seek(chunk_start)
+            newline = file.read(position - chunk_start).rfind(b"\n")
+            if newline != -1:
+                line_start = chunk_start + newline + 1
+                break
+            position = line_start = chunk_start
+
+        if line_start == end:
+            return
+        file.seek(line_start)
+        try:
+            json.loads(file.read())
+        except ValueError:
+            file.truncate(line_start)
+        else:
+            file.write(b"\n")
+
+
+def iter_batch_results(cases: list[dict], runner: Callable[[str], str],
+                       concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[dict]:
+    """
+    Analyse a batch of cases concurrently and yield one record per case as it completes.
+
+    Cases with the same normalized description are analysed once and the result is
+    reported under each of their ids.
+
+    Args:
+        cases (list[dict]): Cases with `id` and `user_input`.
+        runner (Callable[[str], str]): Analyses one description, e.g. run_legal_assistant.
+        concurrency (int): Maximum number of analyses in flight.
+
+    Yields:
+        dict: `id`, `user_input`, `seconds` and either `result` or `error`.
+    """
+    groups = _group_cases(cases)
+    if not groups:
+        return
+
+    def analyse(members: list[dict]) -> tuple[list[dict], dict]:
+        start = time.perf_counter()
+        try:
+            outcome = {"result": runner(members[0]["user_input"])}
+        except Exception as e:
+            outcome = {"error": str(e)}
+        outcome["seconds"] = round(time.perf_counter() - start, 3)
+        return members, outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, analyse, members)
+            for members in groups
+        ]
+        try:
+            for future in as_completed(futures):
+                members, outcome = future.result()
+                for case in members:
+                    yield {"id": case["id"], "user_input": case["user_input"], **outcome}
+        finally:
+            # When the consumer stops early, only the analyses already running are waited for
+            for future in futures:
+                future.cancel()
+
+
+def iter_queued_batch_results(cases: list[dict], job_queue: JobQueue, concurrency: int = DEFAULT_CONCURRENCY,
+                              **options) -> Iterator[dict]:
+    """
+    Analyse a batch of cases as jobs of a shared job queue and yield one record per case as it completes.
+
+    Unlike iter_batch_results, the batch gets no threads of its own: its analyses run
+    on the queue's workers beside every other job, and at most `concurrency` of them
+    are queued or running at a time. The first job is submitted before this returns,
+    so a full queue is reported before any result is streamed. Closing the returned
+    iterator cancels the batch's jobs that have not started.
+
+    Args:
+        cases (list[dict]): Cases with `id` and `user_input`.
+        job_queue (JobQueue): Queue whose workers run the analyses.
+        concurrency (int): Maximum number of the batch's jobs queued or running.
+        **options: Extra keyword arguments for each job, e.g. trace_id.
+
+    Returns:
+        Iterator[dict]: `id`, `user_input`, `seconds` and either `result` or `error` for each case.
+
+    Raises:
+        QueueFullError: If the queue cannot take the batch's first job.
+    """
+    waiting = deque(_group_cases(cases))
+    in_flight = {}
+    finished = queue.Queue()
+
+    def submit(members: list[dict]):
+        job = job_queue.submit(members[0]["user_input"], **options)
+        in_flight[job.id] = members
+        job.add_done_callback(finished.put)
+
+    if waiting:
+        submit(waiting.popleft())
+
+    def results() -> Iterator[dict]:
+        try:
+            while in_flight or waiting:
+                while waiting and len(in_flight) < max(1, concurrency):
+                    try:
+                        submit(waiting[0])
+                    except QueueFullError:
+                        if in_flight:
+                            break
+                        time.sleep(QUEUE_RETRY_SECONDS)
+                        continue
+                    waiting.popleft()
+
+                job = finished.get()
+                members = in_flight.pop(job.id)
+                if job.status == SUCCEEDED:
+                    outcome = {"result": job.result}
+                else:
+                    outcome = {"error": job.error or f"Analysis {job.status}"}
+                started_at = job.started_at or job.finished_at
+                outcome["seconds"] = round(job.finished_at - started_at, 3)
+                for case in members:
+                    yield {"id": case["id"], "user_input": case["user_input"], **outcome}
+        finally:
+            for job_id in list(in_flight):
+                job_queue.cancel(job_id)
+
+    return results()
+
+
+def _group_cases(cases: list[dict]) -> list[list[dict]]:
+    """Group cases by normalized description, so each distinct one is analysed once."""
+    groups = {}
+    for case in cases:
+        groups.setdefault(normalize_input(case["user_input"]), []).append(case)
+    return list(groups.values())
+
+
+def run_batch(input_path: str, output_path: str, runner: Callable[[str], str],
+              concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+    """
+    Analyse a batch file, appending results to a JSONL file that also serves as a checkpoint.
+
+    Args:
+        input_path (str): .csv or .jsonl file of cases.
+        output_path (str): JSONL file results are appended to.
+        runner (Callable[[str], str]): Analyses one description.
+        concurrency (int): Maximum number of analyses in flight.
+
+    Returns:
+        dict: Counts of cases skipped from the checkpoint, succeeded and failed.
+    """
+    cases = read_cases(input_path)
+    repair_checkpoint(output_path)
+    done = read_checkpoint(output_path)
+    pending = [case for case in cases if case["id"] not in done]
+
+    succeeded = failed = 0
+    with open(output_path, "a", encoding="utf-8") as output:
+        for record in iter_batch_results(pending, runner, concurrency=concurrency):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            if "result" in record:
+                succeeded += 1
+            else:
+                failed += 1
+
+    return {"skipped": len(cases) - len(pending), "succeeded": succeeded, "failed": failed}
+
+
+def iter_jsonl(records: Iterable[dict]) -> Iterator[str]:
+    """Encode records as JSON Lines; closing the encoder closes the records too."""
+    try:
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+    finally:
+        close = getattr(records, "close", None)
+        if close is not None:
+            close()
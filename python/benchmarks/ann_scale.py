@@ -0,0 +1,182 @@
+# ann_scale.py
+#
+# Approximate versus exact vector search at multi-statute corpus sizes.
+# Run from the python/ directory:  python -m benchmarks.ann_scale [--size 200000] [--artifact DIR]
+#
+# The corpus is synthetic by default: clustered vectors on a low-dimensional subspace,
+# which is how sentence embeddings of legal text are distributed. With --artifact, the
+# vectors of a real embedding artifact (IPC_EMBEDDINGS_PATH) are replicated with small
+# perturbations up to --size instead. Queries are perturbed corpus vectors, and the exact
+# float32 top-k of each one is the ground truth.
+#
+# Reported per configuration: recall@k against exact search, p50/p99 search latency,
+# index bytes per vector and build time. Configurations with re-ranking also read k *
+# rerank float32 vectors per query from the (memory-mapped, in production) artifact.
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import RESULTS_DIR, git_commit, summarize
+from tools.ipc_ann_index import ApproximateVectorIndex, HNSWIndex, IVFIndex
+
+
+def synthetic_corpus(size: int, dimension: int, clusters: int, rank: int, seed: int = 0) -> np.ndarray:
+    """Clustered float32 vectors spanning a `rank`-dimensional subspace, plus isotropic noise."""
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, dimension)).astype(np.float32)
+    centers = rng.normal(size=(clusters, rank)).astype(np.float32)
+    corpus = np.empty((size, dimension), dtype=np.float32)
+    for start in range(0, size, 65536):
+        end = min(start + 65536, size)
+        latent = centers[rng.integers(0, clusters, end - start)] + 0.5 * rng.normal(size=(end - start, rank))
+        corpus[start:end] = latent.astype(np.float32) @ basis
+        corpus[start:end] += 0.05 * rng.normal(size=(end - start, dimension)).astype(np.float32)
+    return corpus
+
+
+def replicated_corpus(artifact_dir: str, size: int, seed: int = 0) -> np.ndarray:
+    """Real artifact vectors repeated with small perturbations until the corpus has `size` rows."""
+    from tools.ipc_embedding_artifact import read_embedding_artifact
+
+    matrix, _, _, _ = read_embedding_artifact(artifact_dir)
+    rng = np.random.default_rng(seed)
+    original = np.asarray(matrix[:size], dtype=np.float32)
+    replicas = original[rng.integers(0, len(original), size - len(original))]
+    replicas += 0.02 * rng.normal(size=replicas.shape).astype(np.float32)
+    return np.concatenate([original, replicas])
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def measure(search, queries: np.ndarray, truth: list[np.ndarray], k: int) -> dict:
+    """recall@k against the exact results and search latency in milliseconds."""
+    recalls, latencies = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(np.asarray(ids).tolist()) & set(expected.tolist())) / k)
+    return {"recall": float(np.mean(recalls)), "search_ms": summarize(latencies)}
+
+
+def approximate_search(ann, corpus: np.ndarray, rerank: int):
+    index = ApproximateVectorIndex(
+        ann, [{"section": row} for row in range(len(corpus))], [""] * len(corpus), embeddings=corpus, rerank=rerank
+    )
+    return lambda query, k: [result["section"] for result in index.search(query, k=k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare approximate and exact vector search at scale.")
+    parser.add_argument("--size", type=int, default=200000, help="number of vectors in the corpus")
+    parser.add_argument("--dimension", type=int, default=768, help="synthetic vector dimension")
+    parser.add_argument("--artifact", help="replicate the vectors of this embedding artifact instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, help="IVF lists (default: 4 * sqrt(size))")
+    parser.add_argument("--nprobe", default="4,16,64", help="comma-separated IVF probe counts")
+    parser.add_argument("--pq-subspaces", type=int, help="PQ bytes per vector (default: dimension / 8)")
+    parser.add_argument("--ef-search", default="32,64,128", help="comma-separated HNSW beam widths")
+    parser.add_argument("--rerank", type=int, default=4, help="candidates per result re-scored for the PQ runs")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/ann-<commit>.json)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    if args.artifact:
+        corpus = replicated_corpus(args.artifact, args.size)
+    else:
+        corpus = synthetic_corpus(args.size, args.dimension, clusters=max(16, args.size // 500), rank=64)
+    corpus = normalize(corpus)
+    dimension = corpus.shape[1]
+    queries = normalize(corpus[rng.integers(0, len(corpus), args.queries)]
+                        + 0.05 * rng.normal(size=(args.queries, dimension)).astype(np.float32))
+    print(f"{len(corpus)} vectors of dimension {dimension}, {args.queries} queries, recall@{args.k}\n")
+
+    truth = [exact_top_k(corpus, query, args.k) for query in queries]
+    configurations = [{
+        "index": "exact-float32",
+        "params": {},
+        "build_seconds": 0.0,
+        "bytes_per_vector": corpus.nbytes / len(corpus),
+        **measure(lambda query, k: exact_top_k(corpus, query, k), queries, truth, args.k)
+    }]
+
+    nlist = args.nlist or int(4 * np.sqrt(len(corpus)))
+    pq_subspaces = args.pq_subspaces or dimension // 8
+    builds = [
+        ("ivf-int8", lambda: IVFIndex(nlist=nlist, quantization="int8"), 0),
+        ("ivf-pq", lambda: IVFIndex(nlist=nlist, quantization="pq", pq_subspaces=pq_subspaces), args.rerank)
+    ]
+    for name, factory, rerank in builds:
+        print(f"Building {name} (nlist {nlist})...")
+        start = time.perf_counter()
+        ann = factory().build(corpus)
+        build_seconds = time.perf_counter() - start
+        for nprobe in [int(value) for value in args.nprobe.split(",")]:
+            ann.nprobe = nprobe
+            for rerank_factor in sorted({0, rerank}):
+                configurations.append({
+                    "index": name,
+                    "params": {"nlist": nlist, "nprobe": nprobe, "rerank": rerank_factor,
+                               **({"pq_subspaces": pq_subspaces} if name == "ivf-pq" else {})},
+                    "build_seconds": build_seconds,
+                    "bytes_per_vector": ann.nbytes / len(corpus),
+                    **measure(approximate_search(ann, corpus, rerank_factor), queries, truth, args.k)
+                })
+
+    try:
+        print("Building hnsw...")
+        start = time.perf_counter()
+        ann = HNSWIndex().build(corpus)
+        build_seconds = time.perf_counter() - start
+        for ef_search in [int(value) for value in args.ef_search.split(",")]:
+            ann.ef_search = ef_search
+            configurations.append({
+                "index": "hnsw",
+                "params": {"m": ann.m, "ef_construction": ann.ef_construction, "ef_search": ef_search},
+                "build_seconds": build_seconds,
+                "bytes_per_vector": ann.nbytes / len(corpus),
+                **measure(approximate_search(ann, corpus, 0), queries, truth, args.k)
+            })
+    except ImportError as e:
+        print(f"  skipping hnsw: {e}")
+
+    print()
+    header = f"{'index':<14} {'params':<44} {'recall':>6} {'p50 ms':>8} {'p99 ms':>8} {'B/vector':>9} {'build s':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in configurations:
+        params = " ".join(f"{name}={value}" for name, value in result["params"].items())
+        print(f"{result['index']:<14} {params:<44} {result['recall']:>6.3f} {result['search_ms']['p50']:>8.2f} "
+              f"{result['search_ms']['p99']:>8.2f} {result['bytes_per_vector']:>9.0f} {result['build_seconds']:>8.1f}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "corpus": {"size": len(corpus), "dimension": dimension, "source": args.artifact or "synthetic"},
+        "queries": args.queries,
+        "k": args.k,
+        "configurations": configurations
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"ann-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# api_load.py
+#
+# Concurrent-request capacity of the Flask API (api.py) against the async API (api_async.py).
+# Run from the python/ directory:  python -m benchmarks.api_load [--concurrency 8,32,128,256]
+#
+# Both servers run the real crew, tools and IPC retriever in a subprocess, with the
+# network replaced as in benchmarks/e2e.py: LLM calls go to a local stub server and
+# precedent searches to a fake Tavily client. At each concurrency level that many
+# analyses are submitted to /analyze at once and their jobs polled until they finish;
+# /health is probed throughout to see whether the server stays responsive.
+#
+# Reported per server and level: end-to-end latency percentiles, throughput, rejected
+# (429) and failed analyses, /health latency, and the server's RSS and OS thread count.
+# A server's capacity is the highest level it completes without rejections or errors
+# and with p95 latency within --max-slowdown of its single-analysis latency.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.common import RESULTS_DIR, git_commit, summarize
+from benchmarks.e2e import CORPUS_PATH, configure_environment
+from benchmarks.stubs import FakeTavilyClient, StubLLMServer
+
+SERVERS = ("flask", "async")
+
+# Seconds between polls of a job's status
+POLL_INTERVAL = 0.25
+
+
+def serve(server: str, port: int, tavily_latency: float):
+    """Run one of the APIs on localhost with the fake Tavily client; called in the server subprocess."""
+    if server == "flask":
+        from werkzeug.serving import make_server
+
+        import api as module
+    else:
+        import asyncio
+
+        from hypercorn.asyncio import serve as serve_asgi
+        from hypercorn.config import Config
+
+        import api_async as module
+
+    from tools import legal_precedent_search_tool
+
+    legal_precedent_search_tool._client = FakeTavilyClient(latency=tavily_latency)
+
+    if server == "flask":
+        # The threaded development server, as api.py runs by default
+        make_server("127.0.0.1", port, module.app, threaded=True).serve_forever()
+    else:
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.accesslog = None
+        asyncio.run(serve_asgi(module.app, config))
+
+
+def _request(method: str, url: str, payload: dict | None = None, timeout: float = 30) -> tuple[int, dict]:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def process_stats(pid: int) -> dict:
+    """RSS in MB and OS thread count of a process (Linux only)."""
+    stats = {}
+    with open(f"/proc/{pid}/status", "r", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                stats["rss_mb"] = int(line.split()[1]) / 1024
+            elif line.startswith("Threads:"):
+                stats["threads"] = int(line.split()[1])
+    return stats
+
+
+def start_server(server: str, port: int, tavily_latency: float, env: dict, ready_timeout: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.api_load", "--serve", server, "--port", str(port),
+         "--tavily-latency", str(tavily_latency)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} server exited with code {process.returncode}")
+        try:
+            if _request("GET", f"http://127.0.0.1:{port}/ready", timeout=2)[0] == 200:
+                return process
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"{server} server was not ready after {ready_timeout:.0f}s")
+
+
+def analyse(base_url: str, case: str, timeout: float) -> tuple[str, float | None, str | None]:
+    """Submit one analysis and poll it to completion; returns (outcome, seconds, error)."""
+    start = time.perf_counter()
+    status, body = _request("POST", f"{base_url}/analyze", {"user_input": case})
+    if status == 429:
+        return "rejected", None, None
+    if status != 202:
+        return "failed", None, body.get("error") or f"HTTP {status}"
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        _, job = _request("GET", f"{base_url}{body['status_url']}")
+        if job.get("status") == "succeeded":
+            return "succeeded", time.perf_counter() - start, None
+        if job.get("status") in ("failed", "cancelled"):
+            return "failed", None, job.get("error") or job.get("status")
+    return "failed", None, "timed out"
+
+
+def run_level(base_url: str, pid: int, cases: list[str], concurrency: int, timeout: float) -> dict:
+    """Submit `concurrency` analyses at once and wait for all of them, probing /health meanwhile."""
+    health_ms, peak = [], process_stats(pid)
+    done = threading.Event()
+
+    def probe():
+        nonlocal peak
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                _request("GET", f"{base_url}/health", timeout=10)
+                health_ms.append((time.perf_counter() - start) * 1000)
+            except (urllib.error.URLError, OSError):
+                health_ms.append(10000.0)
+            stats = process_stats(pid)
+            peak = {name: max(value, peak.get(name, 0)) for name, value in stats.items()}
+            time.sleep(0.2)
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    workload = [cases[index % len(cases)] for index in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda case: analyse(base_url, case, timeout), workload))
+    wall = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    latencies = [seconds for outcome, seconds, _ in outcomes if outcome == "succeeded"]
+    errors = [error for outcome, _, error in outcomes if outcome == "failed"]
+    return {
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "rejected": sum(outcome == "rejected" for outcome, _, _ in outcomes),
+        "failed": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else None,
+        "latency_seconds": summarize(latencies),
+        "health_ms": summarize(health_ms),
+        "peak_rss_mb": peak.get("rss_mb"),
+        "peak_threads": peak.get("threads")
+    }
+
+
+def capacity(levels: list[dict], max_slowdown: float) -> int:
+    """Highest level served without rejections or failures and with p95 within max_slowdown of the single-run p50."""
+    baseline = next((level["latency_seconds"]["p50"] for level in levels if level["succeeded"]), None)
+    best = 0
+    for level in levels:
+        p95 = level["latency_seconds"]["p95"]
+        if level["rejected"] or level["failed"] or p95 is None or p95 > max_slowdown * baseline:
+            break
+        best = level["concurrency"]
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare concurrent-request capacity of the Flask and async APIs.")
+    parser.add_argument("--serve", choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--servers", default=",".join(SERVERS), help="comma-separated servers to test")
+    parser.add_argument("--concurrency", default="1,8,32,128,256", help="comma-separated concurrency levels")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds before each stub LLM response")
+    parser.add_argument("--tavily-latency", type=float, default=0.8, help="seconds per fake Tavily search")
+    parser.add_argument("--flask-workers", type=int, default=8, help="JOB_WORKERS of the Flask API")
+    parser.add_argument("--queue-size", type=int, default=256, help="JOB_QUEUE_SIZE / ASYNC_QUEUE_SIZE")
+    parser.add_argument("--max-analyses", type=int, default=256, help="ASYNC_MAX_ANALYSES of the async API")
+    parser.add_argument("--max-slowdown", type=float, default=2.0,
+                        help="p95 latency, as a multiple of the single-analysis latency, a level may reach")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for each analysis")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/api-load-<commit>.json)")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.tavily_latency)
+        return
+
+    stub = StubLLMServer(latency=args.llm_latency).start()
+    configure_environment(stub, keep_caches=False)
+    env = {
+        **os.environ,
+        "WARMUP_ON_START": "true",
+        "JOB_WORKERS": str(args.flask_workers),
+        "JOB_QUEUE_SIZE": str(args.queue_size),
+        "ASYNC_MAX_ANALYSES": str(args.max_analyses),
+        "ASYNC_QUEUE_SIZE": str(args.queue_size)
+    }
+
+    with open(CORPUS_PATH, "r", encoding="utf-8") as file:
+        cases = [line.strip() for line in file if line.strip()]
+
+    results = {}
+    for server in args.servers.split(","):
+        print(f"Starting the {server} API...")
+        process = start_server(server, args.port, args.tavily_latency, env, ready_timeout=300)
+        base_url = f"http://127.0.0.1:{args.port}"
+        levels = []
+        try:
+            for concurrency in [int(level) for level in args.concurrency.split(",")]:
+                print(f"  {concurrency} concurrent analyses...")
+                level = run_level(base_url, process.pid, cases, concurrency, args.timeout)
+                levels.append(level)
+                latency = level["latency_seconds"]
+                if latency["count"]:
+                    print(f"    p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  "
+                          f"{level['throughput_rps']:.2f} req/s  ", end="")
+                print(f"{level['rejected']} rejected  {level['failed']} failed  "
+                      f"/health p95 {level['health_ms']['p95']:.0f}ms  "
+                      f"{level['peak_threads']} threads  {level['peak_rss_mb']:.0f} MB")
+        finally:
+            process.terminate()
+            process.wait()
+        results[server] = {"capacity": capacity(levels, args.max_slowdown), "levels": levels}
+        print(f"  capacity: {results[server]['capacity']} concurrent analyses\n")
+
+    stub.stop()
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "llm_latency": args.llm_latency,
+            "tavily_latency": args.tavily_latency,
+            "flask_workers": args.flask_workers,
+            "queue_size": args.queue_size,
+            "max_analyses": args.max_analyses,
+            "max_slowdown": args.max_slowdown
+        },
+        "servers": results
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"api-load-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# e2e.py
+#
+# Offline end-to-end benchmark of the legal assistant crew.
+# Run from the python/ directory:  python -m benchmarks.e2e [--concurrency 1,4,8]
+#
+# The real crew, tools and IPC retriever run as in production; only the network is
+# replaced: LLM calls go to a local OpenAI-compatible stub server and precedent
+# searches to a fake Tavily client, both with configurable latency. The IPC vector
+# database and embedding model must be available as configured in .env.
+#
+# Every case in sample_inputs.txt is analysed --runs times at each concurrency level.
+# The JSON report (end-to-end percentiles, throughput, per-stage times, tool metrics
+# and peak RSS) is named after the current commit, so runs can be diffed between commits.
+
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.common import RESULTS_DIR, current_rss_mb, git_commit, peak_rss_mb, summarize
+from benchmarks.stubs import FakeTavilyClient, StubLLMServer
+
+CORPUS_PATH = Path(__file__).parent.parent / "sample_inputs.txt"
+
+
+def configure_environment(stub: StubLLMServer, keep_caches: bool):
+    """Route LiteLLM to the stub server and, unless asked not to, switch every result cache off."""
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_API_BASE"] = stub.base_url
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["TAVILY_API_KEY"] = "stub"
+    if not keep_caches:
+        os.environ["ANALYSIS_CACHE_ENABLED"] = "false"
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+        os.environ["PRECEDENT_CACHE_SIZE"] = "0"
+        os.environ["PRECEDENT_CACHE_PATH"] = ""
+
+
+class StageRecorder:
+    """Collects the wall time of every crew task, per agent, from the CrewAI event bus."""
+
+    def __init__(self):
+        from crew_metrics import TaskCompletedEvent, TaskStartedEvent, crewai_event_bus
+
+        self.durations = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_started(source, event):
+            with self._lock:
+                self._started[id(source)] = time.perf_counter()
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_completed(source, event):
+            with self._lock:
+                started = self._started.pop(id(source), None)
+                if started is not None:
+                    self.durations.setdefault(source.agent.role, []).append(time.perf_counter() - started)
+
+    def reset(self):
+        with self._lock:
+            self.durations = {}
+            self._started = {}
+
+
+def run_level(cases: list[str], runner, concurrency: int, runs: int) -> dict:
+    """
+    Analyse every case `runs` times with `concurrency` analyses in flight.
+
+    Returns:
+        dict: End-to-end latency summary, throughput and error count.
+    """
+    latencies, errors = [], []
+
+    def analyse(case: str):
+        start = time.perf_counter()
+        try:
+            runner(case)
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+    workload = [case for _ in range(runs) for case in cases]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(analyse, workload))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(workload),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else None,
+        "latency_seconds": summarize(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with stub LLM and Tavily.")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated concurrency levels")
+    parser.add_argument("--runs", type=int, default=1, help="passes over the corpus per concurrency level")
+    parser.add_argument("--limit", type=int, help="only use the first N cases of the corpus")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds before each stub LLM response")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0,
+                        help="pace streamed stub responses (0 streams instantly)")
+    parser.add_argument("--tavily-latency", type=float, default=0.8, help="seconds per fake Tavily search")
+    parser.add_argument("--keep-caches", action="store_true",
+                        help="leave the analysis, LLM and precedent caches as configured in .env")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/e2e-<commit>.json)")
+    args = parser.parse_args()
+
+    stub = StubLLMServer(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second).start()
+    configure_environment(stub, args.keep_caches)
+
+    with open(CORPUS_PATH, "r", encoding="utf-8") as file:
+        cases = [line.strip() for line in file if line.strip()][:args.limit]
+
+    baseline_rss = current_rss_mb()
+    load_start = time.perf_counter()
+    import crew
+    from metrics import REGISTRY
+    from tools import legal_precedent_search_tool
+    from tools.ipc_retriever import get_ipc_retriever
+
+    tavily = FakeTavilyClient(latency=args.tavily_latency)
+    legal_precedent_search_tool._client = tavily
+    get_ipc_retriever().search(cases[0], k=1)
+    load_seconds = time.perf_counter() - load_start
+    loaded_rss = current_rss_mb()
+
+    def runner(case: str) -> str:
+        return crew.run_legal_assistant(case, use_cache=args.keep_caches)
+
+    stages = StageRecorder()
+
+    print(f"Warming up on one case (crew loaded in {load_seconds:.1f}s)...")
+    runner(cases[0])
+    stages.reset()
+
+    levels = []
+    for concurrency in [int(level) for level in args.concurrency.split(",")]:
+        print(f"Running {len(cases) * args.runs} analyses at concurrency {concurrency}...")
+        result = run_level(cases, runner, concurrency, args.runs)
+        result["stage_seconds"] = {role: summarize(values) for role, values in stages.durations.items()}
+        result["rss_mb_after"] = current_rss_mb()
+        stages.reset()
+        levels.append(result)
+
+        latency = result["latency_seconds"]
+        print(f"  p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  p99 {latency['p99']:.2f}s  "
+              f"{result['throughput_rps']:.2f} req/s  {result['errors']} errors")
+        for role, summary in result["stage_seconds"].items():
+            print(f"    {role:<32} p50 {summary['p50']:.2f}s  p95 {summary['p95']:.2f}s")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "cases": len(cases),
+            "runs": args.runs,
+            "llm_latency": args.llm_latency,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "tavily_latency": args.tavily_latency,
+            "keep_caches": args.keep_caches
+        },
+        "startup": {"load_seconds": load_seconds, "rss_mb_before": baseline_rss, "rss_mb_loaded": loaded_rss},
+        "levels": levels,
+        "peak_rss_mb": peak_rss_mb(),
+        "stub_calls": {"llm": stub.calls, "tavily": tavily.calls},
+        "metrics": REGISTRY.snapshot()
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"e2e-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nPeak RSS {report['peak_rss_mb']:.0f} MB. Report written to {output}")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
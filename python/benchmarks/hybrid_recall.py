@@ -0,0 +1,90 @@
+# hybrid_recall.py
+#
+# Compare dense-only and hybrid (BM25 + dense) IPC retrieval on a labelled query set.
+# Run from the python/ directory:  python -m benchmarks.hybrid_recall
+
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from tools.ipc_lexical_index import section_key
+from tools.ipc_retriever import IPCRetriever
+
+QUERIES_PATH = Path(__file__).parent / "ipc_queries.json"
+K_VALUES = (1, 3, 5)
+
+
+def evaluate(retriever: IPCRetriever, labelled_queries: list[dict]) -> dict:
+    """
+    Measure recall@k and per-query latency for one retriever configuration.
+
+    Args:
+        retriever (IPCRetriever): Retriever to evaluate, already warmed up.
+        labelled_queries (list[dict]): Entries with `query` and `expected_sections`.
+
+    Returns:
+        dict: recall@k for each k in K_VALUES, plus mean and p95 latency in milliseconds.
+    """
+    max_k = max(K_VALUES)
+    hits = {k: 0.0 for k in K_VALUES}
+    latencies = []
+
+    for item in labelled_queries:
+        expected = {section_key(section) for section in item["expected_sections"]}
+
+        start = time.perf_counter()
+        results = retriever.search(item["query"], k=max_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [section_key(result["section"]) for result in results]
+        for k in K_VALUES:
+            # A query counts as recalled at k when any expected section is in the top k
+            hits[k] += 1.0 if expected & set(ranked[:k]) else 0.0
+
+    report = {f"recall@{k}": hits[k] / len(labelled_queries) for k in K_VALUES}
+    report["mean_ms"] = statistics.mean(latencies)
+    report["p95_ms"] = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+    return report
+
+
+def main():
+    load_dotenv()
+
+    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
+    ipc_json_path = os.getenv("IPC_JSON_PATH")
+    if not persist_dir_path or not ipc_json_path:
+        print("Error: 'PERSIST_DIRECTORY_PATH' and 'IPC_JSON_PATH' must be set in .env")
+        sys.exit(1)
+
+    with open(QUERIES_PATH, "r", encoding="utf-8") as file:
+        labelled_queries = json.load(file)
+
+    retriever = IPCRetriever(
+        persist_dir_path,
+        os.getenv("IPC_COLLECTION_NAME"),
+        backend=os.getenv("IPC_INDEX_BACKEND", "numpy"),
+        artifact_dir=os.getenv("IPC_EMBEDDINGS_PATH"),
+        ipc_json_path=ipc_json_path
+    )
+
+    # Load the model and both indexes before timing anything
+    retriever.search("warmup", k=1)
+
+    results = {}
+    for name, hybrid in (("dense", False), ("hybrid", True)):
+        retriever.hybrid = hybrid
+        results[name] = evaluate(retriever, labelled_queries)
+
+    print(f"{len(labelled_queries)} labelled queries")
+    for name, report in results.items():
+        metrics = ", ".join(f"{key}={value:.3f}" for key, value in report.items())
+        print(f"{name:>7}: {metrics}")
+
+
+if __name__ == "__main__":
+    main()
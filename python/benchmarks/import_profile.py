@@ -0,0 +1,106 @@
+# import_profile.py
+#
+# Profile how long each entry point takes to import, using CPython's -X importtime.
+# Run from the python/ directory:  python -m benchmarks.import_profile [module ...]
+#
+# Every module is imported in a fresh interpreter, so results reflect a cold start
+# (warm OS file cache aside). The report lists total import time per module and the
+# top-level packages that dominate it, and is also written as JSON.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# What each entry point imports before it can serve: the API's startup path, the
+# CLI, the IPC endpoints' corpus, and the full crew the others now load lazily
+DEFAULT_MODULES = ("api", "main", "ipc_corpus", "crew")
+DEFAULT_OUTPUT = Path(__file__).parent / "import_profile.json"
+TOP_N = 15
+
+
+def profile_import(module: str) -> dict:
+    """
+    Import one module in a fresh interpreter under -X importtime.
+
+    api.py exits when OPENAI_API_KEY is unset, so a placeholder is supplied; nothing
+    in an import sends requests.
+
+    Args:
+        module (str): Module name importable from the python/ directory.
+
+    Returns:
+        dict: Whether the import succeeded, its total time in milliseconds, and the
+            cumulative time of each package the module imports directly.
+    """
+    env = {"OPENAI_API_KEY": "import-profile", "WARMUP_ON_START": "false"}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **env}
+    )
+
+    # Each import is printed after its own dependencies, indented two spaces per level,
+    # so the profiled module is the last unindented line and its direct dependencies are
+    # the one-level lines printed since the previous unindented one
+    total_us = 0
+    packages = {}
+    children = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                total_us = int(cumulative)
+                for child, child_us in children:
+                    top_level = child.split(".")[0]
+                    packages[top_level] = packages.get(top_level, 0) + child_us
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative)))
+
+    error = None
+    if process.returncode != 0:
+        error = (process.stderr.strip().splitlines() or ["unknown error"])[-1]
+
+    return {
+        "module": module,
+        "ok": process.returncode == 0,
+        "error": error,
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the assistant's entry points.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="where to write the JSON report")
+    args = parser.parse_args()
+
+    report = [profile_import(module) for module in args.modules]
+
+    for entry in report:
+        status = "ok" if entry["ok"] else f"FAILED ({entry['error']})"
+        print(f"\n{entry['module']}: {entry['total_ms']:.1f} ms  [{status}]")
+        for name, ms in list(entry["packages_ms"].items())[:TOP_N]:
+            print(f"  {ms:>10.1f} ms  {name}")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# retrieval_quality.py
+#
+# Retrieval quality versus latency and memory for IPC index configurations.
+# Run from the python/ directory:  python -m benchmarks.retrieval_quality [--models ...] [--indexes ...]
+#
+# Every embedding model embeds the documents produced by prepare_documents from ipc.json
+# once; each index configuration is then built from those vectors and queried with the
+# labelled queries in ipc_queries.json. Reported per model and index: recall@k, MRR,
+# query latency (embedding and search separately), build time and index memory. With
+# the vector database configured in .env, the production search_ipc_sections path
+# (the shared retriever, hybrid or dense as configured) is measured as well.
+# The ivf and hnsw indexes are sized for this corpus; benchmarks/ann_scale.py measures
+# them on corpora of hundreds of thousands of vectors.
+
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks.common import RESULTS_DIR, current_rss_mb, git_commit, summarize
+from ipc_vectordb_builder import load_ipc_data, prepare_documents
+from tools.ipc_ann_index import ApproximateVectorIndex, HNSWIndex, IVFIndex
+from tools.ipc_lexical_index import section_key
+from tools.ipc_vector_index import NumpyVectorIndex
+
+QUERIES_PATH = Path(__file__).parent / "ipc_queries.json"
+IPC_JSON_PATH = Path(__file__).parent.parent / "ipc.json"
+
+# HuggingFaceEmbeddings' default model first, then smaller MiniLM-class models
+DEFAULT_MODELS = (
+    "sentence-transformers/all-mpnet-base-v2",
+    "sentence-transformers/all-MiniLM-L12-v2",
+    "sentence-transformers/all-MiniLM-L6-v2",
+    "sentence-transformers/paraphrase-MiniLM-L3-v2"
+)
+
+K_VALUES = (1, 3, 5)
+MRR_DEPTH = 10
+
+
+def build_exact_float32(embeddings: np.ndarray, documents: list) -> tuple[object, int]:
+    index = NumpyVectorIndex(embeddings, [doc.metadata for doc in documents], [doc.page_content for doc in documents])
+    return index, index.embeddings.nbytes
+
+
+def build_approximate(ann, embeddings: np.ndarray, documents: list, rerank: int = 0) -> tuple[object, int]:
+    ann.build(embeddings)
+    index = ApproximateVectorIndex(
+        ann, [doc.metadata for doc in documents], [doc.page_content for doc in documents],
+        embeddings=embeddings, rerank=rerank
+    )
+    return index, ann.nbytes
+
+
+def build_exact_int8(embeddings: np.ndarray, documents: list) -> tuple[object, int]:
+    # A single list: every query scans all codes, so only quantization error remains
+    return build_approximate(IVFIndex(nlist=1, quantization="int8"), embeddings, documents)
+
+
+def build_ivf_int8(embeddings: np.ndarray, documents: list) -> tuple[object, int]:
+    nlist = max(1, int(np.sqrt(len(documents))))
+    return build_approximate(IVFIndex(nlist=nlist, nprobe=max(1, nlist // 4)), embeddings, documents)
+
+
+def build_ivf_pq(embeddings: np.ndarray, documents: list) -> tuple[object, int]:
+    nlist = max(1, int(np.sqrt(len(documents))))
+    ann = IVFIndex(nlist=nlist, nprobe=max(1, nlist // 4), quantization="pq", pq_subspaces=embeddings.shape[1] // 8)
+    return build_approximate(ann, embeddings, documents, rerank=4)
+
+
+def build_hnsw(embeddings: np.ndarray, documents: list) -> tuple[object, int]:
+    return build_approximate(HNSWIndex(), embeddings, documents)
+
+
+def build_chroma_hnsw(embeddings: np.ndarray, documents: list) -> tuple[object, int]:
+    from langchain_chroma import Chroma
+
+    from tools.ipc_vector_index import ChromaVectorIndex
+
+    # In-memory collection with Chroma's default HNSW parameters, as the production store uses
+    rss_before = current_rss_mb()
+    vector_db = Chroma(collection_name=f"benchmark-{uuid.uuid4().hex[:8]}")
+    vector_db._collection.add(
+        ids=[str(i) for i in range(len(documents))],
+        embeddings=embeddings.tolist(),
+        metadatas=[doc.metadata for doc in documents],
+        documents=[doc.page_content for doc in documents]
+    )
+    # Chroma keeps its own copies in native code, so memory is the process growth
+    return ChromaVectorIndex(vector_db), int(max(0.0, current_rss_mb() - rss_before) * 1024 * 1024)
+
+
+INDEX_BUILDERS = {
+    "exact-float32": build_exact_float32,
+    "exact-int8": build_exact_int8,
+    "ivf-int8": build_ivf_int8,
+    "ivf-pq-rerank": build_ivf_pq,
+    "hnsw": build_hnsw,
+    "chroma-hnsw": build_chroma_hnsw
+}
+
+
+def score(ranked_sections: list[str], expected: set[str]) -> tuple[dict, float]:
+    """Hits at each k and the reciprocal rank of the first expected section."""
+    hits = {k: 1.0 if expected & set(ranked_sections[:k]) else 0.0 for k in K_VALUES}
+    reciprocal_rank = next(
+        (1.0 / rank for rank, section in enumerate(ranked_sections[:MRR_DEPTH], start=1) if section in expected),
+        0.0
+    )
+    return hits, reciprocal_rank
+
+
+def evaluate(search, labelled_queries: list[dict], query_embeddings: list | None = None) -> dict:
+    """
+    Measure recall@k, MRR and search latency for one configuration.
+
+    Args:
+        search (Callable): Takes a query (or its embedding, when query_embeddings is given) and k.
+        labelled_queries (list[dict]): Entries with `query` and `expected_sections`.
+        query_embeddings (list | None): Precomputed query embeddings, in query order.
+
+    Returns:
+        dict: recall@k, MRR and search latency percentiles in milliseconds.
+    """
+    hits = {k: 0.0 for k in K_VALUES}
+    reciprocal_ranks, latencies = [], []
+
+    for position, item in enumerate(labelled_queries):
+        query = query_embeddings[position] if query_embeddings is not None else item["query"]
+        start = time.perf_counter()
+        results = search(query, MRR_DEPTH)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        expected = {section_key(section) for section in item["expected_sections"]}
+        query_hits, reciprocal_rank = score([section_key(result["section"]) for result in results], expected)
+        for k in K_VALUES:
+            hits[k] += query_hits[k]
+        reciprocal_ranks.append(reciprocal_rank)
+
+    report = {f"recall@{k}": hits[k] / len(labelled_queries) for k in K_VALUES}
+    report["mrr"] = sum(reciprocal_ranks) / len(reciprocal_ranks)
+    report["search_ms"] = summarize(latencies)
+    return report
+
+
+def benchmark_model(model_name: str, documents: list, labelled_queries: list[dict], index_names: list[str]) -> dict:
+    """Embed the corpus and queries with one model, then evaluate every index configuration on them."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    load_start = time.perf_counter()
+    model = HuggingFaceEmbeddings(model_name=model_name)
+    load_seconds = time.perf_counter() - load_start
+
+    embed_start = time.perf_counter()
+    embeddings = np.asarray(model.embed_documents([doc.page_content for doc in documents]), dtype=np.float32)
+    embed_seconds = time.perf_counter() - embed_start
+
+    query_embeddings, embed_latencies = [], []
+    for item in labelled_queries:
+        start = time.perf_counter()
+        query_embeddings.append(model.embed_query(item["query"]))
+        embed_latencies.append((time.perf_counter() - start) * 1000)
+
+    result = {
+        "model": model_name,
+        "dimensions": int(embeddings.shape[1]),
+        "model_load_seconds": load_seconds,
+        "corpus_embed_seconds": embed_seconds,
+        "query_embed_ms": summarize(embed_latencies),
+        "indexes": {}
+    }
+
+    for index_name in index_names:
+        build_start = time.perf_counter()
+        try:
+            index, index_bytes = INDEX_BUILDERS[index_name](embeddings, documents)
+        except ImportError as e:
+            print(f"  skipping {index_name}: {e}")
+            continue
+        build_seconds = time.perf_counter() - build_start
+
+        report = evaluate(lambda query, k: index.search(query, k=k), labelled_queries, query_embeddings)
+        report["build_seconds"] = build_seconds
+        report["index_bytes"] = index_bytes
+        report["bytes_per_vector"] = index_bytes / len(documents)
+        result["indexes"][index_name] = report
+    return result
+
+
+def benchmark_production(labelled_queries: list[dict]) -> dict | None:
+    """Evaluate the shared retriever behind search_ipc_sections, as configured in .env."""
+    if not os.getenv("PERSIST_DIRECTORY_PATH"):
+        return None
+
+    from tools.ipc_retriever import get_ipc_retriever
+
+    retriever = get_ipc_retriever()
+    start = time.perf_counter()
+    retriever.search("warmup", k=1)
+    report = evaluate(lambda query, k: retriever.search(query, k=k), labelled_queries)
+    report["load_seconds"] = time.perf_counter() - start
+    report["backend"] = retriever.backend
+    report["hybrid"] = retriever.hybrid
+    return report
+
+
+def print_table(results: list[dict], production: dict | None):
+    header = f"{'model':<42} {'index':<14} {'R@1':>5} {'R@3':>5} {'R@5':>5} {'MRR':>5} " \
+             f"{'embed p50':>9} {'search p50':>10} {'search p99':>10} {'build s':>8} {'B/vector':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        for index_name, report in result["indexes"].items():
+            print(f"{result['model'].split('/')[-1]:<42} {index_name:<14} "
+                  f"{report['recall@1']:>5.2f} {report['recall@3']:>5.2f} {report['recall@5']:>5.2f} {report['mrr']:>5.2f} "
+                  f"{result['query_embed_ms']['p50']:>7.1f}ms {report['search_ms']['p50']:>8.2f}ms "
+                  f"{report['search_ms']['p99']:>8.2f}ms {result['corpus_embed_seconds'] + report['build_seconds']:>8.1f} "
+                  f"{report['bytes_per_vector']:>9.0f}")
+    if production is not None:
+        mode = "hybrid" if production["hybrid"] else "dense"
+        print(f"\nsearch_ipc_sections ({production['backend']}, {mode}): "
+              f"R@1 {production['recall@1']:.2f}  R@3 {production['recall@3']:.2f}  R@5 {production['recall@5']:.2f}  "
+              f"MRR {production['mrr']:.2f}  p50 {production['search_ms']['p50']:.1f}ms  p99 {production['search_ms']['p99']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare IPC retrieval quality, latency and memory across configurations.")
+    parser.add_argument("--models", nargs="+", default=list(DEFAULT_MODELS))
+    parser.add_argument("--indexes", nargs="+", default=list(INDEX_BUILDERS), choices=list(INDEX_BUILDERS))
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/retrieval-<commit>.json)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    with open(QUERIES_PATH, "r", encoding="utf-8") as file:
+        labelled_queries = json.load(file)
+    documents = prepare_documents(load_ipc_data(os.getenv("IPC_JSON_PATH") or str(IPC_JSON_PATH)))
+    print(f"{len(documents)} documents, {len(labelled_queries)} labelled queries\n")
+
+    results = []
+    for model_name in args.models:
+        print(f"Embedding with {model_name}...")
+        results.append(benchmark_model(model_name, documents, labelled_queries, args.indexes))
+    production = benchmark_production(labelled_queries)
+
+    print()
+    print_table(results, production)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "documents": len(documents),
+        "queries": len(labelled_queries),
+        "models": results,
+        "production": production
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"retrieval-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
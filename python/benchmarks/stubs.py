@@ -0,0 +1,237 @@
+# stubs.py
+#
+# Deterministic local stand-ins for the two network dependencies of the crew, used by
+# the offline benchmarks: an OpenAI-compatible chat completions server and a Tavily client.
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROLE_PATTERN = re.compile(r"You are (.+?)\.")
+TOOL_PATTERN = re.compile(r"Tool Name: (.+)")
+USER_INPUT_PATTERN = re.compile(r"legal query:\s*(.+?)\s*Your job", re.DOTALL)
+SUMMARY_PATTERN = re.compile(r'"summary":\s*"([^"]+)"')
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _intake_answer(prompt: str) -> str:
+    match = USER_INPUT_PATTERN.search(prompt)
+    summary = " ".join((match.group(1) if match else prompt[-300:]).split())[:300]
+    intake = {
+        "case_type": "Criminal Complaint",
+        "legal_domain": "Criminal Law",
+        "summary": summary,
+        "relevant_entities": ["complainant", "accused", "police"],
+        "jurisdiction": "India"
+    }
+    return "```json\n" + json.dumps(intake, indent=2) + "\n```"
+
+
+def _drafted_document(prompt: str) -> str:
+    match = SUMMARY_PATTERN.search(prompt)
+    facts = match.group(1) if match else "the facts described by the complainant"
+    paragraphs = [
+        "LEGAL COMPLAINT",
+        "To: The Station House Officer, Local Police Station",
+        "Subject: Complaint regarding the incident described below",
+        f"Factual background: {facts}",
+        "Applicable legal sections: the sections of the Indian Penal Code identified above, "
+        "read with the precedents summarised in this complaint.",
+        "Request: I respectfully request that an FIR be registered, the matter investigated "
+        "and appropriate action taken against the accused in accordance with law.",
+        "Date: __/__/____    Complainant: ____________________"
+    ]
+    return "\n\n".join(paragraphs)
+
+
+def stub_reply(messages: list[dict]) -> str:
+    """
+    Produce a deterministic CrewAI-compatible reply for a chat completion request.
+
+    Agents with tools get a ReAct tool call on their first turn and a final answer once
+    an observation is in the conversation; agents without tools answer straight away.
+    Answers are shaped like each agent's expected output, so downstream tasks receive
+    realistic context.
+
+    Args:
+        messages (list[dict]): The OpenAI-style messages of the request.
+
+    Returns:
+        str: The assistant message content.
+    """
+    prompt = "\n".join(_message_text(message) for message in messages)
+    role_match = ROLE_PATTERN.search(prompt)
+    role = role_match.group(1) if role_match else ""
+    tool_match = TOOL_PATTERN.search(prompt)
+    summary_match = SUMMARY_PATTERN.search(prompt)
+    query = summary_match.group(1) if summary_match else "criminal offence against person and property"
+
+    # [system, user] on the first turn; the tool observation arrives as a later message
+    if tool_match and len(messages) <= 2:
+        tool_input = query if "IPC" in tool_match.group(1) else f"{query} - precedent cases in India"
+        return (
+            "Thought: I should search for relevant material before answering.\n"
+            f"Action: {tool_match.group(1).strip()}\n"
+            f"Action Input: {json.dumps({'query': tool_input})}"
+        )
+
+    if "Intake" in role:
+        answer = _intake_answer(prompt)
+    elif "IPC" in role:
+        answer = json.dumps([
+            {"section": "IPC Section 380", "section_title": "Theft in dwelling house, etc.",
+             "chapter": "Chapter 17", "chapter_title": "Of Offences Against Property",
+             "content": "Whoever commits theft in any building, tent or vessel used as a human dwelling..."}
+        ], indent=2)
+    elif "Precedent" in role:
+        answer = (
+            "The most relevant precedents establish that entry into a dwelling at night with intent "
+            "to commit an offence aggravates the charge, and that threatening the occupant while "
+            "escaping with stolen property is treated as robbery rather than simple theft."
+        )
+    else:
+        answer = _drafted_document(prompt)
+
+    return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+
+class StubLLMServer:
+    """
+    OpenAI-compatible /v1/chat/completions endpoint on localhost with configurable latency.
+
+    `latency` seconds pass before the first byte of every response; with
+    `tokens_per_second` set, streamed responses are additionally paced word by word.
+    Point LiteLLM at it with OPENAI_API_BASE=server.base_url.
+    """
+
+    def __init__(self, latency: float = 0.5, tokens_per_second: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "StubLLMServer":
+        threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub._lock:
+                    stub.calls += 1
+
+                text = stub_reply(request.get("messages", []))
+                time.sleep(stub.latency)
+                if request.get("stream"):
+                    self._stream(request, text)
+                else:
+                    self._complete(request, text)
+
+            def _complete(self, request: dict, text: str):
+                prompt_tokens = sum(len(_message_text(m).split()) for m in request.get("messages", []))
+                completion_tokens = len(text.split())
+                body = json.dumps({
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens
+                    }
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, request: dict, text: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def send(delta: dict, finish_reason=None):
+                    chunk = {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": request.get("model", "stub"),
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                send({"role": "assistant", "content": ""})
+                for word in re.findall(r"\S+\s*", text):
+                    send({"content": word})
+                    if stub.tokens_per_second:
+                        time.sleep(1 / stub.tokens_per_second)
+                send({}, finish_reason="stop")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+class FakeTavilyClient:
+    """
+    Drop-in for TavilyClient.search returning fixed indiankanoon.org results after `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0.8, results: int = 5):
+        self.latency = latency
+        self.results = results
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, max_results: int = 10, **kwargs) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"State v. Accused No. {index + 1} on {index + 2} March 20{10 + index}",
+                    "content": "The court held that house-breaking by night with intent to commit theft, "
+                               "followed by a threat of hurt while escaping, constitutes robbery.",
+                    "url": f"https://indiankanoon.org/doc/{100000 + index}/"
+                }
+                for index in range(min(self.results, max_results))
+            ]
+        }
@@ -0,0 +1,91 @@
+# worker_rss.py
+#
+# Report the memory of a running gunicorn master and each of its workers (Linux only).
+# Run from the python/ directory:  python -m benchmarks.worker_rss <master pid> [--output FILE]
+#
+# RSS counts shared pages once per process, so with preload_app the per-worker RSS
+# looks much the same as without it. PSS splits each shared page between the processes
+# mapping it, and the sum of PSS is the memory the server actually uses. Compare a run
+# started with GUNICORN_PRELOAD=false against the default to see what preloading saves.
+
+import argparse
+import json
+from pathlib import Path
+
+
+def memory_kb(pid: int) -> dict:
+    """
+    Read a process's memory counters from /proc.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        dict: rss, pss, shared and private sizes in kB.
+    """
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+def child_pids(pid: int) -> list[int]:
+    """List the direct children of a process."""
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children.extend(int(child) for child in (task / "children").read_text().split())
+    return sorted(children)
+
+
+def measure(master_pid: int) -> dict:
+    """
+    Measure the master and every worker.
+
+    Args:
+        master_pid (int): PID of the gunicorn master.
+
+    Returns:
+        dict: Per-process counters and totals, in MB.
+    """
+    processes = [{"role": "master", "pid": master_pid, **memory_kb(master_pid)}]
+    processes += [{"role": "worker", "pid": pid, **memory_kb(pid)} for pid in child_pids(master_pid)]
+
+    for process in processes:
+        for field in ("rss", "pss", "shared", "private"):
+            process[field] = round(process[field] / 1024, 1)
+
+    return {
+        "processes": processes,
+        "total_rss_mb": round(sum(process["rss"] for process in processes), 1),
+        "total_pss_mb": round(sum(process["pss"] for process in processes), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report RSS and PSS of a gunicorn master and its workers.")
+    parser.add_argument("master_pid", type=int)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    report = measure(args.master_pid)
+
+    print(f"{'role':<8} {'pid':>8} {'rss MB':>10} {'pss MB':>10} {'shared MB':>10} {'private MB':>11}")
+    for process in report["processes"]:
+        print(f"{process['role']:<8} {process['pid']:>8} {process['rss']:>10.1f} {process['pss']:>10.1f} "
+              f"{process['shared']:>10.1f} {process['private']:>11.1f}")
+    print(f"\nTotal RSS: {report['total_rss_mb']:.1f} MB   Total PSS: {report['total_pss_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+# context_budget.py
+
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+from dotenv import load_dotenv
+
+from metrics import REGISTRY, current_trace_id
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Token budgets per agent, named like the CachedLLM agents: the IPC section and precedent
+# agents' budgets cover the tool results they read, the drafter's covers the upstream
+# task outputs it receives as context
+DEFAULT_BUDGETS = {
+    "ipc_section": 800,
+    "legal_precedent": 1000,
+    "legal_drafter": 1600
+}
+
+# Tokenizer used for budgeting; the agents' model family
+BUDGET_MODEL = "gpt-3.5-turbo"
+
+# Smallest share of the budget worth giving a result's text; below it the text is dropped
+MIN_TEXT_TOKENS = 24
+
+ELLIPSIS = " …"
+
+JSON_BLOCK_PATTERN = re.compile(r"```(?:json)?\s*(.+?)\s*```", re.DOTALL)
+SENTENCE_END_PATTERN = re.compile(r"[.;:!?](?=\s)")
+
+CONTEXT_TOKENS_SAVED = REGISTRY.counter(
+    "lexora_context_tokens_saved_total",
+    "Prompt tokens removed by context compaction, per agent whose prompt was compacted.",
+    ("agent",)
+)
+CONTEXT_TOKENS_SAVED_PER_RUN = REGISTRY.histogram(
+    "lexora_context_tokens_saved_per_run",
+    "Prompt tokens removed by context compaction in one crew run.",
+    buckets=(0, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+)
+
+# Savings of the run the current code belongs to. Set around each kickoff, so it reaches
+# tools running on the kickoff thread or in its asyncio tasks, but not CrewAI's threads
+# for asynchronous tasks.
+_run_savings = contextvars.ContextVar("context_savings", default=None)
+
+# Tool-side savings made on threads without a run, not yet attributed. Tools and the
+# completion callback of the task that called them run on the same thread, so the
+# callback collects them.
+_pending = threading.local()
+
+
+def compaction_enabled() -> bool:
+    return os.getenv("CONTEXT_COMPACTION", "true").lower() == "true"
+
+
+def get_context_budget(agent_name: str) -> int | None:
+    """Token budget for one agent from CONTEXT_BUDGET_<AGENT>, or None when compaction is off."""
+    if not compaction_enabled():
+        return None
+    return int(os.getenv(f"CONTEXT_BUDGET_{agent_name.upper()}", DEFAULT_BUDGETS[agent_name]))
+
+
+def context_budgets() -> dict:
+    """Every agent's budget, e.g. to fingerprint the crew configuration."""
+    return {agent_name: get_context_budget(agent_name) for agent_name in DEFAULT_BUDGETS}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with LiteLLM's tokenizer (installed with CrewAI), or estimate four characters per token.
+    """
+    try:
+        import litellm
+
+        return litellm.token_counter(model=BUDGET_MODEL, text=text)
+    except Exception:
+        return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shorten text to at most max_tokens, cutting at a sentence end where one is close.
+
+    Args:
+        text (str): Text to shorten.
+        max_tokens (int): Token limit, including the appended ellipsis.
+
+    Returns:
+        str: The text itself when it fits, otherwise a prefix followed by an ellipsis.
+    """
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    limit = len(text)
+    while tokens > max_tokens and limit > 0:
+        limit = int(limit * max_tokens / tokens * 0.95)
+        prefix = text[:limit]
+        sentence_ends = [match.end() for match in SENTENCE_END_PATTERN.finditer(prefix)]
+        # Prefer a whole sentence unless that throws away more than a third of the allowance
+        if sentence_ends and sentence_ends[-1] > limit * 2 // 3:
+            prefix = prefix[:sentence_ends[-1]]
+        else:
+            prefix = prefix.rsplit(None, 1)[0] if " " in prefix else prefix
+        candidate = prefix.rstrip() + ELLIPSIS
+        tokens = count_tokens(candidate)
+    return candidate if limit > 0 else ""
+
+
+def _fit_texts(items: list[dict], field: str, budget: int) -> list[dict]:
+    """
+    Trim `field` of each item so the JSON of all items fits the budget, in rank order.
+
+    Each item gets an equal share of what is left, so the room a short item does not
+    need passes to the items after it. Items whose other fields alone exceed their
+    share are dropped.
+    """
+    fitted = []
+    remaining = budget
+    for position, item in enumerate(items):
+        share = remaining // (len(items) - position)
+        overhead = count_tokens(json.dumps({**item, field: ""}, ensure_ascii=False))
+        room = share - overhead
+        if room < 0:
+            continue
+        text = truncate_to_tokens(item.get(field) or "", room) if room >= MIN_TEXT_TOKENS else ""
+        compacted = {**item, field: text}
+        fitted.append(compacted)
+        remaining -= overhead + count_tokens(text)
+    return fitted
+
+
+def _tokens(value) -> int:
+    return count_tokens(value if isinstance(value, str) else json.dumps(value, ensure_ascii=False))
+
+
+def record_saving(agent_name: str, tokens: int):
+    """Count tokens removed from an agent's prompt, for the metrics and the current run's report."""
+    if tokens <= 0:
+        return
+    CONTEXT_TOKENS_SAVED.inc(tokens, agent=agent_name)
+    savings = _run_savings.get()
+    if savings is not None:
+        savings.add(agent_name, tokens)
+        return
+    pending = getattr(_pending, "tokens", None)
+    if pending is None:
+        pending = _pending.tokens = {}
+    pending[agent_name] = pending.get(agent_name, 0) + tokens
+
+
+def _drain_pending() -> dict:
+    pending = getattr(_pending, "tokens", None) or {}
+    _pending.tokens = {}
+    return pending
+
+
+def strip_section_header(result: dict) -> dict:
+    """Drop the "Section N: title" line that repeats the section and title fields at the top of the content."""
+    content = result.get("content") or ""
+    header = f"Section {result.get('section')}: {result.get('section_title')}"
+    if content.startswith(header):
+        content = content[len(header):].lstrip()
+    return {**result, "content": content}
+
+
+def compact_ipc_sections(results: list[dict]) -> list[dict]:
+    """
+    Fit IPC section results into the IPC section agent's budget.
+
+    Results keep the retriever's order, which already ranks them by (hybrid) similarity;
+    the duplicated header is removed from each content and the contents are trimmed.
+
+    Args:
+        results (list[dict]): Results of search_ipc_sections.
+
+    Returns:
+        list[dict]: The compacted results.
+    """
+    budget = get_context_budget("ipc_section")
+    if budget is None or not results:
+        return results
+
+    compacted = _fit_texts([strip_section_header(result) for result in results], "content", budget)
+    record_saving("ipc_section", _tokens(results) - _tokens(compacted))
+    return compacted
+
+
+def _rank_by_similarity(query: str, texts: list[str]) -> list[int] | None:
+    """Order texts by embedding similarity to the query, using the IPC retriever's model."""
+    if os.getenv("CONTEXT_RANKING", "true").lower() != "true":
+        return None
+    try:
+        from tools.ipc_retriever import get_ipc_retriever
+
+        retriever = get_ipc_retriever()
+        query_embedding = np.asarray(retriever.embed_query(query), dtype=np.float32)
+        embeddings = np.asarray(retriever.embedding_function.embed_documents(texts), dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"Cannot rank results by similarity, keeping their order: {e}")
+        return None
+
+    norms = np.linalg.norm(embeddings, axis=1) * max(float(np.linalg.norm(query_embedding)), 1e-12)
+    similarities = embeddings @ query_embedding / np.maximum(norms, 1e-12)
+    return [int(i) for i in np.argsort(-similarities, kind="stable")]
+
+
+def rank_precedents(results: list[dict], query: str) -> list[dict]:
+    """
+    Drop results with a title already seen and order the rest by embedding similarity to the query.
+
+    Args:
+        results (list[dict]): Results of search_legal_precedents, as `title`, `summary` and `link`.
+        query (str): The search query (the agent's summary of the case).
+
+    Returns:
+        list[dict]: The unique results, best first.
+    """
+    unique, seen_titles = [], set()
+    for result in results:
+        title = " ".join((result.get("title") or "").lower().split())
+        if title and title in seen_titles:
+            continue
+        seen_titles.add(title)
+        unique.append(result)
+
+    order = _rank_by_similarity(query, [f"{r.get('title') or ''}\n{r.get('summary') or ''}" for r in unique])
+    return [unique[i] for i in order] if order else unique
+
+
+def _fit_precedents(results: list[dict], ranked: list[dict], budget: int) -> list[dict]:
+    compacted = _fit_texts(ranked, "summary", budget)
+    record_saving("legal_precedent", _tokens(results) - _tokens(compacted))
+    return compacted
+
+
+def compact_precedents(results: list[dict], query: str) -> list[dict]:
+    """
+    Fit precedent search results into the precedent agent's budget.
+
+    The results are de-duplicated and ranked by rank_precedents, and the summaries
+    are trimmed in rank order.
+
+    Args:
+        results (list[dict]): Results of search_legal_precedents, as `title`, `summary` and `link`.
+        query (str): The search query.
+
+    Returns:
+        list[dict]: The compacted results, best first.
+    """
+    budget = get_context_budget("legal_precedent")
+    if budget is None or not results:
+        return results
+    return _fit_precedents(results, rank_precedents(results, query), budget)
+
+
+async def acompact_precedents(results: list[dict], query: str) -> list[dict]:
+    """Async variant of compact_precedents; the ranking embeddings are computed on the embedding thread pool."""
+    budget = get_context_budget("legal_precedent")
+    if budget is None or not results:
+        return results
+
+    from tools.ipc_retriever import run_in_embedding_pool
+
+    return _fit_precedents(results, await run_in_embedding_pool(rank_precedents, results, query), budget)
+
+
+def compact_task_output(raw: str, budget: int) -> str:
+    """
+    Fit one task's output into its share of a downstream agent's context budget.
+
+    JSON lists of IPC sections are compacted per section; other output is shortened as text.
+
+    Args:
+        raw (str): The task's raw output.
+        budget (int): Token budget for this output.
+
+    Returns:
+        str: The compacted output.
+    """
+    if count_tokens(raw) <= budget:
+        return raw
+
+    match = JSON_BLOCK_PATTERN.search(raw)
+    try:
+        parsed = json.loads(match.group(1) if match else raw)
+    except (json.JSONDecodeError, TypeError):
+        parsed = None
+
+    if isinstance(parsed, list) and parsed and all(isinstance(item, dict) and "content" in item for item in parsed):
+        sections = _fit_texts([strip_section_header(item) for item in parsed], "content", budget - 8)
+        return "```json\n" + json.dumps(sections, indent=2, ensure_ascii=False) + "\n```"
+    return truncate_to_tokens(raw, budget)
+
+
+class ContextSavings:
+    """
+    Tokens compaction removed from the prompts of one crew run, per agent.
+
+    Created by attach_context_compaction, which routes the run's task completions here.
+    Kick the crew off inside `with savings:`, so savings made on the kickoff thread and
+    its asyncio tasks are attributed directly and the total is reported when the run ends.
+    """
+
+    def __init__(self):
+        self.tokens = {}
+        self._lock = threading.Lock()
+
+    def add(self, agent_name: str, tokens: int):
+        if tokens > 0:
+            with self._lock:
+                self.tokens[agent_name] = self.tokens.get(agent_name, 0) + tokens
+
+    def __enter__(self) -> "ContextSavings":
+        _drain_pending()
+        self._token = _run_savings.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _run_savings.reset(self._token)
+        self.report()
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.tokens.values())
+
+    def report(self) -> dict:
+        """Record the run's total and log it under the current trace ID; returns the per-agent savings."""
+        total = self.total
+        CONTEXT_TOKENS_SAVED_PER_RUN.observe(total)
+        if total:
+            details = ", ".join(f"{agent_name}: {tokens}" for agent_name, tokens in sorted(self.tokens.items()))
+            logger.info(f"[trace {current_trace_id()}] Context compaction saved {total} prompt tokens ({details})")
+        return dict(self.tokens)
+
+
+def _agent_name(task) -> str:
+    return getattr(task.agent.llm, "agent_name", None) or task.agent.role
+
+
+def attach_context_compaction(crew) -> ContextSavings:
+    """
+    Compact the task outputs of one crew run before the final task receives them.
+
+    Call on the run's own copy of the crew and kick it off inside the returned
+    ContextSavings' `with` block. Each task's completion callback collects the
+    tool-side savings made on its thread, then calls the callback the task already
+    had. When the final task's context is built, copies of its context tasks'
+    outputs are fitted into equal shares of the final agent's budget; the outputs
+    themselves, which are streamed and displayed, are left as the agents wrote them.
+
+    Args:
+        crew (Crew): The crew copy about to be kicked off.
+
+    Returns:
+        ContextSavings: Filled in as the run progresses.
+    """
+    savings = ContextSavings()
+    if not compaction_enabled():
+        return savings
+
+    def on_completed(output, previous_callback):
+        for agent_name, tokens in _drain_pending().items():
+            savings.add(agent_name, tokens)
+        if previous_callback is not None:
+            previous_callback(output)
+
+    for task in crew.tasks:
+        task.callback = lambda output, previous_callback=task.callback: on_completed(output, previous_callback)
+
+    final_task = crew.tasks[-1]
+    final_agent = _agent_name(final_task)
+    budget = get_context_budget(final_agent) if final_agent in DEFAULT_BUDGETS else None
+    if not budget or not final_task.context:
+        return savings
+
+    share = budget // len(final_task.context)
+    get_context = crew._get_context
+
+    def get_compacted_context(task, task_outputs):
+        if task is not final_task:
+            return get_context(task, task_outputs)
+
+        from crewai.utilities.formatter import aggregate_raw_outputs_from_task_outputs
+
+        outputs = []
+        for context_task in task.context:
+            output = context_task.output
+            if output is None:
+                continue
+            if isinstance(output.raw, str):
+                compacted = compact_task_output(output.raw, share)
+                saved = count_tokens(output.raw) - count_tokens(compacted)
+                if saved > 0:
+                    output = output.model_copy(update={"raw": compacted})
+                    CONTEXT_TOKENS_SAVED.inc(saved, agent=final_agent)
+                    savings.add(final_agent, saved)
+            outputs.append(output)
+        return aggregate_raw_outputs_from_task_outputs(outputs)
+
+    # The run's crew copy builds the final task's context from compacted copies
+    crew._get_context = get_compacted_context
+    return savings
@@ -1,7 +1,17 @@
 # crew.py
 
-from crewai import Crew
+import asyncio
+import hashlib
+import json
+import time
 
+from crewai import Crew, Task
+
+from analysis_cache import get_analysis_cache
+from context_budget import attach_context_compaction, context_budgets
+from crew_metrics import CREW_RUN_SECONDS
+from intake import get_intake_router, record_intake_example
+from llm_cache import replay_from_cache, replaying
 from agents.case_intake_agent import case_intake_agent
 from agents.ipc_section_agent import ipc_section_agent
 from agents.legal_precedent_agent import legal_precedent_agent
@@ -12,8 +22,197 @@ from tasks.legal_precedent_task import legal_precedent_task
 from tasks.legal_drafter_task import legal_drafter_task
 
 
+# With CREW_PARALLEL_RESEARCH enabled (the default), the IPC section and precedent tasks
+# are asynchronous: both start once case intake finishes, and the drafter joins them.
 legal_assistant_crew = Crew(
     agents=[case_intake_agent, ipc_section_agent, legal_precedent_agent, legal_drafter_agent],
     tasks=[case_intake_task, ipc_section_task, legal_precedent_task, legal_drafter_task],
     verbose=True
-)
\ No newline at end of file
+)
+
+# Crews for the intake fast path (INTAKE_FAST_PATH): the case intake stage runs on its
+# own, locally when the intake classifier is confident or with the LLM agent otherwise,
+# and its output reaches the research crew through the `case_intake` input.
+intake_crew = Crew(agents=[case_intake_agent], tasks=[case_intake_task], verbose=True)
+
+
+def _without_intake(tasks: list[Task]) -> list[Task]:
+    copies = {}
+    for task in tasks:
+        copies[id(task)] = Task(
+            agent=task.agent,
+            description="Structured legal context of the issue (case intake):\n\n{case_intake}\n\n" + task.description,
+            expected_output=task.expected_output,
+            context=[copies[id(context)] for context in task.context or [] if context is not case_intake_task],
+            async_execution=task.async_execution
+        )
+    return list(copies.values())
+
+
+research_crew = Crew(
+    agents=[ipc_section_agent, legal_precedent_agent, legal_drafter_agent],
+    tasks=_without_intake([ipc_section_task, legal_precedent_task, legal_drafter_task]),
+    verbose=True
+)
+
+def crew_config_version(crew: Crew) -> str:
+    """
+    Hash everything about the crew that shapes its output.
+
+    Cached analyses are keyed by this version, so editing any agent, task prompt,
+    model, temperature or context budget invalidates them.
+
+    Args:
+        crew (Crew): The crew to fingerprint.
+
+    Returns:
+        str: Short hex digest of the agent and task configuration.
+    """
+    config = {
+        "agents": [
+            {
+                "role": agent.role,
+                "goal": agent.goal,
+                "backstory": agent.backstory,
+                "model": getattr(agent.llm, "model", str(agent.llm)),
+                "temperature": getattr(agent.llm, "temperature", None),
+                "tools": [tool.name for tool in agent.tools or []]
+            }
+            for agent in crew.agents
+        ],
+        "tasks": [
+            {
+                "description": task.description,
+                "expected_output": task.expected_output,
+                "agent": task.agent.role,
+                "context": [crew.tasks.index(context) for context in task.context or []],
+                "async_execution": task.async_execution
+            }
+            for task in crew.tasks
+        ],
+        "context_budgets": context_budgets()
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+CREW_CONFIG_VERSION = crew_config_version(legal_assistant_crew)
+
+
+def run_llm_intake(user_input: str) -> str:
+    """Run only the case intake agent and return its raw JSON output."""
+    result = intake_crew.copy().kickoff(inputs={"user_input": user_input})
+    return result if isinstance(result, str) else result.raw
+
+
+def record_intake(user_input: str, result):
+    """Keep the intake stage's output of a full crew run as training data for the intake classifier."""
+    tasks_output = getattr(result, "tasks_output", None)
+    if tasks_output:
+        record_intake_example(user_input, tasks_output[0].raw)
+
+
+def _prepare_run(router, user_input: str, intake: tuple[str, bool] | None) -> tuple[Crew, dict, str]:
+    # Each run gets its own copy of the crew, so concurrent runs never share task state
+    if router is None:
+        crew, inputs, intake_path = legal_assistant_crew.copy(), {"user_input": user_input}, "crew"
+    else:
+        case_intake, local = intake
+        crew = research_crew.copy()
+        inputs, intake_path = {"user_input": user_input, "case_intake": case_intake}, "local" if local else "llm"
+
+    if replaying():
+        # The replay flag does not reach CrewAI's threads for asynchronous tasks, so a
+        # resumed run executes every task on the kickoff thread; its completed stages
+        # replay instantly, so there is little parallelism to lose
+        for task in crew.tasks:
+            task.async_execution = False
+    return crew, inputs, intake_path
+
+
+def _finish_run(router, user_input: str, result, start: float, intake_path: str) -> str:
+    if router is None:
+        record_intake(user_input, result)
+    CREW_RUN_SECONDS.observe(time.perf_counter() - start, intake=intake_path)
+    return result if isinstance(result, str) else str(result)
+
+
+def _kickoff(user_input: str) -> str:
+    start = time.perf_counter()
+    router = get_intake_router(run_llm_intake)
+    intake = router.run(user_input) if router is not None else None
+    crew, inputs, intake_path = _prepare_run(router, user_input, intake)
+
+    with attach_context_compaction(crew):
+        result = crew.kickoff(inputs=inputs)
+    return _finish_run(router, user_input, result, start, intake_path)
+
+
+async def _akickoff(user_input: str) -> str:
+    start = time.perf_counter()
+    router = get_intake_router(run_llm_intake)
+    # The router embeds the input and, when it is not confident, runs the intake crew
+    intake = await asyncio.to_thread(router.run, user_input) if router is not None else None
+    crew, inputs, intake_path = _prepare_run(router, user_input, intake)
+
+    # Newer CrewAI releases run the crew natively on the event loop; older ones run the
+    # synchronous kickoff on a worker thread
+    kickoff = getattr(crew, "akickoff", None) or crew.kickoff_async
+    with attach_context_compaction(crew):
+        result = await kickoff(inputs=inputs)
+    return _finish_run(router, user_input, result, start, intake_path)
+
+
+def _resume(user_input: str) -> str:
+    # Stages that completed in an earlier run replay their recorded LLM responses
+    with replay_from_cache():
+        return _kickoff(user_input)
+
+
+async def _aresume(user_input: str) -> str:
+    with replay_from_cache():
+        return await _akickoff(user_input)
+
+
+def run_legal_assistant(user_input: str, use_cache: bool = True, resume: bool = False) -> str:
+    """
+    Run the legal assistant workflow for one issue.
+
+    Identical and near-identical issues are answered from the analysis cache when it is enabled.
+
+    Args:
+        user_input (str): The user's legal issue in plain English.
+        use_cache (bool): Consult and fill the analysis cache.
+        resume (bool): Resume an earlier run of the same input that failed part-way,
+            reusing the recorded LLM responses of every stage that completed.
+
+    Returns:
+        str: The drafted legal document.
+    """
+    runner = _resume if resume else _kickoff
+    cache = get_analysis_cache(CREW_CONFIG_VERSION) if use_cache else None
+    if cache is None:
+        return runner(user_input)
+    return cache.run(user_input, runner)
+
+
+async def run_legal_assistant_async(user_input: str, use_cache: bool = True, resume: bool = False) -> str:
+    """
+    Async variant of run_legal_assistant for event-loop servers.
+
+    The crew is driven through CrewAI's async kickoff, and the blocking steps around it
+    (intake routing, analysis cache lookups and embeddings) run on worker threads, so
+    the event loop stays free while an analysis waits on the LLM and Tavily.
+
+    Args:
+        user_input (str): The user's legal issue in plain English.
+        use_cache (bool): Consult and fill the analysis cache.
+        resume (bool): Resume an earlier run of the same input that failed part-way.
+
+    Returns:
+        str: The drafted legal document.
+    """
+    runner = _aresume if resume else _akickoff
+    cache = get_analysis_cache(CREW_CONFIG_VERSION) if use_cache else None
+    if cache is None:
+        return await runner(user_input)
+    return await cache.arun(user_input, runner)
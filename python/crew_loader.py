@@ -0,0 +1,141 @@
+# crew_loader.py
+
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Query run once through the retriever so the embedding model and index are loaded
+# and the first real request does not pay the first-inference penalty
+WARMUP_QUERY = "theft of movable property from a dwelling house at night"
+
+
+class CrewLoader:
+    """
+    Imports the crew and warms the IPC retriever off the request path.
+
+    Importing `crew` pulls in crewai, langchain, chroma, sentence-transformers and tavily
+    and builds every agent, which takes seconds. Entry points that must start fast create
+    a loader, optionally start() it on a background thread, and call load() only in the
+    code paths that actually run an analysis. load() blocks until the crew is importable
+    and is safe to call from several threads at once.
+
+    Pre-forking servers call preload() in the master instead, then warm() in each worker
+    after the fork (see gunicorn.conf.py).
+    """
+
+    def __init__(self, warm_retriever: bool = True):
+        self.warm_retriever = warm_retriever
+        self._lock = threading.Lock()
+        self._crew = None
+        self._warmed = False
+        self._error = None
+        self._load_seconds = None
+        self._warmup_seconds = None
+
+    def start(self) -> "CrewLoader":
+        """Load the crew on a background thread; errors are kept for status() rather than raised."""
+        threading.Thread(target=self._load_quietly, name="crew-warmup", daemon=True).start()
+        return self
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            pass
+
+    def load(self):
+        """
+        Import the crew module, and warm the retriever, on first call.
+
+        Returns:
+            module: The imported `crew` module.
+
+        Raises:
+            Exception: Whatever importing the crew raised; later calls retry the import.
+        """
+        crew = self._import_crew()
+        if self.warm_retriever and not self._warmed:
+            self.warm()
+        return crew
+
+    def _import_crew(self):
+        if self._crew is not None:
+            return self._crew
+
+        with self._lock:
+            if self._crew is not None:
+                return self._crew
+
+            start = time.perf_counter()
+            try:
+                crew = importlib.import_module("crew")
+                # Registers the event bus handlers streamed runs depend on
+                importlib.import_module("crew_stream")
+            except Exception as e:
+                self._error = str(e)
+                logger.error(f"Failed to load the crew: {self._error}")
+                raise
+
+            self._load_seconds = time.perf_counter() - start
+            self._error = None
+            self._crew = crew
+            logger.info(f"Crew loaded in {self._load_seconds:.2f}s")
+            return crew
+
+    def preload(self):
+        """
+        Import the crew and load the embedding model and IPC index without running inference.
+
+        Meant for a pre-forking server's master process: workers forked afterwards share
+        the model weights and index pages copy-on-write instead of loading their own.
+        No query is embedded here because torch thread pools started before a fork can
+        deadlock in the children; each worker calls warm() once it is running. Only
+        an index backed by the memory-mapped embedding artifact is loaded: the chroma
+        backend, and the numpy backend without an artifact, open Chroma's SQLite
+        store, whose connections must not cross a fork, so workers open it in warm().
+        """
+        self._import_crew()
+        try:
+            from tools.ipc_retriever import get_ipc_retriever
+
+            if not get_ipc_retriever().preload():
+                logger.info("IPC index needs the Chroma store; each worker will load it after the fork")
+        except Exception as e:
+            logger.warning(f"Retriever preload failed: {str(e)}")
+
+    def warm(self):
+        """Run one synthetic query through the retriever so the first request does not pay for it."""
+        # A missing vector store should not keep the API unready: the IPC tool reports
+        # its own error at query time, exactly as it did before warmup existed
+        start = time.perf_counter()
+        try:
+            from tools.ipc_retriever import get_ipc_retriever
+
+            get_ipc_retriever().search(WARMUP_QUERY, k=1)
+            self._warmup_seconds = time.perf_counter() - start
+            logger.info(f"Retriever warmed up in {self._warmup_seconds:.2f}s")
+        except Exception as e:
+            logger.warning(f"Retriever warmup failed: {str(e)}")
+        self._warmed = True
+
+    @property
+    def ready(self) -> bool:
+        return self._crew is not None and (self._warmed or not self.warm_retriever)
+
+    def status(self) -> dict:
+        """
+        Report whether the crew is loaded and warm, and how long that took.
+
+        Returns:
+            dict: `ready`, `loading`, `error`, `load_seconds` and `warmup_seconds`.
+        """
+        return {
+            "ready": self.ready,
+            "loading": self._lock.locked(),
+            "error": self._error,
+            "load_seconds": self._load_seconds,
+            "warmup_seconds": self._warmup_seconds
+        }
@@ -0,0 +1,57 @@
+# crew_metrics.py
+
+import logging
+import threading
+import time
+
+try:
+    from crewai.events import crewai_event_bus, TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+except ImportError:  # older CrewAI releases
+    from crewai.utilities.events import crewai_event_bus, TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+
+from metrics import REGISTRY, current_trace_id
+
+logger = logging.getLogger(__name__)
+
+TASK_SECONDS = REGISTRY.histogram(
+    "lexora_task_seconds",
+    "Wall time of each crew task, by agent and outcome.",
+    ("agent", "status")
+)
+CREW_RUN_SECONDS = REGISTRY.histogram(
+    "lexora_crew_run_seconds",
+    "Wall time of crew runs not served from the analysis cache, by where the case intake came "
+    "from: inside the full crew, or the intake fast path's local classifier or LLM fallback.",
+    ("intake",)
+)
+
+# Start times of running tasks, keyed by task identity; every run uses its own task copies
+_task_started = {}
+_lock = threading.Lock()
+
+
+def _finish(source, status: str):
+    with _lock:
+        started = _task_started.pop(id(source), None)
+    if started is None:
+        return
+
+    elapsed = time.perf_counter() - started
+    TASK_SECONDS.observe(elapsed, agent=source.agent.role, status=status)
+    logger.info(f"[trace {current_trace_id()}] Task '{source.agent.role}' {status} in {elapsed:.2f}s")
+
+
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    with _lock:
+        _task_started[id(source)] = time.perf_counter()
+
+
+@crewai_event_bus.on(TaskCompletedEvent)
+def _on_task_completed(source, event):
+    _finish(source, "completed")
+
+
+@crewai_event_bus.on(TaskFailedEvent)
+def _on_task_failed(source, event):
+    _finish(source, "failed")
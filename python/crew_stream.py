@@ -0,0 +1,219 @@
+# crew_stream.py
+
+import asyncio
+import json
+import contextvars
+import queue
+import threading
+import time
+from typing import AsyncIterator, Iterator
+
+try:
+    from crewai.events import (
+        crewai_event_bus,
+        LLMStreamChunkEvent,
+        TaskCompletedEvent,
+        TaskFailedEvent,
+        TaskStartedEvent,
+    )
+except ImportError:  # older CrewAI releases
+    from crewai.utilities.events import (
+        crewai_event_bus,
+        LLMStreamChunkEvent,
+        TaskCompletedEvent,
+        TaskFailedEvent,
+        TaskStartedEvent,
+    )
+
+from analysis_cache import get_analysis_cache
+from context_budget import attach_context_compaction
+from agents.case_intake_agent import case_intake_agent
+from crew_metrics import CREW_RUN_SECONDS
+from crew import (
+    CREW_CONFIG_VERSION,
+    get_intake_router,
+    legal_assistant_crew,
+    record_intake,
+    research_crew,
+    run_llm_intake,
+)
+
+# Stage names, in the order the crew's tasks are declared
+STAGES = ("case_intake", "ipc_sections", "legal_precedents", "legal_draft")
+
+# Active runs, looked up by the event handlers below. Task events are routed by task
+# identity; LLM token chunks are routed by the thread that produced them, which for
+# the (synchronous) drafter is the run's kickoff thread.
+_runs_by_task = {}
+_runs_by_thread = {}
+_registry_lock = threading.Lock()
+
+
+class CrewRunStream:
+    """
+    One crew run whose progress is pushed into a queue as (event, data) pairs.
+
+    Each run kicks off its own copy of the crew in a background thread, so concurrent
+    streams never share task state. Iterating the run yields events until it ends:
+
+    - `task_started` / `task_completed` / `task_failed` for every stage
+    - `token` for each chunk the drafter's LLM streams
+    - `result` with the final document, or `error` if the run failed
+
+    Pass the event loop of an async server as `loop` to iterate the run with `async for`
+    instead; events are then handed to the loop rather than blocking a thread per reader.
+
+    A run whose input is already in the analysis cache emits only `result`, flagged `cached`.
+    With the intake fast path enabled, the case intake stage runs before the crew and its
+    `task_completed` event says whether it was served `local`ly.
+    """
+
+    def __init__(self, user_input: str, loop: asyncio.AbstractEventLoop | None = None):
+        self.user_input = user_input
+        self.loop = loop
+        self.intake_router = get_intake_router(run_llm_intake)
+        if self.intake_router is None:
+            self.crew = legal_assistant_crew.copy()
+            stages = STAGES
+        else:
+            self.crew = research_crew.copy()
+            stages = STAGES[1:]
+        self.stages = {id(task): stage for task, stage in zip(self.crew.tasks, stages)}
+        self.events = queue.Queue() if loop is None else asyncio.Queue()
+
+    def emit(self, event: str, data: dict):
+        self._put((event, data))
+
+    def _put(self, item):
+        if self.loop is None:
+            self.events.put(item)
+        else:
+            self.loop.call_soon_threadsafe(self.events.put_nowait, item)
+
+    def start(self) -> "CrewRunStream":
+        with _registry_lock:
+            for task_id in self.stages:
+                _runs_by_task[task_id] = self
+        # The run thread inherits the request's trace ID
+        threading.Thread(target=contextvars.copy_context().run, args=(self._run,), daemon=True).start()
+        return self
+
+    def _run(self):
+        thread_id = threading.get_ident()
+        with _registry_lock:
+            _runs_by_thread[thread_id] = self
+
+        try:
+            cache = get_analysis_cache(CREW_CONFIG_VERSION)
+            embedding = cache.embed(self.user_input) if cache is not None and cache.embed is not None else None
+            cached = cache.get(self.user_input, embedding=embedding) if cache is not None else None
+            if cached is not None:
+                self.emit("result", {"result": cached, "cached": True})
+                return
+
+            start = time.perf_counter()
+            inputs = {"user_input": self.user_input}
+            intake_path = "crew"
+            if self.intake_router is not None:
+                inputs["case_intake"], local = self._run_intake()
+                intake_path = "local" if local else "llm"
+
+            with attach_context_compaction(self.crew):
+                result = self.crew.kickoff(inputs=inputs)
+            if self.intake_router is None:
+                record_intake(self.user_input, result)
+            CREW_RUN_SECONDS.observe(time.perf_counter() - start, intake=intake_path)
+            result = result if isinstance(result, str) else str(result)
+            if cache is not None:
+                cache.set(self.user_input, result, embedding=embedding)
+            self.emit("result", {"result": result, "cached": False})
+        except Exception as e:
+            self.emit("error", {"error": f"Error processing your request: {str(e)}"})
+        finally:
+            with _registry_lock:
+                _runs_by_thread.pop(thread_id, None)
+                for task_id in self.stages:
+                    _runs_by_task.pop(task_id, None)
+            self._put(None)
+
+    def _run_intake(self) -> tuple[str, bool]:
+        stage = {"stage": STAGES[0], "agent": case_intake_agent.role}
+        self.emit("task_started", stage)
+        case_intake, local = self.intake_router.run(self.user_input)
+        self.emit("task_completed", {**stage, "output": case_intake, "local": local})
+        return case_intake, local
+
+    def __iter__(self) -> Iterator[tuple[str, dict]]:
+        while True:
+            item = self.events.get()
+            if item is None:
+                return
+            yield item
+
+    async def __aiter__(self) -> AsyncIterator[tuple[str, dict]]:
+        while True:
+            item = await self.events.get()
+            if item is None:
+                return
+            yield item
+
+
+def stream_analysis(user_input: str) -> Iterator[tuple[str, dict]]:
+    """
+    Run the legal assistant crew and yield its progress events as they happen.
+
+    Args:
+        user_input (str): The user's legal issue in plain English.
+
+    Returns:
+        Iterator[tuple[str, dict]]: (event name, payload) pairs, ending with `result` or `error`.
+    """
+    return iter(CrewRunStream(user_input).start())
+
+
+def stream_analysis_async(user_input: str) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Async variant of stream_analysis; must be called on the event loop that iterates the events.
+
+    Args:
+        user_input (str): The user's legal issue in plain English.
+
+    Returns:
+        AsyncIterator[tuple[str, dict]]: (event name, payload) pairs, ending with `result` or `error`.
+    """
+    return aiter(CrewRunStream(user_input, loop=asyncio.get_running_loop()).start())
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one event as a Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _task_event(source, event_name: str, data: dict):
+    with _registry_lock:
+        run = _runs_by_task.get(id(source))
+    if run is not None:
+        run.emit(event_name, {"stage": run.stages[id(source)], "agent": source.agent.role, **data})
+
+
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    _task_event(source, "task_started", {})
+
+
+@crewai_event_bus.on(TaskCompletedEvent)
+def _on_task_completed(source, event):
+    _task_event(source, "task_completed", {"output": event.output.raw})
+
+
+@crewai_event_bus.on(TaskFailedEvent)
+def _on_task_failed(source, event):
+    _task_event(source, "task_failed", {"error": event.error})
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_llm_chunk(source, event):
+    with _registry_lock:
+        run = _runs_by_thread.get(threading.get_ident())
+    if run is not None:
+        run.emit("token", {"text": event.chunk})
@@ -0,0 +1,35 @@
+# gunicorn.conf.py
+#
+# Run from the python/ directory:  gunicorn wsgi:app
+#
+# The app, crew, embedding model and memory-mapped IPC index are loaded once in the
+# master and shared copy-on-write by the forked workers. Chroma's SQLite store is
+# never opened before the fork; workers that need it open their own. Each worker then embeds a synthetic
+# query before it starts accepting connections, so no live request pays the
+# first-inference penalty. Set GUNICORN_PRELOAD=false to load everything per worker,
+# e.g. to compare memory with benchmarks/worker_rss.py.
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+# Threads serve long-lived SSE streams and job polling alongside each other
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+# Covers the per-worker warmup, which runs before the worker's first heartbeat
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+
+
+def post_worker_init(worker):
+    # Runs in the worker before it accepts connections, so the worker stays out of
+    # rotation until warm while the others keep serving
+    from api import crew_loader
+
+    crew_loader.warm()
+    worker.log.info(f"Worker {worker.pid} warm: {crew_loader.status()}")
@@ -0,0 +1,396 @@
+# intake.py
+#
+# Local fast path for the case intake stage. Train the classifier from recorded intake
+# outputs (see INTAKE_EXAMPLES_PATH) with:  python intake.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+import numpy as np
+from dotenv import load_dotenv
+
+from metrics import REGISTRY
+
+# Fields of the case intake task's JSON output
+INTAKE_FIELDS = ("case_type", "legal_domain", "summary", "relevant_entities", "jurisdiction")
+
+# Classes with fewer recorded examples than this are left to the LLM
+MIN_CLASS_EXAMPLES = 5
+
+SUMMARY_MAX_CHARS = 400
+
+INTAKE_RUNS = REGISTRY.counter(
+    "lexora_intake_fast_path_runs_total",
+    "Case intakes handled by the fast path, by whether the local classifier or the LLM produced them.",
+    ("source",)
+)
+
+_examples_lock = threading.Lock()
+
+
+def parse_intake(raw: str) -> dict | None:
+    """
+    Parse the case intake agent's output, which is JSON optionally wrapped in a ```json fence.
+
+    Args:
+        raw (str): The intake task's raw output.
+
+    Returns:
+        dict | None: The intake fields, or None if the output is not valid intake JSON.
+    """
+    match = re.search(r"\{.*\}", raw or "", re.DOTALL)
+    if match is None:
+        return None
+    try:
+        intake = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(intake, dict) or not intake.get("case_type") or not intake.get("legal_domain"):
+        return None
+    return {field: intake.get(field) for field in INTAKE_FIELDS}
+
+
+def format_intake(intake: dict) -> str:
+    """Render intake fields the way the case intake agent does, as a fenced JSON block."""
+    return "```json\n" + json.dumps(intake, indent=2, ensure_ascii=False) + "\n```"
+
+
+def record_intake_example(user_input: str, raw: str):
+    """
+    Append an LLM intake output to INTAKE_EXAMPLES_PATH, when set, as training data for the classifier.
+
+    Args:
+        user_input (str): The user's legal issue.
+        raw (str): The case intake task's raw output.
+    """
+    path = os.getenv("INTAKE_EXAMPLES_PATH")
+    intake = parse_intake(raw)
+    if not path or intake is None:
+        return
+
+    line = json.dumps({"user_input": user_input, "intake": intake}, ensure_ascii=False) + "\n"
+    with _examples_lock:
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(line)
+
+
+def load_intake_examples(path: str) -> list[dict]:
+    """Read recorded intake examples, skipping malformed lines."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                example = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if example.get("user_input") and parse_intake(json.dumps(example.get("intake"))):
+                examples.append(example)
+    return examples
+
+
+def class_label(intake: dict) -> str:
+    """Class an intake belongs to: its case type and legal domain, case-insensitively."""
+    return f"{intake['case_type'].strip().lower()} | {intake['legal_domain'].strip().lower()}"
+
+
+def summarize(user_input: str) -> str:
+    """Extractive stand-in for the LLM's summary: the leading sentences of the input."""
+    text = " ".join(user_input.split())
+    if len(text) <= SUMMARY_MAX_CHARS:
+        return text
+    cut = text.rfind(". ", 0, SUMMARY_MAX_CHARS)
+    return text[:cut + 1] if cut > 0 else text[:SUMMARY_MAX_CHARS].rstrip() + "..."
+
+
+class IntakeClassifier:
+    """
+    Nearest-centroid classifier over the shared embedding model, trained on past intake outputs.
+
+    Each class is a (case_type, legal_domain) pair seen at least MIN_CLASS_EXAMPLES times.
+    Its centroid is the normalized mean embedding of the inputs that produced it, and its
+    profile holds the most common spelling of the labels, the usual jurisdiction and the
+    entities named in at least half of its examples. A prediction's confidence is the
+    cosine similarity between the input and the nearest centroid.
+    """
+
+    def __init__(self, centroids: np.ndarray, profiles: list[dict]):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.profiles = profiles
+
+    @classmethod
+    def train(cls, examples: list[dict], embed_batch: Callable[[list[str]], list[list[float]]],
+              min_examples: int = MIN_CLASS_EXAMPLES) -> "IntakeClassifier":
+        """
+        Fit centroids and class profiles.
+
+        Args:
+            examples (list[dict]): Entries with `user_input` and `intake`.
+            embed_batch (Callable): Embeds a list of texts in one call.
+            min_examples (int): Minimum examples for a class to be kept.
+
+        Returns:
+            IntakeClassifier: The trained classifier.
+
+        Raises:
+            ValueError: If no class has enough examples.
+        """
+        groups = {}
+        for example in examples:
+            groups.setdefault(class_label(example["intake"]), []).append(example)
+        groups = {label: members for label, members in groups.items() if len(members) >= min_examples}
+        if not groups:
+            raise ValueError(f"❌ No intake class has at least {min_examples} examples.")
+
+        centroids, profiles = [], []
+        for label, members in sorted(groups.items()):
+            vectors = np.asarray(embed_batch([member["user_input"] for member in members]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            centroid = vectors.mean(axis=0)
+            centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+
+            intakes = [member["intake"] for member in members]
+            entities = Counter(
+                entity for intake in intakes for entity in set(intake.get("relevant_entities") or [])
+            )
+            profiles.append({
+                "label": label,
+                "examples": len(members),
+                "case_type": Counter(intake["case_type"] for intake in intakes).most_common(1)[0][0],
+                "legal_domain": Counter(intake["legal_domain"] for intake in intakes).most_common(1)[0][0],
+                "jurisdiction": Counter(intake.get("jurisdiction") or "India" for intake in intakes).most_common(1)[0][0],
+                "relevant_entities": [entity for entity, count in entities.most_common() if count * 2 >= len(members)]
+            })
+
+        return cls(np.stack(centroids), profiles)
+
+    def classify(self, user_input: str, embedding: list[float]) -> tuple[dict, float]:
+        """
+        Predict the intake for an input.
+
+        Args:
+            user_input (str): The user's legal issue.
+            embedding (list[float]): Its embedding from the shared model.
+
+        Returns:
+            tuple[dict, float]: Intake fields in the agent's schema, and the confidence.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        scores = self.centroids @ query
+        best = int(np.argmax(scores))
+
+        profile = self.profiles[best]
+        intake = {
+            "case_type": profile["case_type"],
+            "legal_domain": profile["legal_domain"],
+            "summary": summarize(user_input),
+            "relevant_entities": list(profile["relevant_entities"]),
+            "jurisdiction": profile["jurisdiction"]
+        }
+        return intake, float(scores[best])
+
+    def save(self, path: str):
+        """Write the classifier as JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"centroids": self.centroids.tolist(), "profiles": self.profiles}, file)
+
+    @classmethod
+    def load(cls, path: str) -> "IntakeClassifier":
+        """Read a classifier written by save()."""
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(np.asarray(data["centroids"], dtype=np.float32), data["profiles"])
+
+
+class IntakeRouter:
+    """
+    Serves the intake stage locally when the classifier is confident, otherwise from the LLM agent.
+
+    Every LLM intake is recorded as a training example. Stats report the fraction of
+    inputs served locally and an estimate of the latency saved, taking the mean measured
+    LLM intake time as the cost of each locally served input.
+    """
+
+    def __init__(self, classifier: IntakeClassifier, embed: Callable[[str], list[float]],
+                 llm_intake: Callable[[str], str], threshold: float = 0.75):
+        self.classifier = classifier
+        self.embed = embed
+        self.llm_intake = llm_intake
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self.local_runs = 0
+        self.llm_runs = 0
+        self.local_seconds = 0.0
+        self.llm_seconds = 0.0
+
+    def run(self, user_input: str) -> tuple[str, bool]:
+        """
+        Produce the case intake for an input.
+
+        Args:
+            user_input (str): The user's legal issue.
+
+        Returns:
+            tuple[str, bool]: The intake as the agent would write it, and whether it was served locally.
+        """
+        start = time.perf_counter()
+        intake, confidence = self.classifier.classify(user_input, self.embed(user_input))
+        if confidence >= self.threshold:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.local_runs += 1
+                self.local_seconds += elapsed
+            INTAKE_RUNS.inc(source="local")
+            return format_intake(intake), True
+
+        raw = self.llm_intake(user_input)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.llm_runs += 1
+            self.llm_seconds += elapsed
+        INTAKE_RUNS.inc(source="llm")
+        record_intake_example(user_input, raw)
+        return raw, False
+
+    def stats(self) -> dict:
+        """
+        Report how many intakes were served locally and the latency that saved.
+
+        Returns:
+            dict: Run counts, local fraction, mean latency per path and estimated seconds saved.
+        """
+        with self._lock:
+            total = self.local_runs + self.llm_runs
+            mean_local = self.local_seconds / self.local_runs if self.local_runs else None
+            mean_llm = self.llm_seconds / self.llm_runs if self.llm_runs else None
+            saved = None
+            if mean_llm is not None:
+                saved = self.local_runs * mean_llm - self.local_seconds
+            return {
+                "local_runs": self.local_runs,
+                "llm_runs": self.llm_runs,
+                "local_fraction": self.local_runs / total if total else 0.0,
+                "mean_local_seconds": mean_local,
+                "mean_llm_seconds": mean_llm,
+                "estimated_seconds_saved": saved,
+                "threshold": self.threshold
+            }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_intake_router(llm_intake: Callable[[str], str]) -> IntakeRouter | None:
+    """
+    Return the process-wide intake router, or None when the fast path is disabled.
+
+    The fast path needs INTAKE_FAST_PATH=true and a trained classifier at
+    INTAKE_CLASSIFIER_PATH. Inputs are embedded with the IPC retriever's model, so the
+    embedding is shared with the analysis cache's semantic lookup.
+
+    Args:
+        llm_intake (Callable[[str], str]): Runs the case intake agent on an input.
+
+    Returns:
+        IntakeRouter | None: The shared router.
+    """
+    global _router
+    load_dotenv()
+    if os.getenv("INTAKE_FAST_PATH", "false").lower() != "true":
+        return None
+
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                classifier_path = os.getenv("INTAKE_CLASSIFIER_PATH")
+                if not classifier_path or not os.path.exists(classifier_path):
+                    raise EnvironmentError("❌ 'INTAKE_CLASSIFIER_PATH' must point to a trained intake classifier")
+
+                from tools.ipc_retriever import get_ipc_retriever
+
+                _router = IntakeRouter(
+                    IntakeClassifier.load(classifier_path),
+                    embed=lambda text: get_ipc_retriever().embed_query(text),
+                    llm_intake=llm_intake,
+                    threshold=float(os.getenv("INTAKE_CONFIDENCE", 0.75))
+                )
+    return _router
+
+
+def _is_holdout(example: dict) -> bool:
+    digest = hashlib.sha256(example["user_input"].encode("utf-8")).digest()
+    return digest[0] < 52  # about 20%
+
+
+def evaluate(classifier: IntakeClassifier, examples: list[dict], embed_batch, thresholds) -> list[dict]:
+    """
+    Measure coverage and label accuracy of the fast path at several confidence thresholds.
+
+    Args:
+        classifier (IntakeClassifier): Classifier trained without these examples.
+        examples (list[dict]): Held-out examples.
+        embed_batch (Callable): Embeds a list of texts in one call.
+        thresholds: Confidence thresholds to report.
+
+    Returns:
+        list[dict]: For each threshold, the fraction served locally and how many of those
+            got the LLM's case type and legal domain.
+    """
+    embeddings = embed_batch([example["user_input"] for example in examples])
+    predictions = []
+    for example, embedding in zip(examples, embeddings):
+        intake, confidence = classifier.classify(example["user_input"], embedding)
+        predictions.append((confidence, class_label(intake) == class_label(example["intake"])))
+
+    report = []
+    for threshold in thresholds:
+        served = [correct for confidence, correct in predictions if confidence >= threshold]
+        report.append({
+            "threshold": threshold,
+            "coverage": len(served) / len(predictions) if predictions else 0.0,
+            "accuracy": sum(served) / len(served) if served else None
+        })
+    return report
+
+
+def train_intake_classifier():
+    """Train on INTAKE_EXAMPLES_PATH, report held-out coverage and accuracy, and save to INTAKE_CLASSIFIER_PATH."""
+    load_dotenv()
+    examples_path = os.getenv("INTAKE_EXAMPLES_PATH")
+    classifier_path = os.getenv("INTAKE_CLASSIFIER_PATH")
+    if not examples_path or not classifier_path:
+        raise EnvironmentError("❌ 'INTAKE_EXAMPLES_PATH' and 'INTAKE_CLASSIFIER_PATH' must be set in .env")
+
+    from tools.ipc_retriever import get_ipc_retriever
+
+    embed_batch = get_ipc_retriever().embed_queries
+    examples = load_intake_examples(examples_path)
+    print(f"✅ Loaded {len(examples)} intake examples")
+
+    holdout = [example for example in examples if _is_holdout(example)]
+    training = [example for example in examples if not _is_holdout(example)]
+    if holdout:
+        try:
+            classifier = IntakeClassifier.train(training, embed_batch)
+            print(f"\nHeld-out evaluation on {len(holdout)} examples:")
+            for row in evaluate(classifier, holdout, embed_batch, (0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9)):
+                accuracy = f"{row['accuracy']:.1%}" if row["accuracy"] is not None else "n/a"
+                print(f"  threshold {row['threshold']:.2f}: {row['coverage']:.1%} served locally, {accuracy} correct")
+        except ValueError as e:
+            print(f"Skipping held-out evaluation: {str(e)}")
+
+    classifier = IntakeClassifier.train(examples, embed_batch)
+    classifier.save(classifier_path)
+    print(f"\n✅ Saved {len(classifier.profiles)} intake classes to '{classifier_path}'")
+
+
+if __name__ == "__main__":
+    train_intake_classifier()
@@ -0,0 +1,114 @@
+# ipc_corpus.py
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+
+from tools.ipc_lexical_index import section_key
+
+
+class JsonPayload:
+    """
+    A JSON response body serialized once, with a gzip copy and a strong ETag.
+    """
+
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+
+class IPCCorpus:
+    """
+    The IPC sections from ipc.json, loaded once and indexed for direct lookups.
+
+    Sections are keyed by normalized section number ("304A") and grouped by chapter,
+    and the list payloads served by the API are serialized up front.
+    """
+
+    def __init__(self, ipc_data: list[dict]):
+        self.by_section = {section_key(entry["Section"]): entry for entry in ipc_data}
+
+        self.chapters = OrderedDict()
+        for entry in ipc_data:
+            chapter = self.chapters.setdefault(entry["chapter"], {
+                "chapter": entry["chapter"],
+                "chapter_title": entry["chapter_title"],
+                "sections": []
+            })
+            chapter["sections"].append(entry)
+
+        self.sections_payload = JsonPayload({
+            "sections": [
+                {"section": entry["Section"], "title": entry["section_title"], "chapter": entry["chapter"]}
+                for entry in ipc_data
+            ]
+        })
+        self.chapters_payload = JsonPayload({
+            "chapters": [
+                {
+                    "chapter": chapter["chapter"],
+                    "chapter_title": chapter["chapter_title"],
+                    "section_count": len(chapter["sections"])
+                }
+                for chapter in self.chapters.values()
+            ]
+        })
+
+    @classmethod
+    def load(cls, file_path: str) -> "IPCCorpus":
+        """
+        Load and index the IPC sections from a JSON file.
+
+        Args:
+            file_path (str): Path to the IPC JSON file.
+
+        Returns:
+            IPCCorpus: The indexed corpus.
+        """
+        with open(file_path, "r", encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def get_section(self, section_id: str) -> dict | None:
+        """
+        Look up one section by number.
+
+        Args:
+            section_id (str): Section number, e.g. "420" or "304a".
+
+        Returns:
+            dict | None: The section, or None if it does not exist.
+        """
+        entry = self.by_section.get(section_key(section_id))
+        if entry is None:
+            return None
+        return {
+            "section": entry["Section"],
+            "title": entry["section_title"],
+            "description": entry["section_desc"],
+            "chapter": entry["chapter"],
+            "chapter_title": entry["chapter_title"]
+        }
+
+    def get_chapter(self, chapter: int) -> dict | None:
+        """
+        List the sections of one chapter.
+
+        Args:
+            chapter (int): Chapter number.
+
+        Returns:
+            dict | None: Chapter title and its sections, or None if the chapter does not exist.
+        """
+        found = self.chapters.get(chapter)
+        if found is None:
+            return None
+        return {
+            "chapter": found["chapter"],
+            "chapter_title": found["chapter_title"],
+            "sections": [
+                {"section": entry["Section"], "title": entry["section_title"]}
+                for entry in found["sections"]
+            ]
+        }
@@ -1,13 +1,23 @@
 # ipc_vectordb_builder.py
 
+import hashlib
 import json
 import os
+import time
+from typing import Iterable, Iterator
 
 from dotenv import load_dotenv
 from langchain_community.docstore.document import Document
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from tools.ipc_ann_index import build_ann_index
+from tools.ipc_embedding_artifact import write_embedding_artifact
+
+# Defaults for EMBEDDING_BATCH_SIZE and EMBEDDING_WORKERS
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_WORKERS = 1
+
 
 def load_ipc_data(file_path: str) -> list[dict]:
     """
@@ -23,18 +33,40 @@ def load_ipc_data(file_path: str) -> list[dict]:
         return json.load(file)
 
 
-def prepare_documents(ipc_data: list[dict]) -> list[Document]:
+def iter_ipc_data(file_path: str) -> Iterator[dict]:
     """
-    Convert IPC JSON entries to LangChain Document objects.
+    Yield statute entries from a JSON array file or, for large corpora, a JSON Lines file.
+
+    JSON Lines files are read one line at a time, so the corpus never has to fit in memory.
 
     Args:
-        ipc_data (list[dict]): IPC data loaded from JSON.
+        file_path (str): Path to a .json or .jsonl file.
 
-    Returns:
-        list[Document]: LangChain-compatible documents.
+    Yields:
+        dict: One statute section per entry.
     """
-    return [
-        Document(
+    if not file_path.endswith(".jsonl"):
+        yield from load_ipc_data(file_path)
+        return
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_documents(ipc_data: Iterable[dict]) -> Iterator[Document]:
+    """
+    Lazily convert IPC JSON entries to LangChain Document objects.
+
+    Args:
+        ipc_data (Iterable[dict]): IPC entries loaded from JSON.
+
+    Yields:
+        Document: LangChain-compatible document.
+    """
+    for entry in ipc_data:
+        yield Document(
             page_content=f"Section {entry['Section']}: {entry['section_title']}\n\n{entry['section_desc']}",
             metadata={
                 "chapter": entry["chapter"],
@@ -43,13 +75,263 @@ def prepare_documents(ipc_data: list[dict]) -> list[Document]:
                 "section_title": entry["section_title"]
             }
         )
-        for entry in ipc_data
-    ]
+
+
+def prepare_documents(ipc_data: list[dict]) -> list[Document]:
+    """
+    Convert IPC JSON entries to LangChain Document objects.
+
+    Args:
+        ipc_data (list[dict]): IPC data loaded from JSON.
+
+    Returns:
+        list[Document]: LangChain-compatible documents.
+    """
+    return list(iter_documents(ipc_data))
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """
+    Group an iterable into lists of at most batch_size items.
+
+    Args:
+        items (Iterable): Items to group.
+        batch_size (int): Maximum number of items per batch.
+
+    Yields:
+        list: The next batch of items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BatchEncoder:
+    """
+    Embed documents in fixed-size batches, optionally across several CPU processes.
+
+    With one worker, encoding goes through the HuggingFaceEmbeddings instance as usual.
+    With more, the same sentence-transformers model is started in a multi-process pool
+    and each batch is split across the pool. Use as a context manager so the pool is
+    shut down when the build ends.
+    """
+
+    def __init__(self, embeddings: HuggingFaceEmbeddings, batch_size: int = DEFAULT_BATCH_SIZE,
+                 workers: int = DEFAULT_WORKERS):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.workers = workers
+        self._model = None
+        self._pool = None
+
+    def __enter__(self) -> "BatchEncoder":
+        if self.workers > 1:
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.embeddings.model_name, **self.embeddings.model_kwargs)
+            self._pool = self._model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pool is not None:
+            self._model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed a list of document texts.
+
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding per text.
+        """
+        if self._pool is None:
+            return self.embeddings.embed_documents(texts)
+
+        # Match HuggingFaceEmbeddings.embed_documents so both paths produce the same vectors
+        texts = [text.replace("\n", " ") for text in texts]
+        # encode_kwargs usually carries batch_size too, so merge rather than pass it twice
+        vectors = self._model.encode_multi_process(
+            texts,
+            self._pool,
+            **{**self.embeddings.encode_kwargs, "batch_size": self.batch_size}
+        )
+        return vectors.tolist()
+
+
+def document_id(document: Document) -> str:
+    """
+    Derive a stable vectorstore ID for an IPC document from its chapter and section.
+
+    Args:
+        document (Document): Document produced by prepare_documents.
+
+    Returns:
+        str: ID that stays the same across rebuilds.
+    """
+    return f"ipc-ch{document.metadata['chapter']}-s{document.metadata['section']}"
+
+
+def document_hash(document: Document) -> str:
+    """
+    Hash the text and metadata of an IPC document.
+
+    Args:
+        document (Document): Document produced by prepare_documents.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest that changes whenever the section changes.
+    """
+    payload = json.dumps(
+        {"page_content": document.page_content, "metadata": document.metadata},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sync_ipc_vectordb(vector_db: Chroma, documents: Iterable[Document], encode=None,
+                      batch_size: int = DEFAULT_BATCH_SIZE, verbose: bool = False) -> dict:
+    """
+    Bring the Chroma collection in line with the documents, re-embedding only what changed.
+
+    Every document is stored under its stable ID with its content hash in the metadata.
+    Documents are consumed in batches: each batch's new or changed documents are embedded
+    and upserted before the next batch is read, so memory stays bounded by the batch size.
+    Unchanged documents are skipped, and entries whose ID is no longer produced (including
+    leftovers from earlier non-incremental builds) are deleted at the end.
+
+    Args:
+        vector_db (Chroma): The IPC collection to update.
+        documents (Iterable[Document]): Documents produced by iter_documents or prepare_documents.
+        encode: Callable embedding a list of texts; defaults to the collection's embedding function.
+        batch_size (int): Number of documents read, embedded and written per batch.
+        verbose (bool): Print progress after every written batch.
+
+    Returns:
+        dict: Counts of added, updated, deleted and unchanged documents, plus embedding throughput.
+    """
+    encode = encode or vector_db.embeddings.embed_documents
+
+    existing = vector_db.get(include=["metadatas"])
+    existing_hashes = {
+        doc_id: (metadata or {}).get("content_hash")
+        for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+
+    seen_ids = set()
+    added = updated = unchanged = 0
+    embed_seconds = 0.0
+    start = time.perf_counter()
+
+    for batch in iter_batches(documents, batch_size):
+        changed_ids = []
+        changed_documents = []
+        for document in batch:
+            doc_id = document_id(document)
+            if doc_id in seen_ids:
+                raise ValueError(f"❌ Duplicate IPC entry for '{doc_id}'.")
+            seen_ids.add(doc_id)
+
+            content_hash = document_hash(document)
+            if existing_hashes.get(doc_id) == content_hash:
+                unchanged += 1
+                continue
+
+            changed_ids.append(doc_id)
+            changed_documents.append(Document(
+                page_content=document.page_content,
+                metadata={**document.metadata, "content_hash": content_hash}
+            ))
+
+        if not changed_ids:
+            continue
+
+        embed_start = time.perf_counter()
+        vectors = encode([document.page_content for document in changed_documents])
+        embed_seconds += time.perf_counter() - embed_start
+
+        # Upsert precomputed vectors so the store does not embed the batch a second time
+        vector_db._collection.upsert(
+            ids=changed_ids,
+            embeddings=vectors,
+            metadatas=[document.metadata for document in changed_documents],
+            documents=[document.page_content for document in changed_documents]
+        )
+
+        batch_updated = sum(1 for doc_id in changed_ids if doc_id in existing_hashes)
+        updated += batch_updated
+        added += len(changed_ids) - batch_updated
+
+        if verbose:
+            embedded = added + updated
+            print(f"Embedded {embedded} documents ({embedded / embed_seconds:.1f} docs/sec), "
+                  f"{unchanged} unchanged so far")
+
+    stale_ids = [doc_id for doc_id in existing_hashes if doc_id not in seen_ids]
+    for stale_batch in iter_batches(stale_ids, batch_size):
+        vector_db.delete(ids=stale_batch)
+
+    embedded = added + updated
+    return {
+        "added": added,
+        "updated": updated,
+        "deleted": len(stale_ids),
+        "unchanged": unchanged,
+        "embed_seconds": embed_seconds,
+        "total_seconds": time.perf_counter() - start,
+        "docs_per_sec": embedded / embed_seconds if embed_seconds else 0.0
+    }
+
+
+def export_embedding_artifact(vector_db: Chroma, artifact_dir: str, model_name: str, ipc_json_path: str,
+                              batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Write the vectors stored in the Chroma collection as a memory-mappable artifact.
+
+    The collection is read page by page, so the full set of vectors is never held in memory.
+
+    Args:
+        vector_db (Chroma): The freshly built IPC collection.
+        artifact_dir (str): Directory to write the .npy matrix and metadata sidecar into.
+        model_name (str): Name of the embedding model used for the collection.
+        ipc_json_path (str): Source IPC JSON file, recorded as a hash in the sidecar.
+        batch_size (int): Number of vectors read from the collection per page.
+    """
+    count = vector_db._collection.count()
+
+    def pages():
+        for offset in range(0, count, batch_size):
+            page = vector_db.get(
+                include=["embeddings", "metadatas", "documents"],
+                limit=batch_size,
+                offset=offset
+            )
+            yield page["embeddings"], page["metadatas"], page["documents"]
+
+    write_embedding_artifact(
+        artifact_dir,
+        pages(),
+        count=count,
+        model_name=model_name,
+        ipc_json_path=ipc_json_path
+    )
 
 
 def build_ipc_vectordb():
     """
-    Build and persist a Chroma vectorstore for IPC sections.
+    Build or incrementally update the persisted Chroma vectorstore for IPC sections.
+
+    When IPC_EMBEDDINGS_PATH is set, the embeddings are also written as a
+    memory-mappable artifact for the in-memory NumPy index, and IPC_ANN_INDEX
+    ("ivf", "hnsw" or both, comma-separated) builds approximate indexes over it.
     """
     # Load environment variables
     print("Loading environment variables...")
@@ -57,28 +339,77 @@ def build_ipc_vectordb():
     ipc_json_path = os.getenv("IPC_JSON_PATH")
     persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
     collection_name = os.getenv("IPC_COLLECTION_NAME")
+    artifact_dir = os.getenv("IPC_EMBEDDINGS_PATH")
+    batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    workers = int(os.getenv("EMBEDDING_WORKERS", DEFAULT_WORKERS))
+    ann_kinds = [kind.strip() for kind in os.getenv("IPC_ANN_INDEX", "").split(",") if kind.strip()]
     
     print(f"IPC_JSON_PATH: {ipc_json_path}")
     print(f"PERSIST_DIRECTORY_PATH: {persist_dir_path}")
     print(f"IPC_COLLECTION_NAME: {collection_name}")
+    print(f"IPC_EMBEDDINGS_PATH: {artifact_dir}")
+    print(f"EMBEDDING_BATCH_SIZE: {batch_size}")
+    print(f"EMBEDDING_WORKERS: {workers}")
+    print(f"IPC_ANN_INDEX: {', '.join(ann_kinds) or 'none'}")
 
     if not all([ipc_json_path, persist_dir_path, collection_name]):
         raise EnvironmentError("❌ Missing one or more required environment variables.")
 
-    # Load and process data
-    ipc_data = load_ipc_data(ipc_json_path)
-    documents = prepare_documents(ipc_data)
+    # Stream entries from disk; documents are only materialized one batch at a time
+    documents = iter_documents(iter_ipc_data(ipc_json_path))
 
     # Initialize embeddings and vectorstore
-    embeddings = HuggingFaceEmbeddings()
-    Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
+    embeddings = HuggingFaceEmbeddings(encode_kwargs={"batch_size": batch_size})
+    vector_db = Chroma(
+        collection_name=collection_name,
         persist_directory=persist_dir_path,
-        collection_name=collection_name
+        embedding_function=embeddings
     )
 
-    print(f"✅ Vectorstore successfully created in collection '{collection_name}' at '{persist_dir_path}'")
+    # Only new or changed sections are embedded; removed sections are deleted
+    with BatchEncoder(embeddings, batch_size=batch_size, workers=workers) as encoder:
+        stats = sync_ipc_vectordb(
+            vector_db,
+            documents,
+            encode=encoder.encode,
+            batch_size=batch_size * workers,
+            verbose=True
+        )
+
+    print(
+        f"✅ Vectorstore synced in collection '{collection_name}' at '{persist_dir_path}': "
+        f"{stats['added']} added, {stats['updated']} updated, "
+        f"{stats['deleted']} deleted, {stats['unchanged']} unchanged"
+    )
+    print(
+        f"Embedding throughput: {stats['docs_per_sec']:.1f} docs/sec "
+        f"({stats['embed_seconds']:.1f}s embedding, {stats['total_seconds']:.1f}s total)"
+    )
+
+    if artifact_dir:
+        export_embedding_artifact(vector_db, artifact_dir, embeddings.model_name, ipc_json_path, batch_size=batch_size)
+        print(f"✅ Embedding artifact written to '{artifact_dir}'")
+
+        ann_params = {
+            "ivf": {
+                "nlist": int(os.getenv("IPC_IVF_NLIST", "256")),
+                "quantization": os.getenv("IPC_IVF_QUANTIZATION", "int8"),
+                "pq_subspaces": int(os.getenv("IPC_PQ_SUBSPACES", "48"))
+            },
+            "hnsw": {
+                "m": int(os.getenv("IPC_HNSW_M", "16")),
+                "ef_construction": int(os.getenv("IPC_HNSW_EF_CONSTRUCTION", "200"))
+            }
+        }
+        for kind in ann_kinds:
+            start = time.perf_counter()
+            index = build_ann_index(artifact_dir, kind, **ann_params.get(kind, {}))
+            print(
+                f"✅ {kind} index over {len(index)} vectors built in {time.perf_counter() - start:.1f}s "
+                f"({index.nbytes / len(index):.0f} bytes per vector)"
+            )
+    elif ann_kinds:
+        print("⚠️ IPC_ANN_INDEX needs IPC_EMBEDDINGS_PATH; no approximate index was built")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,390 @@
+# jobs.py
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the pending queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    One queued analysis and its lifecycle timestamps.
+    """
+
+    def __init__(self, user_input: str, options: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.user_input = user_input
+        self.options = options or {}
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.cancel_requested = False
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = False
+        self._done_callbacks = []
+        self._done_lock = threading.Lock()
+
+    def add_done_callback(self, callback: Callable[["Job"], None]):
+        """Call callback(job) once the job has finished, or straight away if it already has."""
+        with self._done_lock:
+            if not self._done:
+                self._done_callbacks.append(callback)
+                return
+        callback(self)
+
+    def _mark_done(self):
+        with self._done_lock:
+            self._done = True
+            callbacks, self._done_callbacks = self._done_callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def to_dict(self) -> dict:
+        """Serialize the job for the API, including per-job timing."""
+        timing = {
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_seconds": (self.started_at or self.finished_at or time.time()) - self.queued_at,
+            "run_seconds": ((self.finished_at or time.time()) - self.started_at) if self.started_at else None
+        }
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "timing": timing
+        }
+
+
+class JobQueue:
+    """
+    Fixed-size worker pool fed by a bounded in-memory queue.
+
+    Submitting never blocks: when max_pending jobs are already waiting, QueueFullError
+    is raised with a Retry-After estimate so the API can apply backpressure. Queued jobs
+    can be cancelled outright, which frees their slot; a running job is marked cancelled and its result discarded
+    when the crew returns, since a CrewAI run cannot be interrupted midway.
+
+    Worker threads start with the first submission in each process, so a queue created
+    before a pre-forking server forks still gets workers in every child.
+    """
+
+    def __init__(self, runner: Callable[..., str], workers: int = 2, max_pending: int = 16,
+                 retention_seconds: float = 3600):
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._pending = deque()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._job_available = threading.Condition(self._lock)
+        self._run_seconds = []
+        self._worker_pid = None
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            for index in range(self.workers):
+                threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True).start()
+
+    def submit(self, user_input: str, **options) -> Job:
+        """
+        Queue an analysis.
+
+        Args:
+            user_input (str): The user's legal issue.
+            **options: Extra keyword arguments passed to the runner.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            QueueFullError: If the pending queue is at capacity.
+        """
+        self._ensure_workers()
+        self._prune()
+        job = Job(user_input, options)
+        with self._lock:
+            full = len(self._pending) >= self.max_pending
+            if not full:
+                self._jobs[job.id] = job
+                self._pending.append(job)
+                self._job_available.notify()
+        if full:
+            raise QueueFullError(self.retry_after())
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Look up a job by ID."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Job | None:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id (str): ID returned by submit.
+
+        Returns:
+            Job | None: The job, or None if it does not exist.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return job
+
+            job.cancel_requested = True
+            if job.status != QUEUED:
+                return job
+            self._pending.remove(job)
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        job._mark_done()
+        return job
+
+    def retry_after(self) -> int:
+        """Estimate, in whole seconds, how long until a queue slot frees up."""
+        with self._lock:
+            recent = self._run_seconds[-20:]
+        average = sum(recent) / len(recent) if recent else 30.0
+        return max(1, int(average / self.workers + 0.5))
+
+    def stats(self) -> dict:
+        """Report queue depth and job counts by status."""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            pending = len(self._pending)
+        return {"pending": pending, "workers": self.workers, "jobs": counts}
+
+    def _work(self):
+        while True:
+            with self._job_available:
+                while not self._pending:
+                    self._job_available.wait()
+                job = self._pending.popleft()
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            try:
+                result = self.runner(job.user_input, **job.options)
+                error = None
+            except Exception as e:
+                result = None
+                error = str(e)
+
+            with self._lock:
+                job.finished_at = time.time()
+                self._run_seconds.append(job.finished_at - job.started_at)
+                del self._run_seconds[:-100]
+
+                if job.cancel_requested:
+                    job.status = CANCELLED
+                elif error is not None:
+                    job.status = FAILED
+                    job.error = error
+                else:
+                    job.status = SUCCEEDED
+                    job.result = result
+            job._mark_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.status in FINISHED_STATES and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+class AsyncJobQueue:
+    """
+    Event-loop counterpart of JobQueue for async servers.
+
+    Every job is an asyncio task rather than a worker thread, so an analysis waiting on
+    the LLM or Tavily costs a coroutine, not a thread. At most max_running jobs run at
+    once and at most max_pending wait for a slot; beyond that, submit raises
+    QueueFullError like JobQueue does. Cancelling a running job cancels its task, which
+    stops the crew when CrewAI runs it natively on the loop; otherwise the crew's worker
+    thread finishes and its result is discarded. Work that is not polled as a job, such
+    as a streamed analysis, runs under the same limits through start().
+
+    Must be created and used on the server's event loop.
+    """
+
+    def __init__(self, runner: Callable[..., Awaitable[str]], max_running: int = 256, max_pending: int = 256,
+                 retention_seconds: float = 3600):
+        self.runner = runner
+        self.max_running = max_running
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._slots = asyncio.Semaphore(max_running)
+        self._jobs = {}
+        self._tasks = {}
+        self._unlisted = set()
+        self._run_seconds = []
+
+    def submit(self, user_input: str, **options) -> Job:
+        """
+        Start an analysis, or queue it when max_running are already running.
+
+        Args:
+            user_input (str): The user's legal issue.
+            **options: Extra keyword arguments passed to the runner.
+
+        Returns:
+            Job: The submitted job.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already waiting.
+        """
+        self._admit()
+        job = Job(user_input, options)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+        return job
+
+    def start(self, function: Callable[..., Awaitable], *args) -> asyncio.Task:
+        """
+        Run a coroutine function in a job slot without creating a pollable job.
+
+        It counts against max_running and max_pending like a submitted job, and holds
+        its slot until it returns, e.g. for as long as a streamed analysis runs.
+
+        Args:
+            function (Callable[..., Awaitable]): Coroutine function to run.
+            *args: Arguments passed to it.
+
+        Returns:
+            asyncio.Task: The task running it.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already waiting.
+        """
+        self._admit()
+
+        async def run():
+            async with self._slots:
+                await function(*args)
+
+        task = asyncio.create_task(run())
+        self._unlisted.add(task)
+        task.add_done_callback(self._unlisted.discard)
+        return task
+
+    def get(self, job_id: str) -> Job | None:
+        """Look up a job by ID."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Job | None:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id (str): ID returned by submit.
+
+        Returns:
+            Job | None: The job, or None if it does not exist.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+
+        job.cancel_requested = True
+        job.status = CANCELLED
+        job.finished_at = time.time()
+        task = self._tasks.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+        job._mark_done()
+        return job
+
+    def retry_after(self) -> int:
+        """Estimate, in whole seconds, how long until a queue slot frees up."""
+        recent = self._run_seconds[-20:]
+        average = sum(recent) / len(recent) if recent else 30.0
+        return max(1, int(average * self.max_pending / self.max_running + 0.5))
+
+    def stats(self) -> dict:
+        """Report queue depth and job counts by status."""
+        counts = self._counts()
+        active = len(self._tasks) + len(self._unlisted)
+        return {"pending": max(0, active - self.max_running), "running": min(active, self.max_running),
+                "max_running": self.max_running, "jobs": counts, "unlisted": len(self._unlisted)}
+
+    def _admit(self):
+        self._prune()
+        if len(self._tasks) + len(self._unlisted) >= self.max_running + self.max_pending:
+            raise QueueFullError(self.retry_after())
+
+    def _counts(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    async def _run(self, job: Job):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started_at = time.time()
+                try:
+                    result = await self.runner(job.user_input, **job.options)
+                    error = None
+                except Exception as e:
+                    result = None
+                    error = str(e)
+
+                job.finished_at = time.time()
+                self._run_seconds.append(job.finished_at - job.started_at)
+                del self._run_seconds[:-100]
+                if error is not None:
+                    job.status = FAILED
+                    job.error = error
+                else:
+                    job.status = SUCCEEDED
+                    job.result = result
+                job._mark_done()
+        except asyncio.CancelledError:
+            # cancel() has already marked the job; the task just ends
+            pass
+        finally:
+            self._tasks.pop(job.id, None)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATES and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,192 @@
+# llm_cache.py
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from crewai import LLM
+from dotenv import load_dotenv
+
+from metrics import REGISTRY, current_trace_id
+from tools.tiered_cache import TieredCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CALLS = REGISTRY.counter(
+    "lexora_llm_calls_total",
+    "LLM calls per agent, split by whether the response came from the LLM cache.",
+    ("agent", "model", "cached")
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "lexora_llm_call_seconds",
+    "Latency of LLM calls that reached the provider.",
+    ("agent", "model")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "lexora_llm_tokens_total",
+    "Prompt and completion tokens sent to and received from the provider.",
+    ("agent", "model", "kind")
+)
+LLM_COST = REGISTRY.counter(
+    "lexora_llm_cost_usd_total",
+    "Estimated provider cost of LLM calls in US dollars.",
+    ("agent", "model")
+)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Whether the current run is replaying from the cache; see replay_from_cache
+_replaying = contextvars.ContextVar("llm_replay", default=False)
+
+
+def count_tokens(model: str, messages, response: str) -> tuple[int, int, float]:
+    """
+    Count prompt and completion tokens of one call and price them.
+
+    Uses LiteLLM's tokenizer and price table (installed with CrewAI); returns zeros
+    when either is unavailable for the model.
+
+    Returns:
+        tuple[int, int, float]: Prompt tokens, completion tokens and cost in US dollars.
+    """
+    try:
+        import litellm
+
+        prompt_messages = messages if isinstance(messages, list) else [{"role": "user", "content": str(messages)}]
+        prompt_tokens = litellm.token_counter(model=model, messages=prompt_messages)
+        completion_tokens = litellm.token_counter(model=model, text=response)
+    except Exception:
+        return 0, 0, 0.0
+
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        cost = prompt_cost + completion_cost
+    except Exception:
+        cost = 0.0
+    return prompt_tokens, completion_tokens, cost
+
+
+def get_llm_call_cache() -> TieredCache | None:
+    """
+    Return the process-wide LLM response cache configured from .env, or None when disabled.
+
+    With LLM_CACHE_PATH set, responses are also kept in SQLite and survive restarts.
+    """
+    global _cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCache(
+                    max_entries=int(os.getenv("LLM_CACHE_SIZE", 1024)),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", 7 * 86400)),
+                    db_path=os.getenv("LLM_CACHE_PATH") or None,
+                    table="llm_calls"
+                )
+    return _cache
+
+
+@contextmanager
+def replay_from_cache():
+    """
+    Serve every cached LLM response while the block runs, whatever the agent's temperature.
+
+    Used to resume a crew run that failed part-way: stages that completed before the
+    failure replay their recorded responses, and only the failed stage calls the LLM.
+    The flag is a context variable, so only the resumed run replays; other runs in the
+    process keep their normal caching. Threads started inside the block do not see it,
+    which is why resumed runs execute their tasks on the kickoff thread (see replaying).
+    """
+    token = _replaying.set(True)
+    try:
+        yield
+    finally:
+        _replaying.reset(token)
+
+
+def replaying() -> bool:
+    """Whether the current code runs inside replay_from_cache."""
+    return _replaying.get()
+
+
+class CachedLLM(LLM):
+    """
+    CrewAI LLM whose responses are memoized by model, temperature and the full prompt.
+
+    Responses are always recorded. They are served back for temperature-0 agents, whose
+    output is deterministic, and for other agents only when cache_nondeterministic is set
+    (defaulting to LLM_CACHE_NONDETERMINISTIC) or while replay_from_cache is active.
+
+    Every call is counted in the LLM metrics under agent_name, with latency, tokens and
+    estimated cost for the calls that reach the provider.
+    """
+
+    def __init__(self, *args, cache_nondeterministic: bool | None = None, agent_name: str = "unknown", **kwargs):
+        super().__init__(*args, **kwargs)
+        if cache_nondeterministic is None:
+            cache_nondeterministic = os.getenv("LLM_CACHE_NONDETERMINISTIC", "false").lower() == "true"
+        self.cache_nondeterministic = cache_nondeterministic
+        self.agent_name = agent_name
+
+    def _cache_key(self, messages, tools) -> str:
+        payload = json.dumps(
+            {
+                "model": self.model,
+                "temperature": self.temperature,
+                "stop": getattr(self, "stop", None),
+                "messages": messages,
+                "tools": tools
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _serves_cached(self) -> bool:
+        return not self.temperature or self.cache_nondeterministic or _replaying.get()
+
+    def call(self, messages, tools=None, *args, **kwargs):
+        cache = get_llm_call_cache()
+        key = self._cache_key(messages, tools) if cache is not None else None
+        if cache is not None and self._serves_cached():
+            response = cache.get(key)
+            if response is not None:
+                LLM_CALLS.inc(agent=self.agent_name, model=self.model, cached="true")
+                return response
+
+        response = self._call_provider(messages, tools, *args, **kwargs)
+        if cache is not None and isinstance(response, str) and response:
+            cache.set(key, response)
+        return response
+
+    def _call_provider(self, messages, tools, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().call(messages, tools, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        labels = {"agent": self.agent_name, "model": self.model}
+        LLM_CALLS.inc(cached="false", **labels)
+        LLM_CALL_SECONDS.observe(elapsed, **labels)
+
+        completion = response if isinstance(response, str) else ""
+        prompt_tokens, completion_tokens, cost = count_tokens(self.model, messages, completion)
+        LLM_TOKENS.inc(prompt_tokens, kind="prompt", **labels)
+        LLM_TOKENS.inc(completion_tokens, kind="completion", **labels)
+        LLM_COST.inc(cost, **labels)
+        logger.info(
+            f"[trace {current_trace_id()}] LLM call by {self.agent_name}: {elapsed:.2f}s, "
+            f"{prompt_tokens} prompt + {completion_tokens} completion tokens, ${cost:.5f}"
+        )
+        return response
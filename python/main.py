@@ -1,18 +1,47 @@
 # main.py
 
+import argparse
+
 from dotenv import load_dotenv
-from crew import legal_assistant_crew
+from batch import DEFAULT_CONCURRENCY, run_batch
 
 load_dotenv()
 
-def run(user_input: str):
-    result = legal_assistant_crew.kickoff(inputs={"user_input": user_input})
+# The crew is imported inside each entry point so `--help` and argument errors
+# return without loading crewai and the embedding model
+def run(user_input: str, resume: bool = False):
+    from crew import run_legal_assistant
+
+    result = run_legal_assistant(user_input, resume=resume)
 
     print("-"*50)
     print(result)
     print("-" * 50)
 
+def run_batch_file(input_path: str, output_path: str, concurrency: int):
+    from crew import run_legal_assistant
+
+    stats = run_batch(input_path, output_path, run_legal_assistant, concurrency=concurrency)
+
+    print(f"Batch complete: {stats['succeeded']} succeeded, {stats['failed']} failed, "
+          f"{stats['skipped']} already done in '{output_path}'")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the AI legal assistant on a legal issue.")
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse the recorded LLM responses of stages completed by a previous failed run")
+    parser.add_argument("--batch", metavar="CASES_FILE",
+                        help="analyse every case in a .csv or .jsonl file (columns/fields: id, user_input)")
+    parser.add_argument("--output", metavar="RESULTS_FILE", default="batch_results.jsonl",
+                        help="JSONL file for batch results; rerunning with the same file resumes the batch")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="number of cases analysed at the same time in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch_file(args.batch, args.output, args.concurrency)
+        raise SystemExit(0)
+
     user_input = (
         "A man broke into my house at night while my family was sleeping. "
         "He stole jewelry and cash from our bedroom. When I confronted him, "
@@ -20,4 +49,4 @@ if __name__ == "__main__":
         "but I'm not sure which legal charges should be filed under IPC."
     )
 
-    run(user_input)
+    run(user_input, resume=args.resume)
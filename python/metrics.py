@@ -0,0 +1,186 @@
+# metrics.py
+
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets: sub-millisecond vector
+# searches up to multi-minute crew runs
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# Trace ID of the request being served, set by the API for each request and job
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+
+def current_trace_id() -> str | None:
+    """Return the trace ID of the request this code runs on behalf of, if any."""
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id: str | None = None):
+    """
+    Run a block under a trace ID, generating one when none is given.
+
+    Threads started inside the block only see the trace ID when run through
+    contextvars.copy_context().run.
+    """
+    token = _trace_id.set(trace_id or uuid.uuid4().hex)
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+def set_trace_id(trace_id: str | None = None) -> str:
+    """Set the current trace ID without scoping it, e.g. for a web request; returns the ID."""
+    trace_id = trace_id or uuid.uuid4().hex
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"❌ Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[dict]:
+        """Current value of every series, as `labels` plus the metric's fields."""
+        with self._lock:
+            series = sorted(self._series.items())
+        return [{"labels": dict(zip(self.labelnames, key)), **self._sample(value)} for key, value in series]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(dict(zip(self.labelnames, key)), value))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing total, one per label combination."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _sample(self, value) -> dict:
+        return {"value": value}
+
+    def _render_series(self, labels: dict, value) -> list[str]:
+        return [f"{self.name}{_format_labels(labels)} {value}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, one per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            buckets, total, count = self._series.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    buckets[index] += 1
+            self._series[key] = (buckets, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _sample(self, value) -> dict:
+        _, total, count = value
+        return {"count": count, "sum": total}
+
+    def _render_series(self, labels: dict, value) -> list[str]:
+        buckets, total, count = value
+        lines = [
+            f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {bucket_count}"
+            for bound, bucket_count in zip(self.buckets, buckets)
+        ]
+        lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Process-wide set of metrics, rendered in the Prometheus text exposition format.
+
+    Metrics are created once, at import time of the module that records them, and
+    looked up by name, so re-importing a module never registers a duplicate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, cls, name: str, help_text: str, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, tuple(labelnames), **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def snapshot(self) -> dict:
+        """Current samples of every metric by name, e.g. to save alongside benchmark results."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.samples() for metric in metrics}
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
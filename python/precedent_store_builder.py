@@ -0,0 +1,60 @@
+# precedent_store_builder.py
+
+import os
+
+from dotenv import load_dotenv
+
+from tools.precedent_store import PrecedentStore, iter_judgments
+
+# Default for EMBEDDING_BATCH_SIZE
+DEFAULT_BATCH_SIZE = 64
+
+
+def build_precedent_store():
+    """
+    Build or incrementally update the local precedent store from a JSON Lines dump of judgments.
+
+    The dump is streamed, one batch of judgments at a time, so it never has to fit in
+    memory. Unless PRECEDENT_STORE_DENSE is false, each judgment is also embedded
+    with the same model as the IPC sections, for re-ranking full-text matches.
+    """
+    # Load environment variables
+    print("Loading environment variables...")
+    load_dotenv()
+    dump_path = os.getenv("PRECEDENT_DUMP_PATH")
+    store_path = os.getenv("PRECEDENT_STORE_PATH")
+    dense = os.getenv("PRECEDENT_STORE_DENSE", "true").lower() == "true"
+    batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+
+    print(f"PRECEDENT_DUMP_PATH: {dump_path}")
+    print(f"PRECEDENT_STORE_PATH: {store_path}")
+    print(f"PRECEDENT_STORE_DENSE: {dense}")
+    print(f"EMBEDDING_BATCH_SIZE: {batch_size}")
+
+    if not all([dump_path, store_path]):
+        raise EnvironmentError("❌ Missing one or more required environment variables.")
+
+    embed_documents, model_name = None, None
+    if dense:
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        embeddings = HuggingFaceEmbeddings(encode_kwargs={"batch_size": batch_size})
+        embed_documents, model_name = embeddings.embed_documents, embeddings.model_name
+
+    store = PrecedentStore(store_path, embed_documents=embed_documents, model_name=model_name)
+    stats = store.ingest(iter_judgments(dump_path), batch_size=batch_size, verbose=True)
+
+    print(
+        f"✅ Precedent store synced at '{store_path}': {stats['added']} added, {stats['updated']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['skipped']} skipped ({len(store)} judgments in total)"
+    )
+    print(f"Ingestion took {stats['total_seconds']:.1f}s ({stats['embed_seconds']:.1f}s embedding)")
+    store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("Starting precedent store build...")
+        build_precedent_store()
+    except Exception as e:
+        print(f"Error building precedent store: {str(e)}")
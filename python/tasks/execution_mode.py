@@ -0,0 +1,12 @@
+# execution_mode.py
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# When enabled, the IPC section and precedent research tasks both start as soon as
+# case intake finishes and run concurrently; the drafter waits for both to complete.
+# Set CREW_PARALLEL_RESEARCH=false to run all four tasks strictly in order.
+PARALLEL_RESEARCH = os.getenv("CREW_PARALLEL_RESEARCH", "true").lower() == "true"
@@ -3,10 +3,12 @@
 from crewai import Task
 from agents.ipc_section_agent import ipc_section_agent
 from tasks.case_intake_task import case_intake_task
+from tasks.execution_mode import PARALLEL_RESEARCH
 
 ipc_section_task = Task(
     agent=ipc_section_agent,
     context=[case_intake_task],
+    async_execution=PARALLEL_RESEARCH,
     description=(
         "You are provided with the structured legal context generated from the previous task.\n\n"
         "Your job is to identify and retrieve the most relevant sections from the Indian Penal Code (IPC) "
@@ -3,6 +3,7 @@
 from crewai import Task
 from agents.legal_precedent_agent import legal_precedent_agent
 from tasks.case_intake_task import case_intake_task
+from tasks.execution_mode import PARALLEL_RESEARCH
 from tasks.ipc_section_task import ipc_section_task
 
 legal_precedent_task = Task(
@@ -17,5 +18,8 @@ legal_precedent_task = Task(
     expected_output=(
         "A detailed paragraph summarizing the most relevant precedent cases and explaining their legal relevance to the current issue."
     ),
-    context=[case_intake_task, ipc_section_task]
+    # In parallel mode the precedent search only needs the intake summary, so it can
+    # run alongside the IPC section search instead of waiting for it
+    context=[case_intake_task] if PARALLEL_RESEARCH else [case_intake_task, ipc_section_task],
+    async_execution=PARALLEL_RESEARCH
 )
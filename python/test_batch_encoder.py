@@ -0,0 +1,41 @@
+# test_batch_encoder.py
+
+import sys
+
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from ipc_vectordb_builder import BatchEncoder
+
+TEXTS = [
+    "Section 378: Theft. Whoever, intending to take dishonestly any movable property...",
+    "Section 380: Theft in dwelling house, etc.",
+    "Section 415: Cheating. Whoever, by deceiving any person...",
+    "Section 304A: Causing death by negligence.",
+    "Section 499: Defamation.\nWhoever, by words either spoken or intended to be read...",
+]
+
+
+def main():
+    print("Starting multi-process batch encoder test...")
+
+    # batch_size in encode_kwargs is how ipc_vectordb_builder configures the model, and
+    # used to be passed to encode_multi_process a second time
+    embeddings = HuggingFaceEmbeddings(encode_kwargs={"batch_size": 2})
+
+    with BatchEncoder(embeddings, batch_size=2, workers=1) as encoder:
+        single_process = np.asarray(encoder.encode(TEXTS))
+
+    with BatchEncoder(embeddings, batch_size=2, workers=2) as encoder:
+        multi_process = np.asarray(encoder.encode(TEXTS))
+
+    print(f"Encoded {len(TEXTS)} texts with 1 and 2 workers, shape {multi_process.shape}")
+    if single_process.shape != multi_process.shape or not np.allclose(single_process, multi_process, atol=1e-5):
+        print("Multi-process embeddings differ from the single-process ones")
+        sys.exit(1)
+
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    main()
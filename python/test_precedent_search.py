@@ -0,0 +1,103 @@
+# test_precedent_search.py
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUERIES = [
+    "Home trespassing and theft - precedent cases in India",
+    "Cheating by impersonation - precedent cases in India",
+    "Criminal breach of trust by an employee - precedent cases in India",
+    "Causing death by negligence - precedent cases in India",
+]
+
+
+class TavilyStubHandler(BaseHTTPRequestHandler):
+    """Answers Tavily's /search endpoint with one indiankanoon.org result per request."""
+
+    # Keep-alive, like the real API, so clients reuse pooled connections
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        payload = json.dumps({
+            "query": body.get("query"),
+            "results": [{
+                "title": f"Result for {body.get('query')}",
+                "content": "The court held that the offence was made out.",
+                "url": "https://indiankanoon.org/doc/100000/"
+            }]
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_sync(tool, query: str) -> list[dict]:
+    # How CrewAI runs an async tool for a synchronous crew: a new event loop per call
+    return asyncio.run(tool.func(query))
+
+
+def main():
+    print("Starting precedent search test...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TavilyStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["TAVILY_API_KEY"] = "test-key"
+    os.environ["TAVILY_API_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["PRECEDENT_SOURCE"] = "tavily"
+    os.environ["PRECEDENT_CACHE_PATH"] = ""
+    os.environ["CONTEXT_COMPACTION"] = "false"
+
+    from tools.legal_precedent_search_tool import search_legal_precedents
+
+    failures = 0
+    try:
+        # Successive calls on the sync path, each on its own event loop
+        for query in QUERIES[:2]:
+            results = run_sync(search_legal_precedents, query)
+            if results[0]["title"] != f"Result for site:indiankanoon.org {query}":
+                failures += 1
+                print(f"✗ '{query}': {results}")
+            else:
+                print(f"✓ '{query}': {len(results)} result(s)")
+
+        # The parallel research tasks search from two threads, each with its own loop
+        errors = []
+
+        def search(query):
+            try:
+                run_sync(search_legal_precedents, query)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=search, args=(query,)) for query in QUERIES[2:]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            failures += 1
+            print(f"✗ Concurrent searches failed: {errors}")
+        else:
+            print("✓ Concurrent searches from two event loops succeeded")
+    finally:
+        server.shutdown()
+
+    if failures:
+        print(f"Precedent search test failed in {failures} cases")
+        sys.exit(1)
+
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# test_section_references.py
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from tools.ipc_lexical_index import BM25Index, reciprocal_rank_fusion, references_only, section_key
+from tools.ipc_retriever import REFERENCE_WEIGHT, IPCRetriever
+
+# (query, sections the lookup must resolve)
+REFERENCE_CASES = [
+    ("my neighbour's 2 dogs attacked my son", []),
+    ("the accused's 3 brothers beat me", []),
+    ("What does Section 420 say?", ["420"]),
+    ("charged under sections 379 and 380", ["379", "380"]),
+    ("booked u/s 379/411 IPC", ["379", "411"]),
+    ("sec. 304A and s. 279", ["304A", "279"]),
+    ("IPC 498A complaint", ["498A"]),
+    ("Section 420 and 3 others were arrested", ["420"]),
+    ("booked under section 302 or 10 years jail", ["302"]),
+    ("I filed under the IPC 2 weeks ago", []),
+    ("Sections 1 to 5", ["1", "2", "3", "4", "5"]),
+]
+
+# (query, whether it does nothing but name sections)
+REFERENCE_ONLY_CASES = [
+    ("Section 420", True),
+    ("u/s 379/411", True),
+    ("sections 379 and 380 of IPC", True),
+    ("What does Section 420 say about cheating?", False),
+    ("I filed under the IPC 2 weeks ago", False),
+]
+
+
+class NoEmbeddings:
+    """Stands in for the embedding model where a search must not embed."""
+
+    model_name = "none"
+
+    def embed_query(self, query):
+        raise AssertionError(f"embedded '{query}'")
+
+
+def sections(results: list[dict]) -> list[str]:
+    return [section_key(result["section"]) for result in results]
+
+
+def main():
+    print("Starting section reference test...")
+    ipc_json_path = Path(__file__).parent / "ipc.json"
+    with open(ipc_json_path, "r", encoding="utf-8") as file:
+        lexical_index = BM25Index(json.load(file))
+
+    failures = 0
+    for query, expected in REFERENCE_CASES:
+        found = sections(lexical_index.lookup_sections(query))
+        if found != expected:
+            failures += 1
+            print(f"✗ '{query}': expected {expected}, got {found}")
+        else:
+            print(f"✓ '{query}': {found}")
+
+    for query, expected in REFERENCE_ONLY_CASES:
+        if references_only(query) != expected:
+            failures += 1
+            print(f"✗ '{query}': references only should be {expected}")
+        else:
+            print(f"✓ '{query}': references only is {expected}")
+
+    # Queries that only name sections are answered without embedding, from a .jsonl corpus too
+    with open(ipc_json_path, "r", encoding="utf-8") as file:
+        entries = json.load(file)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jsonl_path = Path(temp_dir) / "ipc.jsonl"
+        jsonl_path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+        retriever = IPCRetriever(temp_dir, "ipc", ipc_json_path=str(jsonl_path))
+        retriever._embedding_function = NoEmbeddings()
+        try:
+            found = sections(retriever.search("u/s 379/411", k=3))
+        except AssertionError as e:
+            found = str(e)
+        if found != ["379", "411"]:
+            failures += 1
+            print(f"✗ section-only query did not take the lookup shortcut: {found}")
+        else:
+            print(f"✓ section-only query answered without embedding: {found}")
+
+    # A reference is boosted within the ranking, never a replacement for it
+    query = "my neighbour's 2 dogs attacked my son"
+    lexical = lexical_index.search(query, k=20)
+    fused = sections(reciprocal_rank_fusion(
+        [lexical_index.lookup_sections(query), lexical, lexical], k=3, weights=[REFERENCE_WEIGHT, 1.0, 1.0]
+    ))
+    if fused != sections(lexical[:3]):
+        failures += 1
+        print(f"✗ possessive query changed the ranking: {fused}")
+    else:
+        print(f"✓ possessive query keeps the lexical ranking: {fused}")
+
+    query = "theft of a bicycle, sections 379 and 380"
+    lexical = lexical_index.search(query, k=20)
+    fused = sections(reciprocal_rank_fusion(
+        [lexical_index.lookup_sections(query), lexical, lexical], k=4, weights=[REFERENCE_WEIGHT, 1.0, 1.0]
+    ))
+    if fused[:2] != ["379", "380"] or len(fused) != 4:
+        failures += 1
+        print(f"✗ listed sections are not both ranked first: {fused}")
+    else:
+        print(f"✓ listed sections lead the ranking: {fused}")
+
+    if failures:
+        print(f"Section reference test failed in {failures} cases")
+        sys.exit(1)
+
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    main()
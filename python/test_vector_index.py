@@ -0,0 +1,82 @@
+# test_vector_index.py
+
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from tools.ipc_vector_index import ChromaVectorIndex, NumpyVectorIndex
+
+QUERIES = [
+    "What is the IPC section for Theft?",
+    "A man broke into my house at night and stole jewelry",
+    "threatened me with a knife",
+    "cheating and dishonestly inducing delivery of property",
+    "criminal breach of trust by an employee",
+    "causing death by negligence",
+    "defamation of a person by spoken words",
+    "kidnapping a minor from lawful guardianship",
+]
+
+
+def main():
+    print("Starting NumPy vs Chroma index parity test...")
+    load_dotenv()
+
+    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
+    collection_name = os.getenv("IPC_COLLECTION_NAME", "ipc_collection")
+    if not persist_dir_path:
+        print("Error: 'PERSIST_DIRECTORY_PATH' is not set in .env")
+        sys.exit(1)
+
+    embeddings = HuggingFaceEmbeddings()
+    vector_db = Chroma(
+        collection_name=collection_name,
+        persist_directory=persist_dir_path,
+        embedding_function=embeddings
+    )
+
+    chroma_index = ChromaVectorIndex(vector_db)
+    numpy_index = NumpyVectorIndex.from_chroma(vector_db)
+    print(f"Loaded {len(numpy_index)} sections into the NumPy index")
+
+    top_k = 3
+    mismatches = 0
+    chroma_time = 0.0
+    numpy_time = 0.0
+
+    for query in QUERIES:
+        query_embedding = embeddings.embed_query(query)
+
+        start = time.perf_counter()
+        chroma_results = chroma_index.search(query_embedding, k=top_k)
+        chroma_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        numpy_results = numpy_index.search(query_embedding, k=top_k)
+        numpy_time += time.perf_counter() - start
+
+        chroma_sections = [r["section"] for r in chroma_results]
+        numpy_sections = [r["section"] for r in numpy_results]
+
+        if chroma_results != numpy_results:
+            mismatches += 1
+            print(f"✗ '{query}': chroma={chroma_sections} numpy={numpy_sections}")
+        else:
+            print(f"✓ '{query}': {numpy_sections}")
+
+    print(f"Average Chroma search: {chroma_time / len(QUERIES) * 1000:.3f} ms")
+    print(f"Average NumPy search: {numpy_time / len(QUERIES) * 1000:.3f} ms")
+
+    if mismatches:
+        print(f"Parity test failed for {mismatches} of {len(QUERIES)} queries")
+        sys.exit(1)
+
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    main()
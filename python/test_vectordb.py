@@ -5,10 +5,11 @@ import os
 import sys
 from pathlib import Path
 
-from langchain_community.docstore.document import Document
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from ipc_vectordb_builder import prepare_documents, sync_ipc_vectordb
+
 def main():
     print("Starting vector database creation test...")
     
@@ -40,18 +41,7 @@ def main():
     # Convert to documents
     print("Converting to documents...")
     try:
-        documents = [
-            Document(
-                page_content=f"Section {entry['Section']}: {entry['section_title']}\n\n{entry['section_desc']}",
-                metadata={
-                    "chapter": entry["chapter"],
-                    "chapter_title": entry["chapter_title"],
-                    "section": entry["Section"],
-                    "section_title": entry["section_title"]
-                }
-            )
-            for entry in ipc_data
-        ]
+        documents = prepare_documents(ipc_data)
         print(f"Created {len(documents)} document objects")
     except Exception as e:
         print(f"Error creating documents: {e}")
@@ -66,16 +56,21 @@ def main():
         print(f"Error initializing embeddings: {e}")
         sys.exit(1)
     
-    # Create vectorstore
-    print("Creating vectorstore...")
+    # Create or update vectorstore; re-running only embeds changed sections
+    print("Syncing vectorstore...")
     try:
-        vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=embeddings,
+        vectorstore = Chroma(
+            collection_name=collection_name,
             persist_directory=str(persist_dir_path),
-            collection_name=collection_name
+            embedding_function=embeddings
         )
-        print(f"Vectorstore successfully created in collection '{collection_name}' at '{persist_dir_path}'")
+        stats = sync_ipc_vectordb(vectorstore, documents)
+        print(f"Vectorstore successfully synced in collection '{collection_name}' at '{persist_dir_path}': {stats}")
+
+        stored = len(vectorstore.get()["ids"])
+        if stored != len(documents):
+            print(f"Error: expected {len(documents)} vectors in the collection, found {stored}")
+            sys.exit(1)
         
         # Test retrieval
         print("Testing retrieval...")
@@ -0,0 +1,462 @@
+# ipc_ann_index.py
+
+import json
+import os
+
+import numpy as np
+
+from tools.ipc_embedding_artifact import read_embedding_artifact
+from tools.ipc_vector_index import format_ipc_result
+
+# Index kinds selectable through IPC_INDEX_BACKEND / IPC_ANN_INDEX
+ANN_KINDS = ("ivf", "hnsw")
+
+QUANTIZATIONS = ("int8", "pq")
+
+# Rows scored per block, bounding the temporary float32 copy made while scanning codes
+SCAN_BLOCK_ROWS = 65536
+
+# Training sample per PQ subspace; 256 centroids of a few dimensions converge on far fewer points
+PQ_TRAINING_POINTS = 16384
+
+
+def _normalize(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 20, seed: int = 0,
+           max_training_points: int = 65536) -> np.ndarray:
+    """
+    Lloyd's k-means on a random sample of the data.
+
+    Args:
+        data (np.ndarray): Points, one per row.
+        k (int): Number of centroids.
+        iterations (int): Refinement passes.
+        seed (int): Seed for sampling and initialization, so builds are reproducible.
+        max_training_points (int): Sample size; centroids need far fewer points than the corpus.
+
+    Returns:
+        np.ndarray: float32 centroids, one per row.
+    """
+    rng = np.random.default_rng(seed)
+    if len(data) > max_training_points:
+        data = data[rng.choice(len(data), max_training_points, replace=False)]
+    data = np.asarray(data, dtype=np.float32)
+    k = min(k, len(data))
+
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    data_norms = (data ** 2).sum(axis=1)
+    for _ in range(iterations):
+        # Squared distances without materializing every difference vector
+        distances = data_norms[:, None] - 2 * data @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+        assignment = distances.argmin(axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        present = counts > 0
+        sums[present] = np.add.reduceat(data[order], np.cumsum(counts)[present] - counts[present])
+
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters on random points instead of leaving them dead
+        if empty.any():
+            centroids[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+    return centroids
+
+
+class ScalarQuantizer:
+    """
+    Symmetric per-dimension int8 quantization: 1 byte per dimension instead of 4.
+    """
+
+    def __init__(self, scale: np.ndarray | None = None):
+        self.scale = scale
+
+    def fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        scale = np.abs(vectors).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        self.scale = scale.astype(np.float32)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def scorer(self, query: np.ndarray):
+        """Return a function scoring a block of codes against the query by inner product."""
+        scaled_query = (query * self.scale).astype(np.float32)
+        return lambda codes: codes.astype(np.float32) @ scaled_query
+
+
+class ProductQuantizer:
+    """
+    Product quantization: each vector is split into `subspaces` chunks and every chunk is
+    replaced by the index of its nearest of 256 trained centroids, i.e. 1 byte per subspace.
+
+    Scores are computed by asymmetric distance: the query is kept in float32 and its inner
+    product with every centroid of every subspace is tabulated once per query, so scoring a
+    vector is `subspaces` table lookups.
+    """
+
+    def __init__(self, subspaces: int, codebooks: np.ndarray | None = None):
+        self.subspaces = subspaces
+        self.codebooks = codebooks
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        if vectors.shape[-1] % self.subspaces:
+            raise ValueError(
+                f"❌ Vector dimension {vectors.shape[-1]} is not divisible by {self.subspaces} PQ subspaces."
+            )
+        return vectors.reshape(*vectors.shape[:-1], self.subspaces, vectors.shape[-1] // self.subspaces)
+
+    def fit(self, vectors: np.ndarray, seed: int = 0) -> "ProductQuantizer":
+        chunks = self._split(vectors)
+        self.codebooks = np.stack([
+            kmeans(chunks[:, subspace], 256, seed=seed + subspace, max_training_points=PQ_TRAINING_POINTS)
+            for subspace in range(self.subspaces)
+        ])
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        chunks = self._split(vectors)
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for subspace in range(self.subspaces):
+            codebook = self.codebooks[subspace]
+            distances = (-2 * chunks[:, subspace] @ codebook.T) + (codebook ** 2).sum(axis=1)[None, :]
+            codes[:, subspace] = distances.argmin(axis=1)
+        return codes
+
+    def scorer(self, query: np.ndarray):
+        """Return a function scoring a block of codes against the query by inner product."""
+        table = np.einsum("sd,scd->sc", self._split(query), self.codebooks)
+        columns = np.arange(self.subspaces)
+        return lambda codes: table[columns, codes].sum(axis=1)
+
+
+class IVFIndex:
+    """
+    Inverted-file index over quantized vectors.
+
+    Vectors are L2-normalized and assigned to the nearest of `nlist` coarse centroids;
+    a query scores only the vectors in its `nprobe` nearest lists. More probes raise
+    recall and latency together, and nprobe == nlist scans everything. Each vector's residual
+    from its list centroid is stored as int8 codes (4x smaller than float32) or PQ codes
+    (`pq_subspaces` bytes each). With nlist=1 every query scans all codes, which isolates
+    the error of the quantization from that of the list pruning.
+    """
+
+    def __init__(self, nlist: int = 256, nprobe: int = 8, quantization: str = "int8", pq_subspaces: int = 48):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"❌ Unknown quantization '{quantization}'. Choose one of: {', '.join(QUANTIZATIONS)}")
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+
+        self.source = None
+        self.centroids = None
+        self.quantizer = None
+        self.codes = None
+        self.ids = None
+        self.offsets = None
+
+    def build(self, vectors) -> "IVFIndex":
+        """
+        Train the coarse centroids and quantizer on the vectors and encode them.
+
+        Args:
+            vectors: float vectors, one per row; may be a memory-mapped matrix.
+
+        Returns:
+            IVFIndex: The built index.
+        """
+        matrix = _normalize(vectors)
+        self.nlist = min(self.nlist, len(matrix))
+        self.centroids = _normalize(kmeans(matrix, self.nlist)) if self.nlist > 1 else np.zeros((1, matrix.shape[1]), np.float32)
+
+        assignment = np.zeros(len(matrix), dtype=np.int64)
+        if self.nlist > 1:
+            for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+                block = matrix[start:start + SCAN_BLOCK_ROWS]
+                assignment[start:start + len(block)] = (block @ self.centroids.T).argmax(axis=1)
+
+        # Store vectors grouped by list so each probed list is one contiguous slice
+        self.ids = np.argsort(assignment, kind="stable").astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=self.nlist))]).astype(np.int64)
+
+        # Quantize each vector's offset from its list centroid: residuals span a much smaller
+        # range than the vectors, so the same code size loses far less precision
+        residuals = matrix[self.ids] - self.centroids[assignment[self.ids]]
+        if self.quantization == "int8":
+            self.quantizer = ScalarQuantizer().fit(residuals)
+        else:
+            self.quantizer = ProductQuantizer(self.pq_subspaces).fit(residuals)
+        self.codes = self.quantizer.encode(residuals)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index, excluding section metadata and documents."""
+        quantizer_bytes = self.quantizer.scale.nbytes if self.quantization == "int8" else self.quantizer.codebooks.nbytes
+        return self.codes.nbytes + self.ids.nbytes + self.offsets.nbytes + self.centroids.nbytes + quantizer_bytes
+
+    def search(self, query_embedding, k: int = 3) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k vectors with the highest approximate cosine similarity.
+
+        Args:
+            query_embedding: Embedded query.
+            k (int): Number of results.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row ids of the results in the original vector order, and their scores.
+        """
+        query = _normalize(query_embedding)
+        nprobe = min(self.nprobe, self.nlist)
+        probes = np.argsort(-(self.centroids @ query))[:nprobe] if self.nlist > 1 else [0]
+
+        score = self.quantizer.scorer(query)
+        positions, scores = [], []
+        for probe in probes:
+            list_start, list_end = int(self.offsets[probe]), int(self.offsets[probe + 1])
+            for start in range(list_start, list_end, SCAN_BLOCK_ROWS):
+                end = min(start + SCAN_BLOCK_ROWS, list_end)
+                positions.append(np.arange(start, end))
+                # q·v = q·centroid + q·residual
+                scores.append(float(self.centroids[probe] @ query) + score(self.codes[start:end]))
+
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        positions = np.concatenate(positions)
+        scores = np.concatenate(scores)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return self.ids[positions[top]], scores[top]
+
+    def save(self, directory: str, prefix: str = "ipc_ivf"):
+        """Write the index as .npy arrays (codes can be memory-mapped) plus a JSON header naming its source."""
+        arrays = {"centroids": self.centroids, "codes": self.codes, "ids": self.ids, "offsets": self.offsets}
+        arrays["quantizer"] = self.quantizer.scale if self.quantization == "int8" else self.quantizer.codebooks
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{prefix}.{name}.npy"), array)
+        with open(os.path.join(directory, f"{prefix}.json"), "w", encoding="utf-8") as file:
+            json.dump({
+                "nlist": self.nlist,
+                "nprobe": self.nprobe,
+                "quantization": self.quantization,
+                "pq_subspaces": self.pq_subspaces,
+                "source": self.source
+            }, file)
+
+    @classmethod
+    def load(cls, directory: str, prefix: str = "ipc_ivf") -> "IVFIndex":
+        """Read an index written by save(), memory-mapping the codes."""
+        with open(os.path.join(directory, f"{prefix}.json"), "r", encoding="utf-8") as file:
+            header = json.load(file)
+
+        index = cls(header["nlist"], header["nprobe"], header["quantization"], header["pq_subspaces"])
+        index.source = header.get("source")
+        path = lambda name: os.path.join(directory, f"{prefix}.{name}.npy")
+        index.centroids = np.load(path("centroids"))
+        index.codes = np.load(path("codes"), mmap_mode="r")
+        index.ids = np.load(path("ids"))
+        index.offsets = np.load(path("offsets"))
+        quantizer = np.load(path("quantizer"))
+        if index.quantization == "int8":
+            index.quantizer = ScalarQuantizer(quantizer)
+        else:
+            index.quantizer = ProductQuantizer(index.pq_subspaces, quantizer)
+        return index
+
+
+class HNSWIndex:
+    """
+    Hierarchical navigable small world graph index, backed by the optional hnswlib package.
+
+    `m` is the number of graph links per vector and `ef_construction` the build-time
+    beam width; `ef_search`, the query-time beam width, trades recall for latency and
+    can be changed on a loaded index. Vectors are kept in float32 inside the graph.
+    """
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.source = None
+        self.graph = None
+        self.dimension = None
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("❌ The 'hnsw' index needs hnswlib. Install it with: pip install hnswlib")
+        return hnswlib
+
+    def build(self, vectors) -> "HNSWIndex":
+        hnswlib = self._hnswlib()
+        matrix = _normalize(vectors)
+        self.dimension = matrix.shape[1]
+        self.graph = hnswlib.Index(space="ip", dim=self.dimension)
+        self.graph.init_index(max_elements=len(matrix), ef_construction=self.ef_construction, M=self.m)
+        for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+            block = matrix[start:start + SCAN_BLOCK_ROWS]
+            self.graph.add_items(block, np.arange(start, start + len(block)))
+        self.graph.set_ef(self.ef_search)
+        return self
+
+    def __len__(self) -> int:
+        return self.graph.get_current_count()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate graph memory: the float32 vectors plus 2*m level-0 links of 4 bytes each."""
+        return len(self) * (self.dimension * 4 + self.m * 2 * 4)
+
+    def search(self, query_embedding, k: int = 3) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        self.graph.set_ef(max(self.ef_search, k))
+        labels, distances = self.graph.knn_query(_normalize(query_embedding), k=k)
+        # The inner-product space reports 1 - similarity as the distance
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+    def save(self, directory: str, prefix: str = "ipc_hnsw"):
+        self.graph.save_index(os.path.join(directory, f"{prefix}.bin"))
+        with open(os.path.join(directory, f"{prefix}.json"), "w", encoding="utf-8") as file:
+            json.dump({
+                "m": self.m,
+                "ef_construction": self.ef_construction,
+                "ef_search": self.ef_search,
+                "dimension": self.dimension,
+                "source": self.source
+            }, file)
+
+    @classmethod
+    def load(cls, directory: str, prefix: str = "ipc_hnsw") -> "HNSWIndex":
+        hnswlib = cls._hnswlib()
+        with open(os.path.join(directory, f"{prefix}.json"), "r", encoding="utf-8") as file:
+            header = json.load(file)
+
+        index = cls(header["m"], header["ef_construction"], header["ef_search"])
+        index.dimension = header["dimension"]
+        index.source = header.get("source")
+        index.graph = hnswlib.Index(space="ip", dim=index.dimension)
+        index.graph.load_index(os.path.join(directory, f"{prefix}.bin"))
+        index.graph.set_ef(index.ef_search)
+        return index
+
+
+ANN_INDEX_CLASSES = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+class ApproximateVectorIndex:
+    """
+    Index backend that answers searches from an IVF or HNSW index and returns IPC sections.
+
+    With `rerank` set and the full-precision embeddings at hand, the approximate index
+    fetches k * rerank candidates and they are re-scored exactly, recovering most of the
+    ranking precision lost to quantization for the cost of reading a few vectors.
+    """
+
+    def __init__(self, ann, metadatas: list[dict], documents: list[str], embeddings=None, rerank: int = 0):
+        self.ann = ann
+        self.metadatas = metadatas
+        self.documents = documents
+        self.embeddings = embeddings
+        self.rerank = rerank if embeddings is not None else 0
+
+    def __len__(self) -> int:
+        return len(self.ann)
+
+    def search(self, query_embedding: list[float], k: int = 3) -> list[dict]:
+        """
+        Return the k sections the approximate index ranks closest to the query embedding.
+
+        Args:
+            query_embedding (list[float]): Embedded user query.
+            k (int): Number of sections to return.
+
+        Returns:
+            list[dict]: List of matching IPC sections with metadata and content.
+        """
+        if not self.rerank:
+            ids, _ = self.ann.search(query_embedding, k=k)
+        else:
+            candidates, _ = self.ann.search(query_embedding, k=k * self.rerank)
+            # Fancy indexing wants sorted rows to read the memory map sequentially
+            candidates = np.sort(candidates)
+            scores = np.asarray(self.embeddings[candidates], dtype=np.float32) @ _normalize(query_embedding)
+            ids = candidates[np.argsort(-scores)[:k]]
+        return [format_ipc_result(self.metadatas[i], self.documents[i]) for i in ids]
+
+
+def build_ann_index(artifact_dir: str, kind: str, **params):
+    """
+    Build an approximate index over an embedding artifact and save it next to the artifact.
+
+    The saved index records which artifact it was built from, so it is refused once
+    the artifact is rebuilt without it.
+
+    Args:
+        artifact_dir (str): Directory holding the embedding artifact.
+        kind (str): "ivf" or "hnsw".
+        **params: Constructor parameters of the index class, e.g. nlist and quantization.
+
+    Returns:
+        IVFIndex | HNSWIndex: The built index.
+    """
+    if kind not in ANN_INDEX_CLASSES:
+        raise ValueError(f"❌ Unknown approximate index '{kind}'. Choose one of: {', '.join(ANN_KINDS)}")
+
+    matrix, _, _, sidecar = read_embedding_artifact(artifact_dir)
+    index = ANN_INDEX_CLASSES[kind](**params).build(matrix)
+    index.source = sidecar.get("artifact_id")
+    index.save(artifact_dir)
+    return index
+
+
+def load_ann_index(artifact_dir: str, kind: str, model_name: str, ipc_json_path: str | None = None,
+                   rerank: int = 0, **search_params) -> ApproximateVectorIndex:
+    """
+    Load a saved approximate index together with the artifact it was built from.
+
+    Args:
+        artifact_dir (str): Directory holding the embedding artifact and the saved index.
+        kind (str): "ivf" or "hnsw".
+        model_name (str): Embedding model that will embed queries against the artifact.
+        ipc_json_path (str | None): Current IPC JSON file; when given, its hash must match the artifact.
+        rerank (int): Candidates fetched per result and re-scored exactly; 0 disables re-ranking.
+        **search_params: Query-time overrides, i.e. nprobe for IVF and ef_search for HNSW.
+
+    Returns:
+        ApproximateVectorIndex: Index answering searches with IPC sections.
+
+    Raises:
+        ValueError: If the artifact is stale, or the index was built from a different artifact.
+        FileNotFoundError: If no index of this kind was saved.
+        ImportError: If an HNSW index is requested without hnswlib installed.
+    """
+    if kind not in ANN_INDEX_CLASSES:
+        raise ValueError(f"❌ Unknown approximate index '{kind}'. Choose one of: {', '.join(ANN_KINDS)}")
+
+    matrix, metadatas, documents, sidecar = read_embedding_artifact(artifact_dir, model_name, ipc_json_path)
+    ann = ANN_INDEX_CLASSES[kind].load(artifact_dir)
+    if ann.source is None or ann.source != sidecar.get("artifact_id"):
+        raise ValueError(
+            f"❌ The saved {kind} index was built from an older embedding artifact. Rebuild it with ipc_vectordb_builder.py."
+        )
+
+    for name, value in search_params.items():
+        # Options of the other index kind are ignored, so one settings dict serves both
+        if value is not None and hasattr(ann, name):
+            setattr(ann, name, value)
+    return ApproximateVectorIndex(ann, metadatas, documents, embeddings=matrix, rerank=rerank)
@@ -0,0 +1,263 @@
+# ipc_embedding_artifact.py
+
+import hashlib
+import json
+import mmap
+import os
+import time
+import uuid
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from tools.ipc_vector_index import NumpyVectorIndex
+
+# Bump whenever the on-disk layout changes; older artifacts are refused at load time
+ARTIFACT_FORMAT_VERSION = 2
+
+EMBEDDINGS_FILE = "ipc_embeddings.npy"
+METADATA_FILE = "ipc_embeddings.meta.json"
+# One JSON line per row with its metadata and document, and the byte offset of every line
+RECORDS_FILE = "ipc_embeddings.records.jsonl"
+OFFSETS_FILE = "ipc_embeddings.offsets.npy"
+
+METADATA_FIELDS = ("section", "section_title", "chapter", "chapter_title")
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Hash a file in chunks.
+
+    Args:
+        file_path (str): Path to the file to hash.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _normalize(embeddings) -> np.ndarray:
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ArtifactRecords:
+    """
+    Row-addressable, read-only view of an artifact's metadata and documents.
+
+    The records file and its offsets are memory-mapped, so worker processes share them
+    through the page cache like the matrix, and a row is only decoded when it is read.
+    `metadatas` and `documents` are sequences over the same rows, indexable like lists.
+    """
+
+    def __init__(self, records_path: str, offsets_path: str):
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        with open(records_path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metadatas = _RecordField(self, "metadata")
+        self.documents = _RecordField(self, "document")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> dict:
+        if not -len(self) <= index < len(self):
+            raise IndexError("artifact record index out of range")
+        index %= len(self)
+        return json.loads(self._data[int(self.offsets[index]):int(self.offsets[index + 1])])
+
+
+class _RecordField(Sequence):
+    def __init__(self, records: ArtifactRecords, field: str):
+        self._records = records
+        self._field = field
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._records[int(index)][self._field]
+
+
+def write_embedding_artifact(artifact_dir: str, batches: Iterable[tuple], count: int,
+                             model_name: str, ipc_json_path: str):
+    """
+    Stream batches of embeddings into a normalized float32 matrix, its records and a header sidecar.
+
+    The matrix is stored as a plain .npy file so it can be memory-mapped and shared
+    through the page cache by every worker process. It is filled batch by batch
+    through a writable memory map, and each row's metadata and document are appended
+    to a JSON Lines records file with their byte offsets in a second .npy file, so
+    only one batch is held in memory. The sidecar holds header fields only and is
+    written last, so a half-written artifact is never picked up.
+
+    Args:
+        artifact_dir (str): Directory to write the artifact into.
+        batches (Iterable[tuple]): (embeddings, metadatas, documents) tuples, in order.
+        count (int): Total number of documents across all batches.
+        model_name (str): Name of the embedding model that produced the vectors.
+        ipc_json_path (str): Source IPC JSON file, hashed so stale artifacts can be detected.
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+    embeddings_path = os.path.join(artifact_dir, EMBEDDINGS_FILE)
+    metadata_path = os.path.join(artifact_dir, METADATA_FILE)
+
+    # Remove the old sidecar first so readers never pair it with a new matrix
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    records_path = os.path.join(artifact_dir, RECORDS_FILE)
+    offsets_path = os.path.join(artifact_dir, OFFSETS_FILE)
+    tmp_embeddings_path = embeddings_path + ".tmp"
+    tmp_records_path = records_path + ".tmp"
+    tmp_offsets_path = offsets_path + ".tmp"
+    matrix = None
+    offset = 0
+    offsets = np.lib.format.open_memmap(tmp_offsets_path, mode="w+", dtype=np.int64, shape=(count + 1,))
+    with open(tmp_records_path, "wb") as records:
+        for embeddings, metadatas, documents in batches:
+            vectors = _normalize(embeddings)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    tmp_embeddings_path, mode="w+", dtype=np.float32, shape=(count, vectors.shape[1])
+                )
+            if offset + len(vectors) > count:
+                raise ValueError(f"❌ Received more than the expected {count} embeddings.")
+
+            matrix[offset:offset + len(vectors)] = vectors
+            for row, (metadata, document) in enumerate(zip(metadatas, documents), start=offset):
+                record = {"metadata": {field: metadata.get(field) for field in METADATA_FIELDS}, "document": document}
+                records.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                offsets[row + 1] = records.tell()
+            offset += len(vectors)
+
+    if matrix is None or offset != count:
+        raise ValueError(f"❌ Expected {count} embeddings for the artifact, received {offset}.")
+
+    dimension = int(matrix.shape[1])
+    matrix.flush()
+    offsets.flush()
+    del matrix, offsets
+    os.replace(tmp_embeddings_path, embeddings_path)
+    os.replace(tmp_records_path, records_path)
+    os.replace(tmp_offsets_path, offsets_path)
+
+    sidecar = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "model_name": model_name,
+        "dimension": dimension,
+        "count": count,
+        "ipc_json_sha256": file_sha256(ipc_json_path),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        # Identifies this build, so indexes derived from the artifact can detect a rebuild
+        "artifact_id": uuid.uuid4().hex,
+        "metadata_fields": list(METADATA_FIELDS)
+    }
+
+    tmp_metadata_path = metadata_path + ".tmp"
+    with open(tmp_metadata_path, "w", encoding="utf-8") as file:
+        json.dump(sidecar, file, ensure_ascii=False)
+    os.replace(tmp_metadata_path, metadata_path)
+
+
+def save_embedding_artifact(artifact_dir: str, embeddings, metadatas: list[dict], documents: list[str],
+                            model_name: str, ipc_json_path: str):
+    """
+    Write an in-memory set of embeddings as an artifact in one batch.
+
+    Args:
+        artifact_dir (str): Directory to write the artifact into.
+        embeddings: One embedding per document.
+        metadatas (list[dict]): Section metadata for each document.
+        documents (list[str]): Embedded text for each document.
+        model_name (str): Name of the embedding model that produced the vectors.
+        ipc_json_path (str): Source IPC JSON file, hashed so stale artifacts can be detected.
+    """
+    write_embedding_artifact(
+        artifact_dir,
+        [(embeddings, metadatas, documents)],
+        count=len(documents),
+        model_name=model_name,
+        ipc_json_path=ipc_json_path
+    )
+
+
+def artifact_exists(artifact_dir: str) -> bool:
+    """Check whether a complete artifact is present in the directory."""
+    return os.path.exists(os.path.join(artifact_dir, METADATA_FILE))
+
+
+def read_embedding_artifact(artifact_dir: str, model_name: str | None = None,
+                            ipc_json_path: str | None = None) -> tuple[np.ndarray, Sequence, Sequence, dict]:
+    """
+    Validate a precomputed embedding artifact and memory-map its matrix and records.
+
+    Args:
+        artifact_dir (str): Directory written by save_embedding_artifact.
+        model_name (str | None): Embedding model that will embed queries against the artifact; checked when given.
+        ipc_json_path (str | None): Current IPC JSON file; when given, its hash must match the artifact.
+
+    Returns:
+        tuple[np.ndarray, Sequence, Sequence, dict]: The read-only memory-mapped matrix,
+        sequences of each row's metadata and document (see ArtifactRecords), and the sidecar.
+
+    Raises:
+        ValueError: If the artifact is stale or was produced by a different model or format.
+    """
+    with open(os.path.join(artifact_dir, METADATA_FILE), "r", encoding="utf-8") as file:
+        sidecar = json.load(file)
+
+    if sidecar.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"❌ Embedding artifact format {sidecar.get('format_version')} is not supported "
+            f"(expected {ARTIFACT_FORMAT_VERSION}). Rebuild it with ipc_vectordb_builder.py."
+        )
+
+    if model_name and sidecar.get("model_name") != model_name:
+        raise ValueError(
+            f"❌ Embedding artifact was built with '{sidecar.get('model_name')}' but queries use '{model_name}'."
+        )
+
+    if ipc_json_path and sidecar.get("ipc_json_sha256") != file_sha256(ipc_json_path):
+        raise ValueError(f"❌ Embedding artifact is stale: '{ipc_json_path}' changed since it was built.")
+
+    matrix = np.load(os.path.join(artifact_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    if matrix.shape != (sidecar["count"], sidecar["dimension"]):
+        raise ValueError(
+            f"❌ Embedding artifact shape {matrix.shape} does not match its sidecar "
+            f"({sidecar['count']}, {sidecar['dimension']})."
+        )
+
+    records = ArtifactRecords(os.path.join(artifact_dir, RECORDS_FILE), os.path.join(artifact_dir, OFFSETS_FILE))
+    if len(records) != sidecar["count"]:
+        raise ValueError(f"❌ Embedding artifact has {len(records)} records but its sidecar expects {sidecar['count']}.")
+
+    return matrix, records.metadatas, records.documents, sidecar
+
+
+def load_embedding_artifact(artifact_dir: str, model_name: str, ipc_json_path: str | None = None) -> NumpyVectorIndex:
+    """
+    Memory-map a precomputed embedding artifact into a NumPy index.
+
+    Args:
+        artifact_dir (str): Directory written by save_embedding_artifact.
+        model_name (str): Embedding model that will embed queries against the artifact.
+        ipc_json_path (str | None): Current IPC JSON file; when given, its hash must match the artifact.
+
+    Returns:
+        NumpyVectorIndex: Index backed by the read-only memory-mapped matrix.
+
+    Raises:
+        ValueError: If the artifact is stale or was produced by a different model or format.
+    """
+    matrix, metadatas, documents, _ = read_embedding_artifact(artifact_dir, model_name, ipc_json_path)
+    return NumpyVectorIndex(matrix, metadatas, documents, normalized=True)
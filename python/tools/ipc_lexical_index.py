@@ -0,0 +1,215 @@
+# ipc_lexical_index.py
+
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Matches explicit references such as "Section 420", "sec. 304A", "s. 379", "u/s 379/411",
+# "IPC 498A", "sections 379 and 380" or "sections 1 to 5". A bare "s" only counts with its
+# dot, so possessives like "neighbour's 2 dogs" are not read as references. The word after
+# the numbers is captured without being consumed, so counts can be told apart from sections.
+SECTION_REFERENCE_PATTERN = re.compile(
+    r"(?:\bsections?\b\.?|\bsec\.|\bs\.|\bu/s\b\.?|\bipc\b)\s*"
+    r"(?P<numbers>\d{1,3}[a-z]{0,2}\b(?:\s*(?:,|/|&|-|\band\b|\bor\b|\bto\b)\s*\d{1,3}[a-z]{0,2}\b)*)"
+    r"(?=(?:[\s-]+(?P<next>[a-z]+))?)",
+    re.IGNORECASE
+)
+REFERENCE_ITEM_PATTERN = re.compile(r"(?:(,|/|&|-|\band\b|\bor\b|\bto\b)\s*)?(\d{1,3}[a-z]{0,2})", re.IGNORECASE)
+
+# Separators that join the ends of a range of sections
+RANGE_SEPARATORS = {"-", "to"}
+
+# Most sections one range reference expands to; longer ranges keep only their ends
+MAX_RANGE_SECTIONS = 25
+
+# Words that show the number before them counts something rather than naming a section,
+# as in "section 302 or 10 years" or "section 420 and 3 others"
+COUNT_WORDS = {
+    "year", "years", "yr", "yrs", "month", "months", "week", "weeks", "day", "days", "hour", "hours",
+    "hrs", "minute", "minutes", "time", "times", "other", "others", "people", "persons", "person",
+    "men", "women", "children", "accused", "lakh", "lakhs", "crore", "crores", "rupees", "rs",
+    "km", "kg", "am", "pm"
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "he", "her", "his",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "she", "that", "the", "their",
+    "them", "there", "they", "this", "to", "was", "we", "were", "what", "which", "who",
+    "whoever", "will", "with", "shall", "any", "such", "under", "ipc", "section", "sections"
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase alphanumeric terms, dropping stopwords.
+
+    Hyphenated words are split too, so "house-breaking" matches "house breaking".
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        list[str]: Search terms in order of appearance.
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def section_key(section) -> str:
+    """Normalize a section number such as 304 or "304a" to a lookup key like "304A"."""
+    return str(section).strip().upper()
+
+
+def section_references(query: str) -> list[tuple[str, str]]:
+    """
+    Find the explicit section references in a query, in the order they appear.
+
+    A number followed by a counted noun ("10 years", "3 others") is not a reference.
+
+    Args:
+        query (str): User query, e.g. "booked u/s 379/411 IPC" or "sections 1 to 5".
+
+    Returns:
+        list[tuple[str, str]]: First and last section key of each reference; equal unless it is a range.
+    """
+    references = []
+    for match in SECTION_REFERENCE_PATTERN.finditer(query):
+        items = REFERENCE_ITEM_PATTERN.findall(match.group("numbers"))
+        if (match.group("next") or "").lower() in COUNT_WORDS:
+            items = items[:-1]
+        for position, (separator, number) in enumerate(items):
+            if position and separator.lower() in RANGE_SEPARATORS:
+                references[-1] = (references[-1][0], section_key(number))
+            else:
+                references.append((section_key(number), section_key(number)))
+    return references
+
+
+def references_only(query: str) -> bool:
+    """Whether the query does nothing but name sections, like "Section 420" or "u/s 379/411 IPC"."""
+    return bool(section_references(query)) and not tokenize(SECTION_REFERENCE_PATTERN.sub(" ", query))
+
+
+def _section_number(key: str) -> int:
+    return int(re.match(r"\d+", key).group())
+
+
+def format_ipc_entry(entry: dict) -> dict:
+    """
+    Shape a raw ipc.json entry the way search_ipc_sections returns it.
+
+    Args:
+        entry (dict): One entry from ipc.json.
+
+    Returns:
+        dict: IPC section with metadata and content.
+    """
+    return {
+        "section": entry["Section"],
+        "section_title": entry["section_title"],
+        "chapter": entry["chapter"],
+        "chapter_title": entry["chapter_title"],
+        "content": f"Section {entry['Section']}: {entry['section_title']}\n\n{entry['section_desc']}"
+    }
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over section titles and descriptions from ipc.json.
+
+    Section titles are counted twice so that a query naming the offence ("house-breaking
+    by night") ranks the section defining it above sections that only mention it.
+    """
+
+    def __init__(self, ipc_data: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.entries = ipc_data
+        self.k1 = k1
+        self.b = b
+
+        self.by_section = {section_key(entry["Section"]): entry for entry in ipc_data}
+
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        for doc_index, entry in enumerate(ipc_data):
+            terms = tokenize(entry["section_title"]) * 2 + tokenize(entry["section_desc"])
+            self.doc_lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self.postings[term].append((doc_index, frequency))
+
+        doc_count = len(ipc_data)
+        self.avg_doc_length = sum(self.doc_lengths) / doc_count if doc_count else 0.0
+        self.idf = {
+            term: math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 3) -> list[dict]:
+        """
+        Return the k sections with the highest BM25 score for the query.
+
+        Args:
+            query (str): User query in natural language.
+            k (int): Number of sections to return.
+
+        Returns:
+            list[dict]: List of matching IPC sections with metadata and content.
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_index, frequency in self.postings[term]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_doc_length
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [format_ipc_entry(self.entries[doc_index]) for doc_index, _ in ranked]
+
+    def lookup_sections(self, query: str) -> list[dict]:
+        """
+        Resolve explicit section references in the query, in the order they appear.
+
+        Args:
+            query (str): User query, e.g. "What do sections 379 and 380 say?".
+
+        Returns:
+            list[dict]: The referenced IPC sections that exist, ranges expanded; unknown numbers are ignored.
+        """
+        keys = {}
+        for first, last in section_references(query):
+            if first == last:
+                keys[first] = None
+                continue
+            low, high = _section_number(first), _section_number(last)
+            in_range = [key for key in self.by_section if low <= _section_number(key) <= high]
+            for key in in_range if len(in_range) <= MAX_RANGE_SECTIONS else [first, last]:
+                keys[key] = None
+        return [format_ipc_entry(self.by_section[key]) for key in keys if key in self.by_section]
+
+
+def reciprocal_rank_fusion(result_lists: list[list[dict]], k: int = 3, rrf_k: int = 60,
+                           weights: list[float] | None = None) -> list[dict]:
+    """
+    Merge ranked result lists with reciprocal rank fusion.
+
+    Args:
+        result_lists (list[list[dict]]): Ranked IPC results from each retriever.
+        k (int): Number of fused results to return.
+        rrf_k (int): Damping constant; larger values flatten the contribution of top ranks.
+        weights (list[float] | None): Multiplier for each list's contributions; 1 for every list by default.
+
+    Returns:
+        list[dict]: The k sections with the highest fused score.
+    """
+    scores = defaultdict(float)
+    results = {}
+    for result_list, weight in zip(result_lists, weights or [1.0] * len(result_lists)):
+        for rank, result in enumerate(result_list):
+            key = section_key(result["section"])
+            scores[key] += weight / (rrf_k + rank + 1)
+            results.setdefault(key, result)
+
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+    return [results[key] for key in ranked]
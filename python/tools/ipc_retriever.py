@@ -0,0 +1,350 @@
+# ipc_retriever.py
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from metrics import REGISTRY
+from tools.ipc_ann_index import ANN_KINDS, load_ann_index
+from tools.ipc_embedding_artifact import artifact_exists, load_embedding_artifact
+from tools.ipc_lexical_index import BM25Index, reciprocal_rank_fusion, references_only
+from tools.ipc_vector_index import ChromaVectorIndex, NumpyVectorIndex
+
+logger = logging.getLogger(__name__)
+
+# Index backends selectable through IPC_INDEX_BACKEND
+INDEX_BACKENDS = ("numpy", "chroma") + ANN_KINDS
+
+# Number of dense and lexical candidates fused per query in hybrid mode
+HYBRID_CANDIDATES = 20
+
+# Weight of explicitly referenced sections in the fusion; above the dense and lexical
+# lists combined, so sections the query names outrank every other candidate
+REFERENCE_WEIGHT = 3.0
+
+# Number of recent query embeddings kept per retriever
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+load_dotenv()
+
+# Embedding is CPU-bound, so async callers run it here rather than on the event loop.
+# Threads start on first use, so the pool is safe to create before a server forks.
+_embedding_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMBEDDING_THREADS", 2)), thread_name_prefix="embedding"
+)
+
+SEARCH_SECONDS = REGISTRY.histogram(
+    "lexora_ipc_search_seconds",
+    "Time spent in each phase of an IPC section search (embed, vector, lexical, total).",
+    ("phase",)
+)
+
+
+class IPCRetriever:
+    """
+    Long-lived retriever over the IPC vector database.
+
+    The embedding model and the search index are loaded once, on first use, and
+    shared by every caller in the process. With the numpy backend, a precomputed
+    embedding artifact is memory-mapped when available; otherwise the vectors are
+    copied out of the Chroma collection. Loading and reloading are guarded by a
+    lock so that concurrent Flask worker threads never build duplicate copies.
+
+    The "ivf" and "hnsw" backends load an approximate index saved next to the
+    artifact by ipc_vectordb_builder.py, for corpora too large to scan exactly;
+    `ann_options` tunes them at query time (nprobe, ef_search, rerank). When no
+    usable index is saved, they fall back to the exact numpy backend.
+
+    In hybrid mode (the default when ipc.json is available) a BM25 index over the
+    section titles and descriptions is fused with the dense results, and sections
+    the query names explicitly are boosted to the top of the fusion. Queries that do
+    nothing but name sections ("Section 420", "u/s 379/411") are answered from the
+    lookup without embedding.
+    """
+
+    def __init__(self, persist_dir_path: str, collection_name: str, backend: str = "numpy",
+                 artifact_dir: str | None = None, ipc_json_path: str | None = None, hybrid: bool = True,
+                 ann_options: dict | None = None):
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"❌ Unknown IPC index backend '{backend}'. Choose one of: {', '.join(INDEX_BACKENDS)}")
+
+        self.persist_dir_path = persist_dir_path
+        self.collection_name = collection_name
+        self.backend = backend
+        self.artifact_dir = artifact_dir
+        self.ipc_json_path = ipc_json_path
+        self.hybrid = hybrid and bool(ipc_json_path)
+        self.ann_options = ann_options or {}
+        self._lock = threading.Lock()
+        self._embedding_function = None
+        self._index = None
+        self._lexical_index = None
+        self._query_embeddings = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
+
+    @property
+    def embedding_function(self) -> HuggingFaceEmbeddings:
+        """The shared embedding model, loaded on first access."""
+        if self._embedding_function is None:
+            with self._lock:
+                if self._embedding_function is None:
+                    self._embedding_function = HuggingFaceEmbeddings()
+        return self._embedding_function
+
+    @property
+    def index(self):
+        """The shared search index for the configured backend, loaded on first access."""
+        if self._index is None:
+            embedding_function = self.embedding_function
+            with self._lock:
+                if self._index is None:
+                    index = self._load_artifact_index(embedding_function)
+                    self._index = index if index is not None else self._load_chroma_index(embedding_function)
+        return self._index
+
+    def preload(self) -> bool:
+        """
+        Load everything that is safe to share with forked worker processes.
+
+        That is the embedding model, the BM25 index and a search index backed by the
+        memory-mapped embedding artifact. Chroma keeps a SQLite connection open, which
+        must not be inherited across a fork, so an index that would come from the
+        Chroma collection is left for each worker to load on first use.
+
+        Returns:
+            bool: Whether the search index was loaded.
+        """
+        embedding_function = self.embedding_function
+        self.lexical_index
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load_artifact_index(embedding_function)
+        return self._index is not None
+
+    @property
+    def lexical_index(self) -> BM25Index | None:
+        """The shared BM25 index over the IPC corpus (.json or .jsonl), or None when hybrid search is off."""
+        if not self.hybrid:
+            return None
+        if self._lexical_index is None:
+            with self._lock:
+                if self._lexical_index is None:
+                    from ipc_vectordb_builder import iter_ipc_data
+
+                    self._lexical_index = BM25Index(list(iter_ipc_data(self.ipc_json_path)))
+        return self._lexical_index
+
+    def _load_artifact_index(self, embedding_function: HuggingFaceEmbeddings):
+        """The index for the configured backend built from the embedding artifact, or None if there is no usable one."""
+        if self.backend in ANN_KINDS and self.artifact_dir and artifact_exists(self.artifact_dir):
+            try:
+                return load_ann_index(
+                    self.artifact_dir,
+                    self.backend,
+                    model_name=embedding_function.model_name,
+                    ipc_json_path=self.ipc_json_path,
+                    **self.ann_options
+                )
+            except (ValueError, ImportError, FileNotFoundError) as e:
+                logger.warning(f"Cannot use the {self.backend} index, falling back to exact search: {e}")
+
+        if self.backend != "chroma" and self.artifact_dir and artifact_exists(self.artifact_dir):
+            try:
+                return load_embedding_artifact(
+                    self.artifact_dir,
+                    model_name=embedding_function.model_name,
+                    ipc_json_path=self.ipc_json_path
+                )
+            except ValueError as e:
+                logger.warning(f"Refusing embedding artifact, falling back to the Chroma collection: {e}")
+        return None
+
+    def _load_chroma_index(self, embedding_function: HuggingFaceEmbeddings):
+        vector_db = Chroma(
+            collection_name=self.collection_name,
+            persist_directory=self.persist_dir_path,
+            embedding_function=embedding_function
+        )
+
+        if self.backend == "chroma":
+            return ChromaVectorIndex(vector_db)
+
+        # Copy the stored vectors into memory once; queries never touch SQLite afterwards
+        return NumpyVectorIndex.from_chroma(vector_db)
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Embed a query, reusing the embedding of a recently seen identical query.
+
+        Args:
+            query (str): Text to embed.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(query)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+                return embedding
+
+        embedding = self.embedding_function.embed_query(query)
+        self._remember_embeddings({query: embedding})
+        return embedding
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """
+        Embed many queries in a single batched model call.
+
+        Results are kept in the query embedding cache, so later searches or cache
+        lookups for the same texts do not run the model again.
+
+        Args:
+            queries (list[str]): Texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding per query, in order.
+        """
+        with self._query_embeddings_lock:
+            known = {query: self._query_embeddings[query] for query in queries if query in self._query_embeddings}
+
+        missing = [query for query in dict.fromkeys(queries) if query not in known]
+        if missing:
+            computed = dict(zip(missing, self.embedding_function.embed_documents(missing)))
+            self._remember_embeddings(computed)
+            known.update(computed)
+
+        return [known[query] for query in queries]
+
+    def _remember_embeddings(self, embeddings: dict):
+        with self._query_embeddings_lock:
+            for query, embedding in embeddings.items():
+                self._query_embeddings[query] = embedding
+                self._query_embeddings.move_to_end(query)
+            while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+
+    def search(self, query: str, k: int = 3) -> list[dict]:
+        """
+        Search the IPC index for sections relevant to the query.
+
+        Args:
+            query (str): User query in natural language.
+            k (int): Number of sections to return.
+
+        Returns:
+            list[dict]: List of matching IPC sections with metadata and content.
+        """
+        with SEARCH_SECONDS.time(phase="total"):
+            lexical_index = self.lexical_index
+            if lexical_index is not None and references_only(query):
+                # Nothing to rank beyond the sections named, so skip embedding altogether
+                with SEARCH_SECONDS.time(phase="lexical"):
+                    referenced = lexical_index.lookup_sections(query)
+                if referenced:
+                    return referenced
+
+            index = self.index
+            with SEARCH_SECONDS.time(phase="embed"):
+                query_embedding = self.embed_query(query)
+            if lexical_index is None:
+                with SEARCH_SECONDS.time(phase="vector"):
+                    return index.search(query_embedding, k=k)
+
+            candidates = max(k, HYBRID_CANDIDATES)
+            with SEARCH_SECONDS.time(phase="vector"):
+                dense = index.search(query_embedding, k=candidates)
+            with SEARCH_SECONDS.time(phase="lexical"):
+                lexical = lexical_index.search(query, k=candidates)
+                # Explicit section references are boosted, not trusted outright, so a
+                # misread reference cannot displace the rest of the ranking
+                referenced = lexical_index.lookup_sections(query)
+            return reciprocal_rank_fusion(
+                [referenced, dense, lexical], k=k, weights=[REFERENCE_WEIGHT, 1.0, 1.0]
+            )
+
+    async def asearch(self, query: str, k: int = 3) -> list[dict]:
+        """
+        Async variant of search(); the embedding and index lookup run on the embedding thread pool.
+
+        Args:
+            query (str): User query in natural language.
+            k (int): Number of sections to return.
+
+        Returns:
+            list[dict]: List of matching IPC sections with metadata and content.
+        """
+        return await run_in_embedding_pool(self.search, query, k)
+
+    def reload(self):
+        """
+        Re-load the search indexes, e.g. after the vector database was rebuilt.
+
+        The embedding model is kept, since rebuilding the collection does not change it.
+        """
+        with self._lock:
+            self._index = None
+            self._lexical_index = None
+
+
+async def run_in_embedding_pool(function, *args):
+    """Await a CPU-bound call, such as embedding text, on the shared embedding thread pool."""
+    # run_in_executor does not carry contextvars over; run in a copy so the trace ID reaches the pool
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_embedding_pool, context.run, function, *args)
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_ipc_retriever() -> IPCRetriever:
+    """
+    Return the process-wide IPC retriever, creating it from .env on first call.
+
+    Returns:
+        IPCRetriever: The shared retriever instance.
+    """
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                load_dotenv()
+
+                persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
+                if not persist_dir_path:
+                    raise EnvironmentError("❌ 'PERSIST_DIRECTORY_PATH' is not set in .env")
+
+                collection_name = os.getenv("IPC_COLLECTION_NAME")
+                backend = os.getenv("IPC_INDEX_BACKEND", "numpy")
+                ann_options = {
+                    "nprobe": int(os.getenv("IPC_IVF_NPROBE")) if os.getenv("IPC_IVF_NPROBE") else None,
+                    "ef_search": int(os.getenv("IPC_HNSW_EF_SEARCH")) if os.getenv("IPC_HNSW_EF_SEARCH") else None,
+                    "rerank": int(os.getenv("IPC_ANN_RERANK", "4"))
+                }
+
+                _retriever = IPCRetriever(
+                    persist_dir_path,
+                    collection_name,
+                    backend=backend,
+                    artifact_dir=os.getenv("IPC_EMBEDDINGS_PATH"),
+                    ipc_json_path=os.getenv("IPC_JSON_PATH"),
+                    hybrid=os.getenv("IPC_HYBRID_SEARCH", "true").lower() == "true",
+                    ann_options=ann_options
+                )
+    return _retriever
+
+
+def reload_ipc_retriever():
+    """Drop the cached index so the next search re-loads the rebuilt vector database."""
+    if _retriever is not None:
+        _retriever.reload()
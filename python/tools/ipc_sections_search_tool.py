@@ -1,15 +1,13 @@
 # ipc_sections_search_tool.py
 
-import os
-
-from dotenv import load_dotenv
 from crewai.tools import tool
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from context_budget import compact_ipc_sections
+from tools.ipc_retriever import get_ipc_retriever
 
 
 @tool("IPC Sections Search Tool")
-def search_ipc_sections(query: str) -> list[dict]:
+async def search_ipc_sections(query: str) -> list[dict]:
     """
     Search IPC vector database for sections relevant to the input query.
 
@@ -19,48 +17,17 @@ def search_ipc_sections(query: str) -> list[dict]:
     Returns:
         list[dict]: List of matching IPC sections with metadata and content.
     """
-    # Load environment variables
-    load_dotenv()
-
-    # Resolve vector DB path
-    persist_dir = os.getenv("PERSIST_DIRECTORY_PATH")
-    if not persist_dir:
-        raise EnvironmentError("❌ 'PERSIST_DIRECTORY_PATH' is not set in .env")
-
-    persist_dir_path = os.getenv("PERSIST_DIRECTORY_PATH")
-    collection_name = os.getenv("IPC_COLLECTION_NAME")
-
-    embedding_function = HuggingFaceEmbeddings()
-
-    # Load vectorstore
-    vector_db = Chroma(
-        collection_name=collection_name,
-        persist_directory=persist_dir_path,
-        embedding_function=embedding_function
-    )
-
     top_k = 3 # can be passed as an argument for flexibility
 
-    # Perform similarity search
-    docs = vector_db.similarity_search(query, k=top_k)
-
-    # Format results
-    return [
-        {
-            "section": doc.metadata.get("section"),
-            "section_title": doc.metadata.get("section_title"),
-            "chapter": doc.metadata.get("chapter"),
-            "chapter_title": doc.metadata.get("chapter_title"),
-            "content": doc.page_content
-        }
-        for doc in docs
-    ]
+    # The retriever loads the embedding model and vectorstore once per process and embeds
+    # on its thread pool, so async crews keep the event loop free; CrewAI runs the
+    # coroutine to completion itself when the crew is synchronous.
+    # Results are trimmed to the IPC section agent's context budget.
+    return compact_ipc_sections(await get_ipc_retriever().asearch(query, k=top_k))
 
 
 # Example usage of the IPC Section Search Tool - uncomment for testing the tool functionality
 # query = "What is the IPC section for Theft?"
-# results = search_ipc_sections.func(query)
+# results = asyncio.run(search_ipc_sections.func(query))
 # for r in results:
 #     print(r)
-
-# NOTE: Retrieval is a bit slower. Can be improved by caching the vectordb and using GPU for embedding.
@@ -0,0 +1,130 @@
+# ipc_vector_index.py
+
+import numpy as np
+from langchain_chroma import Chroma
+
+
+def format_ipc_result(metadata: dict, content: str) -> dict:
+    """
+    Shape one IPC section the way search_ipc_sections returns it.
+
+    Args:
+        metadata (dict): Section metadata stored alongside the embedding.
+        content (str): The embedded section text.
+
+    Returns:
+        dict: IPC section with metadata and content.
+    """
+    return {
+        "section": metadata.get("section"),
+        "section_title": metadata.get("section_title"),
+        "chapter": metadata.get("chapter"),
+        "chapter_title": metadata.get("chapter_title"),
+        "content": content
+    }
+
+
+class ChromaVectorIndex:
+    """
+    Index backend that searches a persistent Chroma collection.
+    """
+
+    def __init__(self, vector_db: Chroma):
+        self.vector_db = vector_db
+
+    def search(self, query_embedding: list[float], k: int = 3) -> list[dict]:
+        """
+        Return the k sections closest to the query embedding.
+
+        Args:
+            query_embedding (list[float]): Embedded user query.
+            k (int): Number of sections to return.
+
+        Returns:
+            list[dict]: List of matching IPC sections with metadata and content.
+        """
+        docs = self.vector_db.similarity_search_by_vector(query_embedding, k=k)
+        return [format_ipc_result(doc.metadata, doc.page_content) for doc in docs]
+
+
+class NumpyVectorIndex:
+    """
+    Index backend that keeps every section embedding in memory.
+
+    Embeddings are stored as one L2-normalized float32 matrix, so a top-k query
+    is a single matrix-vector product followed by argpartition. At the size of
+    ipc.json this is far cheaper than a round-trip through Chroma's SQLite store.
+    """
+
+    def __init__(self, embeddings: np.ndarray, metadatas: list[dict], documents: list[str], normalized: bool = False):
+        if len(embeddings) != len(metadatas) or len(embeddings) != len(documents):
+            raise ValueError("❌ Embeddings, metadatas and documents must have the same length.")
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if not normalized:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        # Already-normalized float32 input (e.g. a memory-mapped artifact) is used without copying
+        self.embeddings = matrix
+
+        # Kept as given, so lazily decoded artifact records are only read for the hits
+        self.metadatas = metadatas
+        self.documents = documents
+
+    @classmethod
+    def from_chroma(cls, vector_db: Chroma) -> "NumpyVectorIndex":
+        """
+        Build the in-memory index from the vectors already stored in a Chroma collection.
+
+        Args:
+            vector_db (Chroma): Collection produced by ipc_vectordb_builder.
+
+        Returns:
+            NumpyVectorIndex: Index holding a copy of the collection.
+        """
+        data = vector_db.get(include=["embeddings", "metadatas", "documents"])
+        if len(data["embeddings"]) == 0:
+            raise ValueError("❌ The Chroma collection is empty. Run ipc_vectordb_builder.py first.")
+
+        return cls(data["embeddings"], data["metadatas"], data["documents"])
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def search(self, query_embedding: list[float], k: int = 3) -> list[dict]:
+        """
+        Return the k sections with the highest cosine similarity to the query embedding.
+
+        Args:
+            query_embedding (list[float]): Embedded user query.
+            k (int): Number of sections to return.
+
+        Returns:
+            list[dict]: List of matching IPC sections with metadata and content.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self.embeddings @ query
+
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            metadata = self.metadatas[i]
+            results.append({
+                "section": metadata.get("section"),
+                "section_title": metadata.get("section_title"),
+                "chapter": metadata.get("chapter"),
+                "chapter_title": metadata.get("chapter_title"),
+                "content": self.documents[i]
+            })
+        return results
@@ -1,10 +1,21 @@
 # legal_precedent_search_tool.py
 
+import asyncio
+import hashlib
+import json
 import os
+import threading
+
 from dotenv import load_dotenv
 from crewai.tools import tool
 from tavily import TavilyClient
 
+from context_budget import acompact_precedents
+from metrics import REGISTRY
+from tools.ipc_retriever import run_in_embedding_pool
+from tools.precedent_store import PrecedentStore
+from tools.tiered_cache import TieredCache
+
 load_dotenv()
 
 # 🔧 Trusted Indian legal domains — you can add more here anytime
@@ -12,39 +23,124 @@ LEGAL_SOURCES = [
     "indiankanoon.org"
 ]
 
+MAX_RESULTS = 10
+
+# Precedent sources selectable through PRECEDENT_SOURCE, tried in the configured order
+PRECEDENT_SOURCES = ("local", "tavily")
+
+TAVILY_SECONDS = REGISTRY.histogram("lexora_tavily_search_seconds", "Latency of Tavily search requests.")
+PRECEDENT_STORE_SECONDS = REGISTRY.histogram(
+    "lexora_precedent_store_search_seconds", "Latency of local precedent store searches."
+)
+PRECEDENT_CACHE_LOOKUPS = REGISTRY.counter(
+    "lexora_precedent_cache_lookups_total",
+    "Precedent searches served from the cache (hit) or from the precedent sources (miss).",
+    ("result",)
+)
+
+_client = None
+_cache = None
+_store = None
+_init_lock = threading.Lock()
+
+
 def _is_legal_source(url: str) -> bool:
     """Check if a URL belongs to one of the trusted legal domains."""
     return any(domain in url for domain in LEGAL_SOURCES)
 
 
-@tool("Legal Precedent Search Tool")
-def search_legal_precedents(query: str) -> list[dict]:
+def get_tavily_client() -> TavilyClient:
     """
-    Use Tavily Search to find precedent legal cases for a given legal issue.
-    sample tool input: "Home trespassing and theft - precedent cases in India"
+    Return the process-wide Tavily client, whose pooled HTTP session is reused across searches.
 
-    Args:
-        query (str): The structured legal issue or case summary.
+    The client is synchronous and searches run on a worker thread. An async client would
+    be bound to one event loop, but when the crew runs synchronously CrewAI calls this
+    tool through asyncio.run, with a new loop for every call.
+    """
+    global _client
+    if _client is None:
+        with _init_lock:
+            if _client is None:
+                api_key = os.getenv("TAVILY_API_KEY")
+                if not api_key:
+                    raise ValueError("❌ 'TAVILY_API_KEY' not found in .env file")
+                _client = TavilyClient(api_key=api_key, api_base_url=os.getenv("TAVILY_API_BASE_URL") or None)
+    return _client
 
-    Returns:
-        list[dict]: Relevant case titles, summaries, and links from trusted Indian legal sources.
+
+def get_precedent_cache() -> TieredCache:
+    """Return the process-wide precedent search cache configured from .env."""
+    global _cache
+    if _cache is None:
+        with _init_lock:
+            if _cache is None:
+                _cache = TieredCache(
+                    max_entries=int(os.getenv("PRECEDENT_CACHE_SIZE", 256)),
+                    ttl_seconds=float(os.getenv("PRECEDENT_CACHE_TTL", 86400)),
+                    db_path=os.getenv("PRECEDENT_CACHE_PATH") or None,
+                    table="precedent_search",
+                    max_disk_entries=int(os.getenv("PRECEDENT_CACHE_DISK_SIZE", 10000))
+                )
+    return _cache
+
+
+def get_precedent_store() -> PrecedentStore:
+    """
+    Return the process-wide local precedent store at PRECEDENT_STORE_PATH.
+
+    Queries are embedded with the IPC retriever's model, which is already loaded,
+    unless PRECEDENT_STORE_DENSE is false.
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("❌ 'TAVILY_API_KEY' not found in .env file")
+    global _store
+    if _store is None:
+        with _init_lock:
+            if _store is None:
+                db_path = os.getenv("PRECEDENT_STORE_PATH")
+                if not db_path or not os.path.exists(db_path):
+                    raise ValueError(
+                        "❌ 'PRECEDENT_STORE_PATH' must point to a store built with precedent_store_builder.py"
+                    )
+
+                embed_query, model_name = None, None
+                if os.getenv("PRECEDENT_STORE_DENSE", "true").lower() == "true":
+                    from tools.ipc_retriever import get_ipc_retriever
+
+                    retriever = get_ipc_retriever()
+                    embed_query = retriever.embed_query
+                    model_name = retriever.embedding_function.model_name
+                _store = PrecedentStore(db_path, embed_query=embed_query, model_name=model_name)
+    return _store
 
-    client = TavilyClient(api_key=api_key)
+
+def get_precedent_sources() -> list[str]:
+    """Parse PRECEDENT_SOURCE, a comma-separated list such as "local,tavily"; Tavily only by default."""
+    sources = [source.strip() for source in os.getenv("PRECEDENT_SOURCE", "tavily").split(",") if source.strip()]
+    unknown = [source for source in sources if source not in PRECEDENT_SOURCES]
+    if unknown or not sources:
+        raise ValueError(
+            f"❌ Invalid PRECEDENT_SOURCE '{os.getenv('PRECEDENT_SOURCE')}'. Use any of: {', '.join(PRECEDENT_SOURCES)}"
+        )
+    return sources
+
+
+def _cache_key(query: str, sources: list[str]) -> str:
+    """Key a search on the normalized query, the precedent sources, the trusted domains and the result limit."""
+    normalized_query = " ".join(query.lower().split())
+    payload = json.dumps([normalized_query, sources, sorted(LEGAL_SOURCES), MAX_RESULTS])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _search_tavily(query: str) -> list[dict]:
+    client = get_tavily_client()
 
     # 🔍 Restrict search to only trusted legal domains
     search_query = f"site:{' OR site:'.join(LEGAL_SOURCES)} {query}"
 
-    response = client.search(
-        query=search_query,
-        max_results=10
-    )
+    with TAVILY_SECONDS.time():
+        response = await asyncio.to_thread(client.search, query=search_query, max_results=MAX_RESULTS)
 
     raw_results = response.get("results", [])
-    legal_results = [
+    return [
         {
             "title": item.get("title"),
             "summary": item.get("content"),
@@ -54,7 +150,44 @@ def search_legal_precedents(query: str) -> list[dict]:
         if _is_legal_source(item.get("url", ""))
     ]
 
-    return legal_results if legal_results else [{
+
+async def _search_local(query: str) -> list[dict]:
+    store = get_precedent_store()
+    # Embedding the query for re-ranking is CPU-bound, so the search runs on the embedding pool
+    with PRECEDENT_STORE_SECONDS.time():
+        return await run_in_embedding_pool(store.search, query, MAX_RESULTS)
+
+
+@tool("Legal Precedent Search Tool")
+async def search_legal_precedents(query: str) -> list[dict]:
+    """
+    Find precedent legal cases for a given legal issue in the configured sources:
+    Tavily Search, the local precedent store, or the store with Tavily as fallback.
+    sample tool input: "Home trespassing and theft - precedent cases in India"
+
+    Args:
+        query (str): The structured legal issue or case summary.
+
+    Returns:
+        list[dict]: Relevant case titles, summaries, and links from trusted Indian legal sources.
+    """
+    sources = get_precedent_sources()
+    cache = get_precedent_cache()
+    key = _cache_key(query, sources)
+
+    legal_results = cache.get(key)
+    PRECEDENT_CACHE_LOOKUPS.inc(result="hit" if legal_results is not None else "miss")
+    if legal_results is None:
+        # Later sources are only consulted when the earlier ones find nothing
+        for source in sources:
+            legal_results = await (_search_local(query) if source == "local" else _search_tavily(query))
+            if legal_results:
+                break
+        cache.set(key, legal_results)
+
+    # Ranked and trimmed to the precedent agent's context budget on the way out, so the
+    # cached results stay complete when the budget changes
+    return await acompact_precedents(legal_results, query) if legal_results else [{
         "title": "No relevant legal precedents found",
         "summary": "No matching results found from trusted Indian legal sources.",
         "link": None
@@ -63,6 +196,6 @@ def search_legal_precedents(query: str) -> list[dict]:
 
 # Example usage of the Tool - uncomment for testing the tool functionality
 # query = "Home trespassing and theft - precedent cases in India"
-# results = search_legal_precedents.func(query)
+# results = asyncio.run(search_legal_precedents.func(query))
 # for r in results:
-#     print(r)
\ No newline at end of file
+#     print(r)
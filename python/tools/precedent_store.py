@@ -0,0 +1,284 @@
+# precedent_store.py
+
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+
+from tools.ipc_lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+JUDGMENT_FIELDS = ("title", "citation", "court", "date", "headnote", "text", "link")
+
+# Full-text candidates re-ranked with embeddings per query
+FTS_CANDIDATES = 50
+
+# Characters of the judgment text used as the summary when there is no headnote
+SUMMARY_CHARS = 600
+
+# Characters of the judgment text embedded when there is no headnote
+EMBED_TEXT_CHARS = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS judgments (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT UNIQUE NOT NULL,
+    content_hash TEXT NOT NULL,
+    title TEXT, citation TEXT, court TEXT, date TEXT, headnote TEXT, text TEXT, link TEXT,
+    embedding BLOB
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS judgments_fts USING fts5(
+    title, citation, court, headnote, text,
+    content='judgments', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS judgments_ai AFTER INSERT ON judgments BEGIN
+    INSERT INTO judgments_fts(rowid, title, citation, court, headnote, text)
+    VALUES (new.id, new.title, new.citation, new.court, new.headnote, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS judgments_ad AFTER DELETE ON judgments BEGIN
+    INSERT INTO judgments_fts(judgments_fts, rowid, title, citation, court, headnote, text)
+    VALUES ('delete', old.id, old.title, old.citation, old.court, old.headnote, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS judgments_au AFTER UPDATE ON judgments BEGIN
+    INSERT INTO judgments_fts(judgments_fts, rowid, title, citation, court, headnote, text)
+    VALUES ('delete', old.id, old.title, old.citation, old.court, old.headnote, old.text);
+    INSERT INTO judgments_fts(rowid, title, citation, court, headnote, text)
+    VALUES (new.id, new.title, new.citation, new.court, new.headnote, new.text);
+END;
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def iter_judgments(file_path: str) -> Iterator[dict]:
+    """
+    Stream judgments from a JSON Lines dump, one object per line; .gz files are decompressed on the fly.
+
+    Args:
+        file_path (str): Path to the .jsonl or .jsonl.gz dump.
+
+    Yields:
+        dict: One judgment with any of the fields title, citation, court, date, headnote, text and link (or url).
+    """
+    opener = gzip.open if file_path.endswith(".gz") else open
+    with opener(file_path, "rt", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping line {line_number} of '{file_path}': {e}")
+
+
+def judgment_key(judgment: dict) -> str:
+    """Identify a judgment by its id or citation, or else by its title, court and date."""
+    if judgment.get("id") is not None:
+        return str(judgment["id"])
+    if judgment.get("citation"):
+        return judgment["citation"].strip()
+    payload = json.dumps([judgment.get("title"), judgment.get("court"), judgment.get("date")])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _embedding_text(judgment: dict) -> str:
+    body = judgment.get("headnote") or (judgment.get("text") or "")[:EMBED_TEXT_CHARS]
+    return f"{judgment.get('title') or ''}\n\n{body}"
+
+
+def _fts_query(query: str) -> str | None:
+    """Turn free text into an FTS5 query matching any of its terms; None when it has no terms."""
+    terms = dict.fromkeys(tokenize(query))
+    return " OR ".join(f'"{term}"' for term in terms) or None
+
+
+class PrecedentStore:
+    """
+    Local, offline store of court judgments in SQLite, searched with FTS5.
+
+    Judgments are ingested from a streamed dump and indexed for full-text search
+    over their title, citation, court, headnote and text. When an embedding model
+    is configured, every judgment's title and headnote is embedded at ingestion,
+    and the best full-text candidates of a query are re-ranked by fusing their BM25
+    rank with their embedding similarity. Searches return the same shape as the
+    Tavily-backed precedent search.
+    """
+
+    def __init__(self, db_path: str, embed_documents: Callable[[list[str]], list] | None = None,
+                 embed_query: Callable[[str], list] | None = None, model_name: str | None = None):
+        self.db_path = db_path
+        self.embed_documents = embed_documents
+        self.embed_query = embed_query
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self.dense = self._check_model()
+
+    def _check_model(self) -> bool:
+        """Use embeddings only when the store was built with the model that embeds queries."""
+        if self.model_name is None:
+            return False
+        row = self._db.execute("SELECT value FROM store_meta WHERE key = 'embedding_model'").fetchone()
+        if row is None or row[0] == self.model_name:
+            return True
+        logger.warning(
+            f"Precedent store was embedded with '{row[0]}' but queries use '{self.model_name}'; "
+            "searching with full-text ranking only."
+        )
+        return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM judgments").fetchone()[0]
+
+    def ingest(self, judgments: Iterable[dict], batch_size: int = 64, verbose: bool = False) -> dict:
+        """
+        Add or update judgments, one batch at a time, so dumps of any size stream through.
+
+        Judgments whose content is unchanged since the last ingestion are skipped
+        without being embedded again.
+
+        Args:
+            judgments (Iterable[dict]): Judgments, e.g. from iter_judgments.
+            batch_size (int): Judgments embedded and written per transaction.
+            verbose (bool): Print progress after every batch.
+
+        Returns:
+            dict: Counts of added, updated, unchanged and skipped judgments, and timings.
+        """
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        start = time.perf_counter()
+        embed_seconds = 0.0
+        embed = self.embed_documents if self.model_name else None
+
+        if embed is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('embedding_model', ?)", (self.model_name,)
+                )
+                self._db.commit()
+
+        batch = []
+        for judgment in judgments:
+            if not (judgment.get("title") or judgment.get("text")):
+                stats["skipped"] += 1
+                continue
+            batch.append(judgment)
+            if len(batch) == batch_size:
+                embed_seconds += self._ingest_batch(batch, embed, stats)
+                batch = []
+                if verbose:
+                    print(f"  {sum(stats.values())} judgments processed")
+        if batch:
+            embed_seconds += self._ingest_batch(batch, embed, stats)
+
+        stats["embed_seconds"] = embed_seconds
+        stats["total_seconds"] = time.perf_counter() - start
+        return stats
+
+    def _ingest_batch(self, batch: list[dict], embed, stats: dict) -> float:
+        rows = {}
+        for judgment in batch:
+            fields = {field: judgment.get(field) for field in JUDGMENT_FIELDS}
+            fields["link"] = fields["link"] or judgment.get("url")
+            content_hash = hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+            rows[judgment_key(judgment)] = (fields, content_hash)
+
+        with self._lock:
+            placeholders = ",".join("?" * len(rows))
+            existing = dict(self._db.execute(
+                f"SELECT doc_key, content_hash FROM judgments WHERE doc_key IN ({placeholders})", list(rows)
+            ).fetchall())
+
+        changed = {key: row for key, row in rows.items() if existing.get(key) != row[1]}
+        stats["unchanged"] += len(rows) - len(changed)
+        if not changed:
+            return 0.0
+
+        embed_start = time.perf_counter()
+        embeddings = [None] * len(changed)
+        if embed is not None:
+            vectors = np.asarray(embed([_embedding_text(fields) for fields, _ in changed.values()]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            embeddings = [vector.tobytes() for vector in vectors]
+        embed_seconds = time.perf_counter() - embed_start
+
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO judgments (doc_key, content_hash, title, citation, court, date, headnote, text, link, embedding) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(doc_key) DO UPDATE SET content_hash = excluded.content_hash, title = excluded.title, "
+                "citation = excluded.citation, court = excluded.court, date = excluded.date, "
+                "headnote = excluded.headnote, text = excluded.text, link = excluded.link, embedding = excluded.embedding",
+                [
+                    (key, content_hash, *(fields[field] for field in JUDGMENT_FIELDS), embedding)
+                    for (key, (fields, content_hash)), embedding in zip(changed.items(), embeddings)
+                ]
+            )
+            self._db.commit()
+
+        for key in changed:
+            stats["updated" if key in existing else "added"] += 1
+        return embed_seconds
+
+    def search(self, query: str, k: int = 10) -> list[dict]:
+        """
+        Find the judgments most relevant to a query.
+
+        Args:
+            query (str): The legal issue or case summary.
+            k (int): Number of judgments to return.
+
+        Returns:
+            list[dict]: Judgments as `title`, `summary` and `link`, best first.
+        """
+        match = _fts_query(query)
+        if match is None:
+            return []
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT j.title, j.citation, j.court, j.date, j.headnote, j.text, j.link, j.embedding "
+                "FROM judgments_fts JOIN judgments j ON j.id = judgments_fts.rowid "
+                "WHERE judgments_fts MATCH ? "
+                "ORDER BY bm25(judgments_fts, 5.0, 3.0, 1.0, 3.0, 1.0) LIMIT ?",
+                (match, max(k, FTS_CANDIDATES) if self.dense else k)
+            ).fetchall()
+
+        if self.dense and len(rows) > 1 and all(row[7] is not None for row in rows):
+            query_embedding = np.asarray(self.embed_query(query), dtype=np.float32)
+            similarities = np.stack([np.frombuffer(row[7], dtype=np.float32) for row in rows]) @ query_embedding
+            dense_rank = np.empty(len(rows), dtype=np.int64)
+            dense_rank[np.argsort(-similarities)] = np.arange(len(rows))
+            # Reciprocal rank fusion of the BM25 order (the row order) and the embedding order
+            fused = [1.0 / (60 + lexical_rank + 1) + 1.0 / (60 + dense_rank[lexical_rank] + 1)
+                     for lexical_rank in range(len(rows))]
+            rows = [rows[i] for i in sorted(range(len(rows)), key=lambda i: fused[i], reverse=True)]
+
+        return [self._format(row) for row in rows[:k]]
+
+    @staticmethod
+    def _format(row) -> dict:
+        title, citation, court, date, headnote, text, link, _ = row
+        heading = title or citation or "Untitled judgment"
+        details = ", ".join(part for part in (citation if title else None, court, date) if part)
+        summary = headnote or " ".join((text or "").split())[:SUMMARY_CHARS]
+        return {
+            "title": f"{heading} ({details})" if details else heading,
+            "summary": summary,
+            "link": link
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,150 @@
+# tiered_cache.py
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Writes between purges of the disk tier
+PURGE_INTERVAL = 100
+
+
+class TieredCache:
+    """
+    Thread-safe key/value cache with an in-process LRU tier and an optional SQLite tier.
+
+    Values must be JSON-serializable. Entries expire ttl_seconds after they were
+    written, in both tiers. The memory tier holds at most max_entries items and
+    evicts the least recently used one; the disk tier survives restarts and is
+    shared by every process pointing at the same file. Every PURGE_INTERVAL writes,
+    and when the file is opened, expired rows are deleted from the disk tier and it
+    is cut back to its max_disk_entries newest rows.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 86400, db_path: str | None = None,
+                 table: str = "cache", max_disk_entries: int | None = 10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.table = table
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)")
+            self._purge()
+            self._db.commit()
+
+    def get(self, key: str):
+        """
+        Return the cached value for key, or None on a miss or expired entry.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            The cached value, or None.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    raw_value, created_at = row
+                    if now - created_at < self.ttl_seconds:
+                        value = json.loads(raw_value)
+                        self._remember(key, created_at, value)
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value):
+        """
+        Store a value in both tiers.
+
+        Args:
+            key (str): Cache key.
+            value: JSON-serializable value.
+        """
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), created_at)
+                )
+                self._writes += 1
+                if self._writes % PURGE_INTERVAL == 0:
+                    self._purge()
+                self._db.commit()
+
+    def _purge(self):
+        # Rows are otherwise only deleted when their key is looked up after expiry
+        self._db.execute(f"DELETE FROM {self.table} WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+        if self.max_disk_entries is not None:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+
+    def _remember(self, key: str, created_at: float, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """
+        Report hit/miss counters for the cache.
+
+        Returns:
+            dict: Hits per tier, misses, hit rate and current memory-tier size.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
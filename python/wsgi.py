@@ -0,0 +1,16 @@
+# wsgi.py
+#
+# Production entry point for the Flask API:  gunicorn wsgi:app  (settings in gunicorn.conf.py)
+
+import os
+
+# Loading on a background thread would not survive gunicorn's fork; the crew,
+# embedding model and IPC index are loaded synchronously below instead
+os.environ["WARMUP_ON_START"] = "false"
+
+from api import app, crew_loader
+
+# With preload_app this runs once in the gunicorn master, so every worker shares
+# the loaded model and memory-mapped index copy-on-write; anything that opens
+# Chroma's SQLite store is left to the workers (see CrewLoader.preload)
+crew_loader.preload()